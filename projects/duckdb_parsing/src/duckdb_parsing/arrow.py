@@ -0,0 +1,108 @@
+"""
+Hand loans and repayments to DuckDB as Arrow tables.
+
+The dataclasses are converted column by column into Arrow arrays, and the
+tables are registered on the connection as views. DuckDB scans Arrow
+tables in place, so nothing is written to (or parsed back from) disk.
+"""
+
+from collections.abc import Iterable
+
+import duckdb
+import pyarrow
+
+from duckdb_parsing.main import Loan, Repayment
+
+LOANS_SCHEMA = pyarrow.schema(
+    [
+        pyarrow.field("loan_id", pyarrow.int64(), nullable=False),
+        pyarrow.field("amount", pyarrow.float64(), nullable=False),
+        pyarrow.field("terms", pyarrow.int64(), nullable=False),
+    ]
+)
+REPAYMENTS_SCHEMA = pyarrow.schema(
+    [
+        pyarrow.field("loan_id", pyarrow.int64(), nullable=False),
+        pyarrow.field("repayment_id", pyarrow.int64(), nullable=False),
+        pyarrow.field("amount", pyarrow.float64(), nullable=False),
+        pyarrow.field("paid", pyarrow.bool_(), nullable=False),
+    ]
+)
+
+
+def loans_to_arrow(loans: Iterable[Loan]) -> pyarrow.Table:
+    """
+    Convert the loans (without their repayments) to an Arrow table.
+    """
+
+    loans = list(loans)
+    return pyarrow.table(
+        [
+            [loan.loan_id for loan in loans],
+            [loan.amount for loan in loans],
+            [loan.terms for loan in loans],
+        ],
+        schema=LOANS_SCHEMA,
+    )
+
+
+def repayments_to_arrow(repayments: Iterable[Repayment]) -> pyarrow.Table:
+    """
+    Convert the repayments to an Arrow table.
+    """
+
+    repayments = list(repayments)
+    return pyarrow.table(
+        [
+            [repayment.loan_id for repayment in repayments],
+            [repayment.repayment_id for repayment in repayments],
+            [repayment.amount for repayment in repayments],
+            [repayment.paid for repayment in repayments],
+        ],
+        schema=REPAYMENTS_SCHEMA,
+    )
+
+
+def register_loans(
+    conn: duckdb.DuckDBPyConnection,
+    loans: Iterable[Loan],
+) -> None:
+    """
+    Register the loans and their repayments on the connection, as the
+    ``loans`` and ``repayments`` views.
+    """
+
+    loans = list(loans)
+    conn.register("loans", loans_to_arrow(loans))
+    conn.register(
+        "repayments",
+        repayments_to_arrow(
+            repayment for loan in loans for repayment in loan.repayments
+        ),
+    )
+
+
+def main() -> None:
+    loan = Loan(1, 1000, 10)
+
+    # pay off three repayments
+    for rep in loan.repayments[:3]:
+        rep.paid = True
+
+    # outstanding balance
+    conn = duckdb.connect()
+    register_loans(conn, [loan])
+    outstanding = conn.sql(
+        """
+        select sum(amount) as outstanding
+        from repayments
+        where loan_id = $id
+          and paid = false
+        """,
+        params={"id": loan.loan_id},
+    )
+    print(outstanding)
+
+
+if __name__ == "__main__":
+    main()
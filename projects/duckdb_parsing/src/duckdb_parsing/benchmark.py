@@ -0,0 +1,145 @@
+"""
+Compare getting the repayments into DuckDB through a CSV file, a JSON
+file and an Arrow table.
+
+Each approach starts from the dataclasses and ends with the outstanding
+balance, so the times include the serialising as well as the reading.
+
+Then compare ways of getting the outstanding balance of many loans: the
+global ``duckdb.sql`` per loan (as in ``main``), the portfolio's prepared
+statement per loan, and the portfolio's single batched query.
+
+    python -m duckdb_parsing.benchmark
+"""
+
+import json
+import pathlib
+import tempfile
+import time
+from collections.abc import Callable
+
+import duckdb
+import pyarrow
+
+from duckdb_parsing import arrow
+from duckdb_parsing.main import Loan, Repayment
+from duckdb_parsing.portfolio import Portfolio
+
+N = 1_000_000
+TERMS = 10
+LOOKUPS = 1_000
+OUTSTANDING = "select sum(amount) from repayments where paid = false"
+
+
+def _repayments(n: int) -> list[Repayment]:
+    repayments = []
+    for loan_id in range(n // TERMS):
+        loan = Loan(loan_id, 1000, TERMS)
+        for rep in loan.repayments[:3]:
+            rep.paid = True
+        repayments.extend(loan.repayments)
+
+    return repayments
+
+
+def via_csv(repayments: list[Repayment], target: pathlib.Path) -> float:
+    target.write_text(
+        "loan_id,repayment_id,amount,paid\n"
+        + "".join(
+            f"{r.loan_id},{r.repayment_id},{r.amount},{r.paid}\n"
+            for r in repayments
+        )
+    )
+    conn = duckdb.connect()
+    conn.register("repayments", conn.read_csv(str(target), header=True))
+    return conn.sql(OUTSTANDING).fetchone()[0]
+
+
+def via_json(repayments: list[Repayment], target: pathlib.Path) -> float:
+    target.write_text("".join(json.dumps(vars(r)) + "\n" for r in repayments))
+    conn = duckdb.connect()
+    conn.register("repayments", conn.read_json(str(target)))
+    return conn.sql(OUTSTANDING).fetchone()[0]
+
+
+def via_arrow(repayments: list[Repayment]) -> float:
+    conn = duckdb.connect()
+    conn.register("repayments", arrow.repayments_to_arrow(repayments))
+    return conn.sql(OUTSTANDING).fetchone()[0]
+
+
+def via_global_sql(repayments: pyarrow.Table, loan_ids: range) -> float:
+    """
+    The approach in ``main``.
+    """
+
+    # The query finds ``repayments`` by scanning this function's locals
+    outstanding = 0.0
+    for loan_id in loan_ids:
+        outstanding += duckdb.sql(
+            """
+            select sum(amount) as outstanding
+            from repayments
+            where loan_id = $id
+              and paid = false
+            """,
+            params={"id": loan_id},
+        ).fetchone()[0]
+
+    return outstanding
+
+
+def via_prepared(portfolio: Portfolio, loan_ids: range) -> float:
+    return sum(portfolio.outstanding(loan_id) for loan_id in loan_ids)
+
+
+def via_batched(portfolio: Portfolio, loan_ids: range) -> float:
+    return sum(portfolio.outstanding_many(loan_ids).values())
+
+
+def _time(
+    label: str,
+    func: Callable[[], float],
+    n: int,
+    unit: str = "repayments",
+) -> None:
+    start = time.perf_counter()
+    outstanding = func()
+    seconds = time.perf_counter() - start
+    print(
+        f"{label:<10}{seconds:>8.2f}s {n / seconds:>12,.0f} {unit}/s"
+        f" (outstanding: {outstanding:,.2f})"
+    )
+
+
+def main(n: int = N) -> None:
+    repayments = _repayments(n)
+    print(f"Ingesting {len(repayments):,} repayments")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = pathlib.Path(tmp) / "repayments.csv"
+        json_file = pathlib.Path(tmp) / "repayments.json"
+        _time("csv", lambda: via_csv(repayments, csv_file), n)
+        _time("json", lambda: via_json(repayments, json_file), n)
+        _time("arrow", lambda: via_arrow(repayments), n)
+
+    print(f"\nOutstanding balances of {LOOKUPS:,} loans")
+    table = arrow.repayments_to_arrow(repayments)
+    loan_ids = range(LOOKUPS)
+    _time("global", lambda: via_global_sql(table, loan_ids), LOOKUPS, "loans")
+    with Portfolio(table) as portfolio:
+        _time(
+            "prepared",
+            lambda: via_prepared(portfolio, loan_ids),
+            LOOKUPS,
+            "loans",
+        )
+        _time(
+            "batched",
+            lambda: via_batched(portfolio, loan_ids),
+            LOOKUPS,
+            "loans",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Keep the outstanding balance of each loan up to date as its repayments
+change.
+
+Rather than summing the unpaid repayments every time a balance is needed,
+the ledger keeps a running balance per loan and adjusts it on each event:
+
+- ``pay`` takes the repayment's amount off the balance
+- ``reverse`` (un-pay) puts it back on
+- ``restructure`` replaces the unpaid repayments with a new schedule,
+  which sets the balance to the new schedule's total
+
+so a balance lookup is a dictionary lookup. The running balances can
+drift from an exact sum by floating-point rounding, so ``check`` compares
+them to a full recompute in DuckDB within a tolerance.
+"""
+
+import math
+from collections.abc import Iterable, Iterator
+
+import duckdb
+
+from duckdb_parsing import arrow
+from duckdb_parsing.main import Loan, Repayment
+
+
+class Ledger:
+    """
+    The loans, their repayments, and their outstanding balances.
+
+    The loans' dataclasses are updated in place by the events, so they
+    always match the balances.
+    """
+
+    def __init__(self, loans: Iterable[Loan] = ()) -> None:
+        self.loans: dict[int, Loan] = {}
+        self._repayments: dict[tuple[int, int], Repayment] = {}
+        self._balances: dict[int, float] = {}
+        for loan in loans:
+            self.add_loan(loan)
+
+    def add_loan(self, loan: Loan) -> None:
+        if loan.loan_id in self.loans:
+            raise ValueError(f"Loan {loan.loan_id} is already in the ledger")
+
+        self.loans[loan.loan_id] = loan
+        self._balances[loan.loan_id] = 0.0
+        for repayment in loan.repayments:
+            self._add_repayment(repayment)
+
+    def _add_repayment(self, repayment: Repayment) -> None:
+        self._repayments[repayment.loan_id, repayment.repayment_id] = repayment
+        if not repayment.paid:
+            self._balances[repayment.loan_id] += repayment.amount
+
+    def _repayment(self, loan_id: int, repayment_id: int) -> Repayment:
+        try:
+            return self._repayments[loan_id, repayment_id]
+        except KeyError:
+            raise KeyError(
+                f"Loan {loan_id} has no repayment {repayment_id}"
+            ) from None
+
+    def pay(self, loan_id: int, repayment_id: int) -> None:
+        """
+        Mark the repayment as paid. Paying a paid repayment does nothing.
+        """
+
+        repayment = self._repayment(loan_id, repayment_id)
+        if not repayment.paid:
+            repayment.paid = True
+            self._balances[loan_id] -= repayment.amount
+
+    def reverse(self, loan_id: int, repayment_id: int) -> None:
+        """
+        Mark the repayment as unpaid again, e.g. after a bounced payment.
+        Reversing an unpaid repayment does nothing.
+        """
+
+        repayment = self._repayment(loan_id, repayment_id)
+        if repayment.paid:
+            repayment.paid = False
+            self._balances[loan_id] += repayment.amount
+
+    def restructure(
+        self,
+        loan_id: int,
+        terms: int,
+        outstanding: float | None = None,
+    ) -> None:
+        """
+        Replace the loan's unpaid repayments with ``terms`` equal ones.
+
+        The new repayments are numbered on from the loan's last repayment,
+        and split the outstanding balance between them (or ``outstanding``,
+        if given, e.g. after part of the loan is written off).
+        """
+
+        if terms < 1:
+            raise ValueError("A loan needs at least one term")
+        loan = self.loans[loan_id]
+        if outstanding is None:
+            outstanding = self._balances[loan_id]
+
+        paid = [repayment for repayment in loan.repayments if repayment.paid]
+        for repayment in loan.repayments:
+            if not repayment.paid:
+                del self._repayments[loan_id, repayment.repayment_id]
+
+        last_id = max(
+            (repayment.repayment_id for repayment in loan.repayments),
+            default=0,
+        )
+        loan.repayments = paid
+        loan.terms = len(paid) + terms
+        self._balances[loan_id] = 0.0
+        for i in range(1, 1 + terms):
+            repayment = Repayment(
+                loan_id, last_id + i, outstanding / terms, False
+            )
+            loan.repayments.append(repayment)
+            self._add_repayment(repayment)
+
+    def outstanding(self, loan_id: int) -> float:
+        """
+        Return the outstanding balance of the loan.
+        """
+
+        return self._balances[loan_id]
+
+    def repayments(self) -> Iterator[Repayment]:
+        for loan in self.loans.values():
+            yield from loan.repayments
+
+    def check(
+        self,
+        conn: duckdb.DuckDBPyConnection | None = None,
+        rel_tol: float = 1e-9,
+        abs_tol: float = 1e-6,
+    ) -> dict[int, tuple[float, float]]:
+        """
+        Recompute every balance in DuckDB, and compare it to the ledger's.
+
+        Return the loans whose balances differ by more than the tolerances
+        (see ``math.isclose``), as their ledger and recomputed balances.
+        """
+
+        conn = conn or duckdb.connect()
+        arrow.register_loans(conn, self.loans.values())
+        recomputed = conn.sql(
+            """
+            select
+                loans.loan_id,
+                coalesce(
+                    sum(repayments.amount)
+                        filter (where repayments.paid = false),
+                    0
+                )
+            from loans
+                left join repayments
+                    using (loan_id)
+            group by loans.loan_id
+            """
+        ).fetchall()
+
+        return {
+            loan_id: (self._balances[loan_id], balance)
+            for loan_id, balance in recomputed
+            if not math.isclose(
+                self._balances[loan_id],
+                balance,
+                rel_tol=rel_tol,
+                abs_tol=abs_tol,
+            )
+        }
+
+
+def main() -> None:
+    ledger = Ledger([Loan(1, 1000, 10), Loan(2, 500, 5)])
+
+    # pay off three repayments, bounce one, and stretch the rest out
+    for repayment_id in (1, 2, 3):
+        ledger.pay(1, repayment_id)
+    ledger.reverse(1, 3)
+    ledger.restructure(1, terms=14)
+
+    print(f"outstanding for loan 1: {ledger.outstanding(1)}")
+    print(f"repayments for loan 1: {len(ledger.loans[1].repayments)}")
+    print(f"inconsistent balances: {ledger.check()}")
+
+
+if __name__ == "__main__":
+    main()
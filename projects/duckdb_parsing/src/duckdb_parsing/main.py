@@ -48,11 +48,10 @@ def main() -> None:
 
 
 def loan_repayments_as_csv(loan: Loan) -> str:
-    csv = "loan_id,repayment_id,amount,paid\n"
-    for repayment in loan.repayments:
-        csv += f"{repayment.loan_id},{repayment.repayment_id},{repayment.amount},{repayment.paid}\n"
-
-    return csv
+    return "loan_id,repayment_id,amount,paid\n" + "".join(
+        f"{repayment.loan_id},{repayment.repayment_id},{repayment.amount},{repayment.paid}\n"
+        for repayment in loan.repayments
+    )
 
 
 def main_workaround() -> None:
@@ -62,7 +61,8 @@ def main_workaround() -> None:
     for rep in loan.repayments[:3]:
         rep.paid = True
 
-    # outstanding balance  TODO: serialise to JSON instead -- performance difference?
+    # outstanding balance (see `arrow` for a version without the file, and
+    # `benchmark` for how CSV, JSON and Arrow compare)
     with open("repayments.csv", "w") as repayments_file:
         repayments_file.write(loan_repayments_as_csv(loan))
 
@@ -0,0 +1,160 @@
+"""
+Answer outstanding-balance queries for a portfolio of loans.
+
+``main`` runs its query through the global ``duckdb.sql``, which parses
+and plans it again on every call, and finds the repayments by scanning
+the caller's local variables. The portfolio here owns a connection
+instead: the repayments are loaded into it once, and the balance query is
+prepared once and then just executed for each loan.
+
+The repayments are copied into a DuckDB table sorted by loan, so a lookup
+for one loan only scans the row groups whose loan IDs cover it. For many
+loans at once, ``outstanding_many`` answers them all with a single join.
+"""
+
+import operator
+from collections.abc import Iterable
+from types import TracebackType
+from typing import Self
+
+import duckdb
+import pyarrow
+
+from duckdb_parsing import arrow
+from duckdb_parsing.main import Loan
+
+
+class Portfolio:
+    """
+    The repayments of a set of loans, loaded into a DuckDB connection.
+
+    :param repayments: The repayments, with the columns of
+        ``arrow.REPAYMENTS_SCHEMA``.
+    :param conn: The connection to load them into. Defaults to a new
+        in-memory database.
+    """
+
+    def __init__(
+        self,
+        repayments: pyarrow.Table,
+        conn: duckdb.DuckDBPyConnection | None = None,
+    ) -> None:
+        self.conn = conn or duckdb.connect()
+        self.load(repayments)
+
+    @classmethod
+    def from_loans(
+        cls,
+        loans: Iterable[Loan],
+        conn: duckdb.DuckDBPyConnection | None = None,
+    ) -> Self:
+        return cls(
+            arrow.repayments_to_arrow(
+                repayment for loan in loans for repayment in loan.repayments
+            ),
+            conn,
+        )
+
+    def load(self, repayments: pyarrow.Table) -> None:
+        """
+        (Re)load the repayments, replacing any loaded before.
+        """
+
+        self.conn.register("repayments_source", repayments)
+        self.conn.execute(
+            """
+            create or replace table repayments as
+                select loan_id, repayment_id, amount, paid
+                from repayments_source
+                order by loan_id, repayment_id
+            """
+        )
+        self.conn.unregister("repayments_source")
+
+        # The statement is bound to the table, so prepare it again
+        self.conn.execute(
+            """
+            prepare outstanding as
+                select coalesce(sum(amount), 0)
+                from repayments
+                where loan_id = $1
+                  and paid = false
+            """
+        )
+
+    def outstanding(self, loan_id: int) -> float:
+        """
+        Return the outstanding balance of the loan (zero for unknown loans).
+        """
+
+        # DuckDB can't bind parameters to an EXECUTE, so the ID is inlined
+        # (as an int, so it's safe to do)
+        return self.conn.execute(
+            f"execute outstanding({operator.index(loan_id)})"
+        ).fetchone()[0]
+
+    def outstanding_many(self, loan_ids: Iterable[int]) -> dict[int, float]:
+        """
+        Return the outstanding balance of each of the loans, in one query.
+        """
+
+        # Each ID once, as a repeated one would be joined (and summed) twice
+        unique_ids = list(dict.fromkeys(loan_ids))
+        self.conn.register(
+            "requested_loans",
+            pyarrow.table(
+                {"loan_id": pyarrow.array(unique_ids, pyarrow.int64())}
+            ),
+        )
+        try:
+            rows = self.conn.execute(
+                """
+                select
+                    requested_loans.loan_id,
+                    coalesce(
+                        sum(repayments.amount)
+                            filter (where repayments.paid = false),
+                        0
+                    )
+                from requested_loans
+                    left join repayments
+                        using (loan_id)
+                group by requested_loans.loan_id
+                """
+            ).fetchall()
+        finally:
+            self.conn.unregister("requested_loans")
+
+        return dict(rows)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def main() -> None:
+    loans = [Loan(loan_id, 1000, 10) for loan_id in range(1, 1_001)]
+
+    # pay off three repayments of each loan
+    for loan in loans:
+        for rep in loan.repayments[:3]:
+            rep.paid = True
+
+    with Portfolio.from_loans(loans) as portfolio:
+        print(f"outstanding for loan 1: {portfolio.outstanding(1)}")
+        balances = portfolio.outstanding_many(range(1, 1_001))
+        print(f"outstanding for all loans: {sum(balances.values())}")
+
+
+if __name__ == "__main__":
+    main()
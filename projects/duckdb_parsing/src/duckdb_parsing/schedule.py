@@ -0,0 +1,252 @@
+"""
+A columnar store for the repayment schedules of many loans.
+
+``Loan`` builds a ``Repayment`` object per term, which is a lot of small
+objects for a portfolio of millions of loans. The schedule here keeps the
+repayments of every loan in four Arrow arrays instead (loan ID, repayment
+ID, amount and paid), with each loan's repayments stored together. The
+schedules are generated, marked as paid and summed with Arrow compute
+functions, so none of it loops over the repayments in Python.
+
+Arrow arrays are immutable, so marking repayments as paid replaces the
+``paid`` array (in a single vectorised pass) rather than updating it in
+place: it's built for bulk updates, not for one repayment at a time.
+
+The dataclasses are still available, through ``loans`` and
+``repayments``, for code that expects them.
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Self
+
+import pyarrow
+import pyarrow.compute
+
+from duckdb_parsing.arrow import REPAYMENTS_SCHEMA
+from duckdb_parsing.main import Loan, Repayment
+
+
+def _ones(length: int) -> pyarrow.Array:
+    return pyarrow.repeat(pyarrow.scalar(1, pyarrow.int64()), length)
+
+
+class Schedule:
+    """
+    The repayment schedules of a set of loans.
+
+    :param loan_ids: The IDs of the loans.
+    :param amounts: The amount of each loan.
+    :param terms: The number of repayments of each loan, which split the
+        loan's amount equally.
+    """
+
+    def __init__(
+        self,
+        loan_ids: Sequence[int] | pyarrow.Array,
+        amounts: Sequence[float] | pyarrow.Array,
+        terms: Sequence[int] | pyarrow.Array,
+    ) -> None:
+        self.loan_ids = pyarrow.array(loan_ids, pyarrow.int64())
+        self.amounts = pyarrow.array(amounts, pyarrow.float64())
+        self.terms = pyarrow.array(terms, pyarrow.int64())
+        if not len(self.loan_ids) == len(self.amounts) == len(self.terms):
+            raise ValueError("Each loan needs an ID, an amount and terms")
+        if pyarrow.compute.count_distinct(self.loan_ids).as_py() != len(
+            self.loan_ids
+        ):
+            raise ValueError("The loan IDs must be unique")
+
+        # Loan i's repayments are rows offsets[i] to offsets[i + 1]
+        self.offsets = pyarrow.concat_arrays(
+            [
+                pyarrow.array([0], pyarrow.int64()),
+                pyarrow.compute.cumulative_sum(self.terms),
+            ]
+        )
+        size = self.offsets[-1].as_py()
+        loan_index = pyarrow.compute.list_parent_indices(
+            pyarrow.LargeListArray.from_arrays(
+                self.offsets, pyarrow.nulls(size)
+            )
+        )
+        starts = pyarrow.compute.take(self.offsets, loan_index)
+
+        self.loan_id = pyarrow.compute.take(self.loan_ids, loan_index)
+        self.repayment_id = pyarrow.compute.subtract(
+            pyarrow.compute.cumulative_sum(_ones(size)), starts
+        )
+        self.amount = pyarrow.compute.take(
+            pyarrow.compute.divide(self.amounts, self.terms), loan_index
+        )
+        self.paid = pyarrow.repeat(pyarrow.scalar(False), size)
+
+    @classmethod
+    def from_loans(cls, loans: Iterable[Loan]) -> Self:
+        """
+        Build the schedule from the loan dataclasses, keeping which of
+        their repayments have been paid.
+        """
+
+        loans = list(loans)
+        schedule = cls(
+            [loan.loan_id for loan in loans],
+            [loan.amount for loan in loans],
+            [loan.terms for loan in loans],
+        )
+        schedule.paid = pyarrow.array(
+            [rep.paid for loan in loans for rep in loan.repayments],
+            pyarrow.bool_(),
+        )
+
+        return schedule
+
+    def __len__(self) -> int:
+        return len(self.paid)
+
+    def _rows(
+        self,
+        loan_ids: Sequence[int] | pyarrow.Array,
+        repayment_ids: Sequence[int] | pyarrow.Array,
+    ) -> pyarrow.Array:
+        """
+        Return the row of each of the loans' repayments.
+        """
+
+        loan_index = pyarrow.compute.index_in(
+            pyarrow.array(loan_ids, pyarrow.int64()), value_set=self.loan_ids
+        )
+        if loan_index.null_count:
+            raise ValueError("Some of the loan IDs are not in the schedule")
+
+        repayment_ids = pyarrow.array(repayment_ids, pyarrow.int64())
+        terms = pyarrow.compute.take(self.terms, loan_index)
+        out_of_range = pyarrow.compute.or_(
+            pyarrow.compute.less(repayment_ids, 1),
+            pyarrow.compute.greater(repayment_ids, terms),
+        )
+        if pyarrow.compute.any(out_of_range).as_py():
+            raise ValueError("Some of the repayment IDs are out of range")
+
+        return pyarrow.compute.add(
+            pyarrow.compute.take(self.offsets, loan_index),
+            pyarrow.compute.subtract(repayment_ids, 1),
+        )
+
+    def mark_paid(
+        self,
+        loan_ids: Sequence[int] | pyarrow.Array,
+        repayment_ids: Sequence[int] | pyarrow.Array,
+        paid: bool = True,
+    ) -> None:
+        """
+        Mark the repayments, given as pairs of loan and repayment IDs, as
+        paid (or, with ``paid=False``, as unpaid).
+        """
+
+        rows = self._rows(loan_ids, repayment_ids)
+        row_numbers = pyarrow.compute.subtract(
+            pyarrow.compute.cumulative_sum(_ones(len(self))), 1
+        )
+        marked = pyarrow.compute.is_in(row_numbers, value_set=rows)
+        self.paid = (
+            pyarrow.compute.or_(self.paid, marked)
+            if paid
+            else pyarrow.compute.and_not(self.paid, marked)
+        )
+
+    def _unpaid(self) -> pyarrow.Array:
+        return pyarrow.compute.if_else(self.paid, 0.0, self.amount)
+
+    def outstanding(self, loan_id: int) -> float:
+        """
+        Return the outstanding balance of a single loan.
+        """
+
+        index = pyarrow.compute.index(self.loan_ids, loan_id).as_py()
+        if index == -1:
+            raise KeyError(loan_id)
+
+        start, end = (
+            self.offsets[index].as_py(),
+            self.offsets[index + 1].as_py(),
+        )
+        unpaid = pyarrow.compute.if_else(
+            self.paid.slice(start, end - start),
+            0.0,
+            self.amount.slice(start, end - start),
+        )
+
+        return pyarrow.compute.sum(unpaid).as_py() or 0.0
+
+    def outstanding_balances(self) -> pyarrow.Table:
+        """
+        Return the outstanding balance of every loan, as a table of
+        ``loan_id`` and ``outstanding``.
+        """
+
+        return (
+            pyarrow.table(
+                {"loan_id": self.loan_id, "outstanding": self._unpaid()}
+            )
+            .group_by("loan_id", use_threads=False)
+            .aggregate([("outstanding", "sum")])
+            .rename_columns(["loan_id", "outstanding"])
+        )
+
+    def to_arrow(self) -> pyarrow.Table:
+        """
+        Return the repayments as a table, e.g. to register with DuckDB.
+        """
+
+        return pyarrow.table(
+            [self.loan_id, self.repayment_id, self.amount, self.paid],
+            schema=REPAYMENTS_SCHEMA,
+        )
+
+    def repayments(self) -> Iterator[Repayment]:
+        """
+        Yield the repayments as dataclasses.
+        """
+
+        for row in zip(
+            self.loan_id.to_pylist(),
+            self.repayment_id.to_pylist(),
+            self.amount.to_pylist(),
+            self.paid.to_pylist(),
+            strict=True,
+        ):
+            yield Repayment(*row)
+
+    def loans(self) -> Iterator[Loan]:
+        """
+        Yield the loans, with their repayments, as dataclasses.
+        """
+
+        paid = iter(self.paid.to_pylist())
+        for loan_id, amount, terms in zip(
+            self.loan_ids.to_pylist(),
+            self.amounts.to_pylist(),
+            self.terms.to_pylist(),
+            strict=True,
+        ):
+            loan = Loan(loan_id, amount, terms)
+            for rep in loan.repayments:
+                rep.paid = next(paid)
+            yield loan
+
+
+def main(loans: int = 100_000) -> None:
+    schedule = Schedule(range(loans), [1000] * loans, [10] * loans)
+
+    # pay off three repayments of every loan
+    schedule.mark_paid(
+        [loan_id for loan_id in range(loans) for _ in range(3)],
+        [1, 2, 3] * loans,
+    )
+    print(f"repayments: {len(schedule):,}")
+    print(f"outstanding for loan 1: {schedule.outstanding(1)}")
+    print(schedule.outstanding_balances().slice(0, 3).to_pylist())
+
+
+if __name__ == "__main__":
+    main()
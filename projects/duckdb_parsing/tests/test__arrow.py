@@ -0,0 +1,26 @@
+import duckdb
+from duckdb_parsing import arrow
+from duckdb_parsing.main import Loan
+
+
+def test__register_loans_exposes_loans_and_repayments():
+    loans = [Loan(1, 1000, 10), Loan(2, 300, 3)]
+    for rep in loans[0].repayments[:3]:
+        rep.paid = True
+
+    conn = duckdb.connect()
+    arrow.register_loans(conn, loans)
+
+    assert conn.sql("select * from loans order by loan_id").fetchall() == [
+        (1, 1000.0, 10),
+        (2, 300.0, 3),
+    ]
+    assert conn.sql(
+        """
+        select loan_id, sum(amount)
+        from repayments
+        where paid = false
+        group by loan_id
+        order by loan_id
+        """
+    ).fetchall() == [(1, 700.0), (2, 300.0)]
@@ -0,0 +1,40 @@
+import pytest
+from duckdb_parsing.ledger import Ledger
+from duckdb_parsing.main import Loan
+
+
+def test__ledger_keeps_balances_up_to_date():
+    ledger = Ledger([Loan(1, 1000, 10), Loan(2, 500, 5)])
+
+    for repayment_id in (1, 2, 3, 3):
+        ledger.pay(1, repayment_id)
+    assert ledger.outstanding(1) == pytest.approx(700)
+
+    ledger.reverse(1, 3)
+    ledger.reverse(1, 4)
+    assert ledger.outstanding(1) == pytest.approx(800)
+
+    ledger.restructure(1, terms=4, outstanding=600)
+    assert ledger.outstanding(1) == pytest.approx(600)
+    assert [r.repayment_id for r in ledger.loans[1].repayments] == [
+        1,
+        2,
+        11,
+        12,
+        13,
+        14,
+    ]
+    ledger.pay(1, 11)
+
+    assert ledger.outstanding(1) == pytest.approx(450)
+    assert ledger.outstanding(2) == pytest.approx(500)
+    assert ledger.check() == {}
+    with pytest.raises(KeyError):
+        ledger.pay(1, 3)
+
+
+def test__ledger_check_reports_drifted_balances():
+    ledger = Ledger([Loan(1, 1000, 10)])
+    ledger.loans[1].repayments[0].paid = True  # behind the ledger's back
+
+    assert ledger.check() == {1: (1000, 900)}
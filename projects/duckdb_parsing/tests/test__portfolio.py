@@ -0,0 +1,27 @@
+from duckdb_parsing import arrow
+from duckdb_parsing.main import Loan
+from duckdb_parsing.portfolio import Portfolio
+
+
+def test__portfolio_answers_single_and_batched_balances():
+    loans = [Loan(1, 1000, 10), Loan(2, 300, 3)]
+    for rep in loans[0].repayments[:3]:
+        rep.paid = True
+
+    with Portfolio.from_loans(loans) as portfolio:
+        assert portfolio.outstanding(1) == 700
+        assert portfolio.outstanding(3) == 0
+        assert portfolio.outstanding_many([1, 2, 3]) == {1: 700, 2: 300, 3: 0}
+
+        for rep in loans[1].repayments:
+            rep.paid = True
+        portfolio.load(arrow.repayments_to_arrow(loans[1].repayments))
+        assert portfolio.outstanding(2) == 0
+        assert portfolio.outstanding(1) == 0
+
+
+def test__portfolio_sums_repeated_loans_once():
+    with Portfolio.from_loans(
+        [Loan(1, 1000, 10), Loan(2, 300, 3)]
+    ) as portfolio:
+        assert portfolio.outstanding_many([1, 1, 2, 1]) == {1: 1000, 2: 300}
@@ -0,0 +1,32 @@
+import pytest
+from duckdb_parsing.main import Loan
+from duckdb_parsing.schedule import Schedule
+
+
+def test__schedule_marks_repayments_and_sums_balances():
+    schedule = Schedule([10, 20], [1000, 300], [10, 3])
+    schedule.mark_paid([10, 10, 10, 20], [1, 2, 3, 3])
+
+    assert len(schedule) == 13
+    assert schedule.repayment_id.to_pylist() == [*range(1, 11), 1, 2, 3]
+    assert schedule.outstanding(10) == 700
+    assert schedule.outstanding_balances().to_pylist() == [
+        {"loan_id": 10, "outstanding": 700},
+        {"loan_id": 20, "outstanding": 200},
+    ]
+
+    schedule.mark_paid([20], [3], paid=False)
+    assert schedule.outstanding(20) == 300
+    with pytest.raises(ValueError, match="out of range"):
+        schedule.mark_paid([20], [4])
+
+
+def test__schedule_round_trips_the_dataclasses():
+    loan = Loan(1, 1000, 10)
+    for rep in loan.repayments[:3]:
+        rep.paid = True
+
+    schedule = Schedule.from_loans([loan])
+
+    assert list(schedule.loans()) == [loan]
+    assert list(schedule.repayments()) == loan.repayments
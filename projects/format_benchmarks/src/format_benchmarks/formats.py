@@ -0,0 +1,282 @@
+"""
+The formats (and codecs) to benchmark, each as a writer and a reader of
+Arrow tables.
+
+The data is the employee data from ``testing_struct``, with types, so
+every format stores the same columns:
+
+- Parquet and Orc read just the projected columns off disk
+- Avro decodes every record, but skips the unprojected fields without
+  building them (see ``testing_avro.reader``)
+- JSON lines and fixed-width files are parsed in full, and the columns
+  are selected afterwards
+
+Fixed-width files are text, so they're read back as strings (the way
+``testing_struct.convert`` reads them) rather than as the typed table.
+"""
+
+import dataclasses
+import datetime
+import io
+import json
+import pathlib
+import random
+from collections.abc import Callable, Sequence
+
+import avro.schema
+import pyarrow
+import pyarrow.json
+import pyarrow.orc
+import pyarrow.parquet
+from testing_avro import parallel
+from testing_avro import writer as avro_writer
+from testing_orc import writer as orc_writer
+from testing_struct import convert
+from testing_struct.main import SCHEMA as FIXED_WIDTHS
+
+Columns = Sequence[str] | None
+SCHEMA = pyarrow.schema(
+    [
+        pyarrow.field("employee_id", pyarrow.int64(), nullable=False),
+        pyarrow.field("employee_name", pyarrow.string(), nullable=False),
+        pyarrow.field("job_name", pyarrow.string(), nullable=False),
+        pyarrow.field("manager_id", pyarrow.int64()),
+        pyarrow.field("hire_date", pyarrow.date32(), nullable=False),
+        pyarrow.field("salary", pyarrow.int64(), nullable=False),
+        pyarrow.field("commission", pyarrow.int64()),
+        pyarrow.field("department_id", pyarrow.int64(), nullable=False),
+    ]
+)
+AVRO_TYPES = {
+    pyarrow.int64(): "long",
+    pyarrow.string(): "string",
+    pyarrow.date32(): {"type": "int", "logicalType": "date"},
+}
+NAMES = ("Sandrine", "Adelyn", "Wade", "Madden", "Tucker", "Adney", "Kayla")
+JOBS = ("Clerk", "Salesman", "Manager", "Analyst", "President")
+
+
+@dataclasses.dataclass(frozen=True)
+class Format:
+    name: str
+    suffix: str
+    codecs: tuple[str, ...]
+    write: Callable[[pathlib.Path, pyarrow.Table, str], None]
+    read: Callable[[pathlib.Path, Columns, str], pyarrow.Table]
+
+
+def generate_table(rows: int, seed: int = 0) -> pyarrow.Table:
+    """
+    Generate a table of (reproducibly) random employees.
+    """
+
+    rng = random.Random(seed)  # noqa: S311
+    start = datetime.date(1990, 1, 1)
+    jobs = [rng.choice(JOBS) for _ in range(rows)]
+
+    return pyarrow.table(
+        {
+            "employee_id": range(rows),
+            "employee_name": [rng.choice(NAMES) for _ in range(rows)],
+            "job_name": jobs,
+            "manager_id": [
+                None if job == "President" else rng.randrange(rows)
+                for job in jobs
+            ],
+            "hire_date": [
+                start + datetime.timedelta(days=rng.randrange(12_000))
+                for _ in range(rows)
+            ],
+            "salary": [rng.randrange(800, 5_000) for _ in range(rows)],
+            "commission": [
+                rng.randrange(0, 1_500, 100) if job == "Salesman" else None
+                for job in jobs
+            ],
+            "department_id": [rng.choice((1001, 2001, 3001)) for _ in jobs],
+        },
+        schema=SCHEMA,
+    )
+
+
+def _stream_compression(codec: str) -> str | None:
+    return None if codec == "uncompressed" else codec
+
+
+def write_parquet(
+    target: pathlib.Path, table: pyarrow.Table, codec: str
+) -> None:
+    pyarrow.parquet.write_table(table, target, compression=codec)
+
+
+def read_parquet(
+    source: pathlib.Path, columns: Columns, codec: str
+) -> pyarrow.Table:
+    return pyarrow.parquet.read_table(source, columns=columns)
+
+
+def write_orc(target: pathlib.Path, table: pyarrow.Table, codec: str) -> None:
+    orc_writer.write_orc_batches(target, table.to_batches(), compression=codec)
+
+
+def read_orc(
+    source: pathlib.Path, columns: Columns, codec: str
+) -> pyarrow.Table:
+    return pyarrow.orc.ORCFile(str(source)).read(columns=columns)
+
+
+def avro_schema(columns: Columns = None) -> avro.schema.Schema:
+    """
+    Return the Avro schema for (the columns of) the table's schema.
+    """
+
+    fields = [
+        {
+            "name": field.name,
+            "type": (
+                ["null", AVRO_TYPES[field.type]]
+                if field.nullable
+                else AVRO_TYPES[field.type]
+            ),
+        }
+        for field in SCHEMA
+        if columns is None or field.name in columns
+    ]
+
+    return avro.schema.parse(
+        json.dumps({"type": "record", "name": "Employee", "fields": fields})
+    )
+
+
+def write_avro(target: pathlib.Path, table: pyarrow.Table, codec: str) -> None:
+    avro_writer.write_avro_file(
+        target, avro_schema(), table.to_batches(), codec=codec
+    )
+
+
+def read_avro(
+    source: pathlib.Path, columns: Columns, codec: str
+) -> pyarrow.Table:
+    readers_schema = avro_schema(columns)
+    return pyarrow.Table.from_batches(
+        parallel.read_avro_batches(source, readers_schema, max_workers=1),
+        schema=parallel.arrow_schema(readers_schema),
+    )
+
+
+def write_json_lines(
+    target: pathlib.Path, table: pyarrow.Table, codec: str
+) -> None:
+    with pyarrow.output_stream(
+        str(target), compression=_stream_compression(codec)
+    ) as stream:
+        for batch in table.to_batches():
+            stream.write(
+                "".join(
+                    json.dumps(row, default=str) + "\n"
+                    for row in batch.to_pylist()
+                ).encode()
+            )
+
+
+def read_json_lines(
+    source: pathlib.Path, columns: Columns, codec: str
+) -> pyarrow.Table:
+    # Arrow's JSON reader doesn't parse dates, so read them as strings
+    json_schema = pyarrow.schema(
+        [
+            field.with_type(pyarrow.string())
+            if field.type == pyarrow.date32()
+            else field
+            for field in SCHEMA
+        ]
+    )
+    with pyarrow.input_stream(
+        str(source), compression=_stream_compression(codec)
+    ) as stream:
+        table = pyarrow.json.read_json(
+            stream,
+            parse_options=pyarrow.json.ParseOptions(
+                explicit_schema=json_schema
+            ),
+        ).cast(SCHEMA)
+
+    return table if columns is None else table.select(columns)
+
+
+def write_fixed_width(
+    target: pathlib.Path, table: pyarrow.Table, codec: str
+) -> None:
+    widths = list(FIXED_WIDTHS.values())
+    with pyarrow.output_stream(
+        str(target), compression=_stream_compression(codec)
+    ) as stream:
+        for batch in table.to_batches():
+            stream.write(
+                "".join(
+                    "".join(
+                        ("" if value is None else str(value)).ljust(width)
+                        for value, width in zip(row, widths, strict=True)
+                    )
+                    + "\n"
+                    for row in zip(
+                        *(column.to_pylist() for column in batch.columns),
+                        strict=True,
+                    )
+                ).encode()
+            )
+
+
+def read_fixed_width(
+    source: pathlib.Path, columns: Columns, codec: str
+) -> pyarrow.Table:
+    with pyarrow.input_stream(
+        str(source), compression=_stream_compression(codec)
+    ) as stream:
+        table = pyarrow.Table.from_batches(
+            convert.read_batches(io.TextIOWrapper(stream, encoding="utf-8")),
+            schema=convert.ARROW_SCHEMA,
+        )
+
+    return table if columns is None else table.select(columns)
+
+
+FORMATS = {
+    format_.name: format_
+    for format_ in [
+        Format(
+            "parquet",
+            ".parquet",
+            ("none", "snappy", "zstd", "gzip"),
+            write_parquet,
+            read_parquet,
+        ),
+        Format(
+            "orc",
+            ".orc",
+            ("uncompressed", "snappy", "zstd", "zlib"),
+            write_orc,
+            read_orc,
+        ),
+        Format(
+            "avro",
+            ".avro",
+            ("null", "deflate", "snappy", "zstd"),
+            write_avro,
+            read_avro,
+        ),
+        Format(
+            "jsonl",
+            ".jsonl",
+            ("uncompressed", "gzip", "zstd"),
+            write_json_lines,
+            read_json_lines,
+        ),
+        Format(
+            "fixed-width",
+            ".fwf",
+            ("uncompressed", "gzip", "zstd"),
+            write_fixed_width,
+            read_fixed_width,
+        ),
+    ]
+}
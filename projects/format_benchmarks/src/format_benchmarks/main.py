@@ -0,0 +1,246 @@
+"""
+Benchmark the file formats against each other.
+
+For each format, codec and size, the same synthetic data is written to a
+file and read back (in full, and just two of its columns), recording the
+time taken, the file size and the peak memory (RSS) of each step.
+
+Each step runs in a fresh process so that its peak memory isn't hidden by
+an earlier step's. The write step's peak includes the data being written.
+Peak memory isn't available on Windows, so it's left blank there.
+
+The results are written as CSV (or JSON, by the output's extension),
+along with the versions of the libraries, so that runs can be compared
+across upgrades:
+
+    python -m format_benchmarks.main --sizes 10000 100000 --output results.csv
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import dataclasses
+import importlib.metadata
+import json
+import multiprocessing
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from format_benchmarks import formats
+
+SUCCESS = 0
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+PROJECTED_COLUMNS = ("employee_id", "salary")
+LIBRARIES = ("pyarrow", "avro", "fastavro")
+
+
+@dataclasses.dataclass
+class Result:
+    format: str
+    codec: str
+    rows: int
+    file_size: int
+    write_seconds: float
+    read_seconds: float
+    projected_read_seconds: float
+    write_peak_rss: int | None
+    read_peak_rss: int | None
+    projected_read_peak_rss: int | None
+
+
+def _peak_rss() -> int | None:
+    """
+    Return the peak RSS of this process, in bytes.
+    """
+
+    try:
+        import resource  # noqa: PLC0415
+    except ImportError:  # Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kibibytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_step(
+    step: str,
+    format_name: str,
+    codec: str,
+    path: pathlib.Path,
+    rows: int,
+) -> tuple[float, int | None]:
+    """
+    Run one step of the benchmark, returning its time and peak RSS.
+
+    The step is one of ``write``, ``read`` or ``projected_read``.
+    """
+
+    format_ = formats.FORMATS[format_name]
+    if step == "write":
+        table = formats.generate_table(rows)
+        start = time.perf_counter()
+        format_.write(path, table, codec)
+    else:
+        columns = list(PROJECTED_COLUMNS) if step == "projected_read" else None
+        start = time.perf_counter()
+        table = format_.read(path, columns, codec)
+        if table.num_rows != rows:
+            raise ValueError(f"Read {table.num_rows} rows, expected {rows}")
+
+    return time.perf_counter() - start, _peak_rss()
+
+
+def benchmark(
+    sizes: Sequence[int],
+    format_names: Sequence[str],
+    directory: pathlib.Path,
+) -> Iterator[Result]:
+    """
+    Benchmark each format and codec at each size.
+
+    Codecs that aren't available (for example, ones that need an optional
+    package) are skipped with a message.
+    """
+
+    # A new process per step, so each step's peak RSS is its own
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as executor:
+
+        def run(*args: Any) -> tuple[float, int | None]:
+            return executor.submit(run_step, *args).result()
+
+        for rows in sizes:
+            for format_name in format_names:
+                format_ = formats.FORMATS[format_name]
+                for codec in format_.codecs:
+                    path = directory / f"{rows}-{codec}{format_.suffix}"
+                    args = (format_name, codec, path, rows)
+                    try:
+                        write = run("write", *args)
+                    except (ValueError, ModuleNotFoundError) as e:
+                        print(
+                            f"skipped {format_name} ({codec}): {e}",
+                            file=sys.stderr,
+                        )
+                        continue
+
+                    read = run("read", *args)
+                    projected_read = run("projected_read", *args)
+                    yield Result(
+                        format=format_name,
+                        codec=codec,
+                        rows=rows,
+                        file_size=path.stat().st_size,
+                        write_seconds=write[0],
+                        read_seconds=read[0],
+                        projected_read_seconds=projected_read[0],
+                        write_peak_rss=write[1],
+                        read_peak_rss=read[1],
+                        projected_read_peak_rss=projected_read[1],
+                    )
+                    path.unlink()
+
+
+def versions() -> dict[str, str | None]:
+    """
+    Return the versions of Python and of the format libraries.
+    """
+
+    def version(library: str) -> str | None:
+        try:
+            return importlib.metadata.version(library)
+        except importlib.metadata.PackageNotFoundError:
+            return None
+
+    return {
+        "python": platform.python_version(),
+        **{library: version(library) for library in LIBRARIES},
+    }
+
+
+def write_results(
+    results: Sequence[Result],
+    output: pathlib.Path | None,
+) -> None:
+    """
+    Write the results as CSV (to stdout by default) or, for a ``.json``
+    output, as JSON.
+    """
+
+    versions_ = versions()
+    rows = [
+        dataclasses.asdict(result)
+        | {f"{name}_version": v for name, v in versions_.items()}
+        for result in results
+    ]
+
+    if output is not None and output.suffix == ".json":
+        output.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        return
+
+    fieldnames = list(rows[0]) if rows else []
+    with (
+        output.open("w", newline="", encoding="utf-8")
+        if output
+        else open(sys.stdout.fileno(), "w", closefd=False)
+    ) as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Parse the arguments and run the benchmarks.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=DEFAULT_SIZES,
+        help="the numbers of rows to benchmark",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=formats.FORMATS,
+        default=list(formats.FORMATS),
+    )
+    parser.add_argument(
+        "--output",
+        type=pathlib.Path,
+        help="a .csv or .json file; defaults to CSV on stdout",
+    )
+
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for result in benchmark(args.sizes, args.formats, pathlib.Path(tmp)):
+            print(
+                f"{result.format:<12}{result.codec:<14}{result.rows:>10,}"
+                f"{result.file_size:>14,}B"
+                f"{result.write_seconds:>8.2f}s"
+                f"{result.read_seconds:>8.2f}s"
+                f"{result.projected_read_seconds:>8.2f}s",
+                file=sys.stderr,
+            )
+            results.append(result)
+
+    write_results(results, args.output)
+
+    return SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,25 @@
+import pytest
+from format_benchmarks import formats
+
+
+@pytest.mark.parametrize(
+    "format_", formats.FORMATS.values(), ids=lambda f: f.name
+)
+def test__formats_round_trip_the_table(tmp_path, format_):
+    table = formats.generate_table(1_000)
+    target = tmp_path / f"example{format_.suffix}"
+    codec = format_.codecs[1]
+
+    format_.write(target, table, codec)
+    projected = format_.read(target, ["employee_id", "salary"], codec)
+
+    assert projected.column_names == ["employee_id", "salary"]
+    assert projected.num_rows == 1_000
+    if format_.name == "fixed-width":
+        assert projected.column("salary").to_pylist() == [
+            str(salary) for salary in table.column("salary").to_pylist()
+        ]
+    else:
+        assert format_.read(target, None, codec).to_pydict() == (
+            table.to_pydict()
+        )
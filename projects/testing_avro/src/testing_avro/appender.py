@@ -0,0 +1,224 @@
+"""
+Append to Avro files from a long-running ingest loop.
+
+Opening a ``DataFileWriter`` on an existing file re-reads its header, and
+closing it writes out whatever has been appended as a (usually tiny)
+block. Doing that for every small batch means a header read per batch
+and a file full of tiny blocks.
+
+The appender here keeps a single writer open, buffers the records into
+blocks of a set size, and only flushes them when a block fills up, when
+the flush interval has passed, or when asked to. It can also roll over to
+a new file once the current one reaches a size or an age.
+
+A record that doesn't fit the schema is rejected without leaving any of
+its bytes in the buffered block, so the records before and after it are
+still written out.
+
+The appender is not thread-safe: use one per writing thread (or file).
+"""
+
+import os
+import pathlib
+import time
+from collections.abc import Iterable
+from types import TracebackType
+from typing import Literal, Self
+
+import avro.datafile
+import avro.io
+import avro.schema
+
+from testing_avro.writer import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_CODEC,
+    Record,
+    codec_name,
+)
+
+FsyncPolicy = Literal["never", "flush", "close"]
+
+
+class AvroAppender:
+    """
+    Append records to an Avro file through a long-lived writer.
+
+    If the target file already exists, its header is read once (when the
+    appender opens it) and the records are appended with the file's own
+    schema and codec. Otherwise, the file is created with ``schema``.
+
+    :param target: The file to append to. Rolled-over files are written
+        next to it, as ``<stem>-00001<suffix>`` and so on.
+    :param schema: The writer's schema, for new files. Existing files must
+        have been written with an equivalent schema.
+    :param codec: The block compression codec, for new files.
+    :param block_size: The (uncompressed) size, in bytes, at which the
+        buffered records are written out as a block.
+    :param flush_interval: The longest time, in seconds, that a record
+        stays buffered in memory. Checked on each append.
+    :param fsync: When to ``fsync`` the file: after every ``flush``, only
+        when the file is closed (or rolled over), or never.
+    :param max_file_size: Roll over to a new file once the current one
+        reaches this many bytes.
+    :param max_file_age: Roll over to a new file once the current one has
+        been open for this many seconds.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        target: pathlib.Path,
+        schema: avro.schema.Schema | None = None,
+        *,
+        codec: str = DEFAULT_CODEC,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        flush_interval: float | None = None,
+        fsync: FsyncPolicy = "close",
+        max_file_size: int | None = None,
+        max_file_age: float | None = None,
+    ) -> None:
+        self.target = pathlib.Path(target)
+        self.schema = schema
+        self.codec = codec_name(codec)
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_file_size = max_file_size
+        self.max_file_age = max_file_age
+        self.paths: list[pathlib.Path] = []
+
+        self._open(self.target)
+
+    def _open(self, path: pathlib.Path) -> None:
+        if path.exists() and path.stat().st_size > 0:
+            writer = avro.datafile.DataFileWriter(
+                open(path, "ab+"),
+                avro.io.DatumWriter(),
+            )
+            schema = writer.datum_writer.writers_schema
+            if (
+                self.schema
+                and self.schema.canonical_form != schema.canonical_form
+            ):
+                writer.writer.close()
+                raise ValueError(
+                    f"The schema of {path} does not match the appender's schema"
+                )
+        else:
+            if self.schema is None:
+                raise ValueError(f"A schema is needed to create {path}")
+            writer = avro.datafile.DataFileWriter(
+                open(path, "wb"),
+                avro.io.DatumWriter(),
+                self.schema,
+                codec=self.codec,
+            )
+            # Write the header straight away, so the file is always valid
+            writer.flush()
+
+        self.schema = writer.datum_writer.writers_schema
+        self.path = path
+        self.paths.append(path)
+        self._writer = writer
+        self._write_data = writer.datum_writer.write_data
+        self._opened_at = self._flushed_at = time.monotonic()
+        self.closed = False
+
+    def _next_path(self) -> pathlib.Path:
+        index = len(self.paths)
+        while True:
+            path = self.target.with_name(
+                f"{self.target.stem}-{index:05}{self.target.suffix}"
+            )
+            if not path.exists():
+                return path
+            index += 1
+
+    def _fsync(self) -> None:
+        os.fsync(self._writer.writer.fileno())
+
+    def _write_block(self) -> None:
+        self._writer.sync()
+        if (
+            self.max_file_size
+            and self._writer.writer.tell() >= self.max_file_size
+        ):
+            self.roll()
+
+    def append(self, record: Record) -> None:
+        """
+        Buffer the record, writing out a block once the buffer is full.
+        """
+
+        buffer = self._writer.buffer_writer
+        position = buffer.tell()
+        try:
+            self._write_data(self.schema, record, self._writer.buffer_encoder)
+        except Exception:
+            # Drop the part of the record that was encoded before it failed
+            buffer.seek(position)
+            buffer.truncate()
+            raise
+        self._writer.block_count += 1
+        if self._writer.buffer_writer.tell() >= self.block_size:
+            self._write_block()
+
+        if self.flush_interval or self.max_file_age:
+            now = time.monotonic()
+            if self.max_file_age and now - self._opened_at >= self.max_file_age:
+                self.roll()
+            elif (
+                self.flush_interval
+                and now - self._flushed_at >= self.flush_interval
+            ):
+                self.flush()
+
+    def extend(self, records: Iterable[Record]) -> None:
+        """
+        Buffer each of the records.
+        """
+
+        for record in records:
+            self.append(record)
+
+    def flush(self) -> None:
+        """
+        Write out any buffered records, and flush the file.
+        """
+
+        self._writer.flush()
+        if self.fsync == "flush":
+            self._fsync()
+        self._flushed_at = time.monotonic()
+
+    def roll(self) -> None:
+        """
+        Close the current file and continue in a new one.
+        """
+
+        self.close()
+        self._open(self._next_path())
+
+    def close(self) -> None:
+        """
+        Write out any buffered records, and close the file. Closing a
+        closed appender does nothing.
+        """
+
+        if self.closed:
+            return
+        self.closed = True
+        self._writer.flush()
+        if self.fsync != "never":
+            self._fsync()
+        self._writer.writer.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
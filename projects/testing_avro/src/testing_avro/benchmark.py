@@ -0,0 +1,112 @@
+"""
+Compare per-record appends with the batched writer, and the
+``DatumReader`` with the planned reader.
+
+    python -m testing_avro.benchmark
+"""
+
+import functools
+import itertools
+import pathlib
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+
+import avro.datafile
+import avro.io
+
+from testing_avro import reader, writer
+from testing_avro.main import get_schema
+
+N = 1_000_000
+BATCH_SIZE = 10_000
+SCHEMA = get_schema("user-v1.avsc")
+COLOURS = ("red", "green", "blue", None)
+
+
+def _users(n: int) -> Iterator[dict]:
+    for i in range(n):
+        yield {
+            "name": f"user-{i}",
+            "favorite_number": i % 1_000 or None,
+            "favorite_color": COLOURS[i % len(COLOURS)],
+        }
+
+
+def _batches(n: int) -> Iterator[list[dict]]:
+    users = _users(n)
+    while batch := list(itertools.islice(users, BATCH_SIZE)):
+        yield batch
+
+
+def per_record_appends(target: pathlib.Path, n: int) -> None:
+    """
+    The approach in ``main.create_avro_file``.
+    """
+
+    with avro.datafile.DataFileWriter(
+        open(target, "wb"),
+        avro.io.DatumWriter(),
+        SCHEMA,
+    ) as writer_:
+        for user in _users(n):
+            writer_.append(user)
+
+
+def datum_reader_reads(target: pathlib.Path) -> None:
+    """
+    The approach in ``main.print_contents``.
+    """
+
+    with avro.datafile.DataFileReader(
+        open(target, "rb"),
+        avro.io.DatumReader(readers_schema=get_schema("user-v2.avsc")),
+    ) as reader_:
+        for _ in reader_:
+            pass
+
+
+def planned_reads(target: pathlib.Path) -> None:
+    for _ in reader.read_avro_file(target, get_schema("user-v2.avsc")):
+        pass
+
+
+def _time(label: str, func: Callable[[], object], n: int) -> None:
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    print(f"{label:<32}{seconds:>8.2f}s {n / seconds:>12,.0f} records/s")
+
+
+def main(n: int = N) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        target = pathlib.Path(tmp) / "users.avro"
+
+        print(f"Writing {n:,} records")
+        _time("per-record appends", lambda: per_record_appends(target, n), n)
+        for backend, codec in itertools.product(
+            writer.BACKENDS,
+            ("null", "deflate", "snappy", "zstd"),
+        ):
+            label = f"{backend} ({codec})"
+            write = functools.partial(
+                writer.write_avro_file,
+                target,
+                SCHEMA,
+                _batches(n),
+                codec=codec,
+                backend=backend,
+            )
+            try:
+                _time(label, write, n)
+            except (ValueError, ModuleNotFoundError) as e:
+                print(f"{label:<32}skipped: {e}")
+
+        print(f"\nReading {n:,} records with a newer schema")
+        writer.write_avro_file(target, SCHEMA, _batches(n))
+        _time("datum reader", lambda: datum_reader_reads(target), n)
+        _time("planned reader", lambda: planned_reads(target), n)
+
+
+if __name__ == "__main__":
+    main()
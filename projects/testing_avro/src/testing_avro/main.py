@@ -17,6 +17,9 @@ import avro.datafile
 import avro.io
 import avro.schema
 
+from testing_avro import reader
+from testing_avro.appender import AvroAppender
+
 HERE = pathlib.Path(__file__).parent
 SCHEMAS = HERE / "schemas"
 TARGET = HERE / "users.avro"
@@ -58,22 +61,18 @@ def create_avro_file() -> None:
     )
     writer.close()
 
-    appender = avro.datafile.DataFileWriter(
-        open(TARGET, "ab+"),
-        avro.io.DatumWriter(),
-    )
-    appender.append(
-        {
-            "name": "Chrissie",
-            "favorite_number": random.randint(1, 10),  # noqa: S311
-        }
-    )
-    appender.append(
-        {
-            "name": "Darcy",
-        }
-    )
-    appender.close()
+    with AvroAppender(TARGET) as appender:
+        appender.append(
+            {
+                "name": "Chrissie",
+                "favorite_number": random.randint(1, 10),  # noqa: S311
+            }
+        )
+        appender.append(
+            {
+                "name": "Darcy",
+            }
+        )
 
 
 def print_contents(schema: avro.schema.Schema | None = None) -> None:
@@ -81,12 +80,7 @@ def print_contents(schema: avro.schema.Schema | None = None) -> None:
     Print the contents of the Avro file using the given schema.
     """
 
-    reader = avro.datafile.DataFileReader(
-        open(TARGET, "rb"),
-        avro.io.DatumReader(readers_schema=schema),
-    )
-    [print(user) for user in reader]
-    reader.close()
+    [print(user) for user in reader.read_avro_file(TARGET, schema)]
 
 
 def main() -> None:
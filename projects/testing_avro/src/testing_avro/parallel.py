@@ -0,0 +1,337 @@
+"""
+Read a glob of Avro files in parallel, as Arrow record batches.
+
+Each file is cut into byte ranges ("splits"), and each split is read by
+a worker process. A worker finds the first sync marker in its range and
+reads every block that starts inside the range, so splits never need to
+line up with the blocks, and the files never need to be scanned up front.
+
+The files are all read with a single reader's schema. By default this is
+the union of the files' schemas: fields missing from some of the files
+are filled from their defaults (or with nulls), and a field whose type
+differs between files takes the type that can read all of them (e.g. a
+``long`` for an ``int`` and a ``long``). The ``models-*.avro`` files
+happen to share a schema, so their union is that schema.
+
+At most a few splits per worker are read ahead of the batches that have
+been yielded, so a slow consumer doesn't pile up every file's batches.
+
+Avro's reader plans are cached per worker process (see ``reader``), so a
+worker only compiles a plan once however many splits it reads.
+"""
+
+import collections
+import concurrent.futures
+import dataclasses
+import functools
+import glob
+import itertools
+import json
+import mmap
+import multiprocessing
+import os
+import pathlib
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+import avro.codecs
+import avro.datafile
+import avro.errors
+import avro.io
+import avro.schema
+import pyarrow
+
+from testing_avro import reader
+
+HERE = pathlib.Path(__file__).parent
+DEFAULT_SPLIT_SIZE = 16 * 1024 * 1024  # bytes
+DEFAULT_BATCH_SIZE = 65_536  # rows
+SPLITS_IN_FLIGHT = 2  # per worker
+PRIMITIVE_TYPES = {
+    "null": pyarrow.null(),
+    "boolean": pyarrow.bool_(),
+    "int": pyarrow.int32(),
+    "long": pyarrow.int64(),
+    "float": pyarrow.float32(),
+    "double": pyarrow.float64(),
+    "bytes": pyarrow.binary(),
+    "string": pyarrow.string(),
+}
+LOGICAL_TYPES = {
+    "date": pyarrow.date32(),
+    "time-millis": pyarrow.time32("ms"),
+    "time-micros": pyarrow.time64("us"),
+    "timestamp-millis": pyarrow.timestamp("ms", tz="UTC"),
+    "timestamp-micros": pyarrow.timestamp("us", tz="UTC"),
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class Split:
+    path: str
+    start: int
+    end: int
+
+
+def _read_header(path: str | pathlib.Path) -> avro.schema.Schema:
+    with avro.datafile.DataFileReader(
+        open(path, "rb"),
+        avro.io.DatumReader(),
+    ) as reader_:
+        return reader_.datum_reader.writers_schema
+
+
+def _nullable(type_: Any) -> list:
+    """
+    Return the (JSON) type as a union with null, null first.
+    """
+
+    branches = type_ if isinstance(type_, list) else [type_]
+    return ["null", *(branch for branch in branches if branch != "null")]
+
+
+def unified_schema(paths: Sequence[str | pathlib.Path]) -> avro.schema.Schema:
+    """
+    Return a reader's schema that can read every one of the files.
+
+    The fields are the union of the files' fields, in the order they are
+    first seen. Fields missing from some files keep their default if they
+    have one, and otherwise become nullable with a null default. Fields
+    whose types differ between files take the first type that can read
+    all the others.
+    """
+
+    schemas = [_read_header(path) for path in paths]
+    if not schemas:
+        raise ValueError("Cannot unify the schemas of zero files")
+    if any(not isinstance(s, avro.schema.RecordSchema) for s in schemas):
+        raise ValueError("Only files of records can be unified")
+
+    fields: dict[str, dict] = {}
+    readers: dict[str, list[avro.schema.Schema]] = {}
+    for schema in schemas:
+        for field in schema.fields:
+            fields.setdefault(field.name, field.to_json())
+            readers.setdefault(field.name, []).append(field.type)
+
+    for name, types in readers.items():
+        field = fields[name]
+        matching = [t for t in types if all(t.match(other) for other in types)]
+        if not matching:
+            raise ValueError(f"The files have incompatible types for {name!r}")
+        field["type"] = matching[0].to_json()
+
+        if len(types) < len(schemas) and "default" not in field:
+            field["type"] = _nullable(field["type"])
+            field["default"] = None
+
+    unified = schemas[0].to_json() | {"fields": list(fields.values())}
+
+    return avro.schema.parse(json.dumps(unified))
+
+
+def arrow_type(schema: avro.schema.Schema) -> pyarrow.DataType:  # noqa: PLR0911
+    """
+    Return the Arrow type for the Avro schema.
+    """
+
+    logical_type = getattr(schema, "logical_type", None)
+    if logical_type == "decimal":
+        return pyarrow.decimal128(
+            schema.get_prop("precision"), schema.get_prop("scale") or 0
+        )
+    if logical_type in LOGICAL_TYPES:
+        return LOGICAL_TYPES[logical_type]
+
+    match schema:
+        case avro.schema.UnionSchema():
+            branches = [s for s in schema.schemas if s.type != "null"]
+            if len(branches) != 1:
+                raise ValueError(
+                    f"Unions of several types are not supported: {schema}"
+                )
+            return arrow_type(branches[0])
+        case avro.schema.RecordSchema():
+            return pyarrow.struct(
+                [(f.name, arrow_type(f.type)) for f in schema.fields]
+            )
+        case avro.schema.ArraySchema():
+            return pyarrow.list_(arrow_type(schema.items))
+        case avro.schema.MapSchema():
+            return pyarrow.map_(pyarrow.string(), arrow_type(schema.values))
+        case avro.schema.EnumSchema():
+            return pyarrow.string()
+        case avro.schema.FixedSchema():
+            return pyarrow.binary(schema.size)
+        case _:
+            return PRIMITIVE_TYPES[schema.type]
+
+
+def arrow_schema(schema: avro.schema.RecordSchema) -> pyarrow.Schema:
+    """
+    Return the Arrow schema for the Avro record schema.
+    """
+
+    return pyarrow.schema(
+        [
+            pyarrow.field(
+                field.name,
+                arrow_type(field.type),
+                nullable=isinstance(field.type, avro.schema.UnionSchema)
+                and any(s.type == "null" for s in field.type.schemas),
+            )
+            for field in schema.fields
+        ]
+    )
+
+
+@functools.cache
+def _parse(schema: str) -> avro.schema.Schema:
+    return avro.schema.parse(schema)
+
+
+def _first_block(file: Any, sync_marker: bytes, start: int) -> int | None:
+    """
+    Return the position of the first block starting at or after ``start``.
+
+    Every block starts straight after a sync marker (the first one after
+    the header's), so this is the end of the first marker that ends at or
+    after ``start``.
+    """
+
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        position = mm.find(sync_marker, max(start - len(sync_marker), 0))
+        if position == -1 or position + len(sync_marker) >= len(mm):
+            return None
+
+    return position + len(sync_marker)
+
+
+def read_split(
+    split: Split,
+    readers_schema: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> list[pyarrow.RecordBatch]:
+    """
+    Read the blocks that start inside the split into record batches.
+
+    The reader's schema is passed as JSON so that it pickles cheaply.
+    """
+
+    schema = _parse(readers_schema)
+    batch_schema = arrow_schema(schema)
+    with avro.datafile.DataFileReader(
+        open(split.path, "rb"),
+        avro.io.DatumReader(),
+    ) as reader_:
+        position = _first_block(
+            reader_.reader, reader_.sync_marker, split.start
+        )
+        if position is None or position >= split.end:
+            return []
+
+        plan = reader.get_plan(reader_.datum_reader.writers_schema, schema)
+        codec = avro.codecs.get_codec(reader_.codec)
+        raw_decoder, file = reader_.raw_decoder, reader_.reader
+        file.seek(position)
+
+        batches, rows = [], []
+        while position < split.end and position < reader_.file_length:
+            count = raw_decoder.read_long()
+            decoder = codec.decompress(raw_decoder)
+            rows.extend(plan(decoder) for _ in range(count))
+            if file.read(avro.datafile.SYNC_SIZE) != reader_.sync_marker:
+                raise avro.errors.DataFileException(
+                    f"Missing sync marker after block in {split.path}"
+                )
+            position = file.tell()
+
+            if len(rows) >= batch_size:
+                batches.append(
+                    pyarrow.RecordBatch.from_pylist(rows, schema=batch_schema)
+                )
+                rows = []
+
+    if rows:
+        batches.append(
+            pyarrow.RecordBatch.from_pylist(rows, schema=batch_schema)
+        )
+
+    return batches
+
+
+def _splits(paths: Sequence[str], split_size: int) -> Iterator[Split]:
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, size, split_size):
+            yield Split(path, start, min(start + split_size, size))
+
+
+def read_avro_batches(
+    pattern: str | pathlib.Path,
+    readers_schema: avro.schema.Schema | None = None,
+    *,
+    max_workers: int | None = None,
+    split_size: int = DEFAULT_SPLIT_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[pyarrow.RecordBatch]:
+    """
+    Yield the records in the files matching the glob pattern as Arrow
+    record batches, in file order.
+
+    :param pattern: The glob pattern for the files, e.g. ``models-*.avro``.
+    :param readers_schema: The schema to read every file with. Defaults
+        to the unified schema of the files.
+    :param max_workers: The number of worker processes. With one worker,
+        the files are read in this process.
+    :param split_size: The size of the byte ranges to hand to each worker.
+    :param batch_size: The (approximate) number of rows in each batch.
+    """
+
+    paths = sorted(glob.glob(str(pattern)))
+    if not paths:
+        return
+    if readers_schema is None:
+        readers_schema = unified_schema(paths)
+
+    read = functools.partial(
+        read_split,
+        readers_schema=str(readers_schema),
+        batch_size=batch_size,
+    )
+    splits = _splits(paths, split_size)
+    if max_workers == 1:
+        for split in splits:
+            yield from read(split)
+        return
+
+    # Arrow runs its own threads, which don't survive a fork
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        # ``executor.map`` would submit every split up front, and hold all
+        # of their batches until they're yielded
+        in_flight = SPLITS_IN_FLIGHT * (max_workers or os.cpu_count() or 1)
+        pending: collections.deque[concurrent.futures.Future] = (
+            collections.deque(
+                executor.submit(read, split)
+                for split in itertools.islice(splits, in_flight)
+            )
+        )
+        while pending:
+            batches = pending.popleft().result()
+            for split in itertools.islice(splits, 1):
+                pending.append(executor.submit(read, split))
+            yield from batches
+
+
+def main() -> None:
+    table = pyarrow.Table.from_batches(
+        read_avro_batches(HERE / "models-*.avro"),
+    )
+    [print(row) for row in table.to_pylist()]
+
+
+if __name__ == "__main__":
+    main()
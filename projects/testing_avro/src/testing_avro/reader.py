@@ -0,0 +1,476 @@
+"""
+Read Avro files with a reader's schema, resolving the schemas only once.
+
+``avro.io.DatumReader`` resolves the writer's schema against the reader's
+schema for every datum: each value re-checks that the schemas match,
+looks up the reader's fields by name, and re-converts default values. The
+readers here compile that resolution into a "plan" (a tree of functions
+that decode straight from the writer's encoding into the reader's shape)
+once per (writer's schema, reader's schema) pair.
+
+The plans are cached at module level, so every file written with the
+same schema shares a plan however many files we read.
+"""
+
+import copy
+import hashlib
+import json
+import pathlib
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import avro.codecs
+import avro.datafile
+import avro.errors
+import avro.io
+import avro.schema
+
+Decoder = avro.io.BinaryDecoder
+Plan = Callable[[Decoder], Any]
+
+# Default values which must be copied into every record, since a shared
+# list or dict would be mutated through any one of them
+_MUTABLE_DEFAULTS = (list, dict)
+# The fallback reader for logical types, which the plans don't handle
+_DATUM_READER = avro.io.DatumReader()
+_PLANS: dict[tuple[str, str], Plan] = {}
+
+
+def fingerprint(schema: avro.schema.Schema) -> str:
+    """
+    Return a fingerprint of the full schema.
+
+    Unlike ``Schema.fingerprint``, this is not limited to the "parsing
+    canonical form", which drops the defaults and logical types that the
+    plans depend on.
+    """
+
+    return hashlib.sha256(
+        json.dumps(schema.to_json(), sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def _resolution_error(
+    message: str,
+    writers_schema: avro.schema.Schema,
+    readers_schema: avro.schema.Schema,
+) -> avro.errors.SchemaResolutionException:
+    return avro.errors.SchemaResolutionException(
+        message, writers_schema, readers_schema
+    )
+
+
+def _compile_union(
+    writers_schema: avro.schema.UnionSchema,
+    readers_schema: avro.schema.Schema,
+    plans: dict,
+) -> Plan:
+    """
+    Compile a plan for each of the writer's branches.
+
+    Branches that can't be read with the reader's schema only fail if they
+    are actually written, as they would with ``DatumReader``.
+    """
+
+    def _unresolvable(branch: avro.schema.Schema) -> Plan:
+        def read_unresolvable(decoder: Decoder) -> Any:
+            raise _resolution_error(
+                "Schemas do not match.", branch, readers_schema
+            )
+
+        return read_unresolvable
+
+    branches = [
+        _compile(branch, readers_schema, plans)
+        if _matches(branch, readers_schema)
+        else _unresolvable(branch)
+        for branch in writers_schema.schemas
+    ]
+
+    def read_union(decoder: Decoder) -> Any:
+        return branches[decoder.read_long()](decoder)
+
+    return read_union
+
+
+def _matches(
+    writers_schema: avro.schema.Schema,
+    readers_schema: avro.schema.Schema,
+) -> bool:
+    if isinstance(readers_schema, avro.schema.UnionSchema):
+        return any(
+            branch.match(writers_schema) for branch in readers_schema.schemas
+        )
+    return readers_schema.match(writers_schema)
+
+
+def _compile_primitive(
+    writers_schema: avro.schema.PrimitiveSchema,
+    readers_schema: avro.schema.PrimitiveSchema,
+) -> Plan:
+    readers = {
+        "null": lambda _: None,
+        "boolean": Decoder.read_boolean,
+        "int": Decoder.read_long,
+        "long": Decoder.read_long,
+        "float": Decoder.read_float,
+        "double": Decoder.read_double,
+        "bytes": Decoder.read_bytes,
+        "string": Decoder.read_utf8,
+    }
+    read = readers[writers_schema.type]
+    if writers_schema.type in {"int", "long"} and readers_schema.type in {
+        "float",
+        "double",
+    }:
+        return lambda decoder: float(read(decoder))
+
+    return read
+
+
+def _compile_enum(
+    writers_schema: avro.schema.EnumSchema,
+    readers_schema: avro.schema.EnumSchema,
+) -> Plan:
+    symbols = [
+        symbol if symbol in readers_schema.symbols else readers_schema.default
+        for symbol in writers_schema.symbols
+    ]
+
+    def read_enum(decoder: Decoder) -> str:
+        symbol = symbols[decoder.read_long()]
+        if symbol is None:
+            raise _resolution_error(
+                "Symbol not present in Reader's Schema",
+                writers_schema,
+                readers_schema,
+            )
+        return symbol
+
+    return read_enum
+
+
+def _compile_array(
+    writers_schema: avro.schema.ArraySchema,
+    readers_schema: avro.schema.ArraySchema,
+    plans: dict,
+) -> Plan:
+    read_item = _compile(writers_schema.items, readers_schema.items, plans)
+
+    def read_array(decoder: Decoder) -> list:
+        items = []
+        while count := decoder.read_long():
+            if count < 0:
+                count = -count
+                decoder.skip_long()
+            items.extend(read_item(decoder) for _ in range(count))
+        return items
+
+    return read_array
+
+
+def _compile_map(
+    writers_schema: avro.schema.MapSchema,
+    readers_schema: avro.schema.MapSchema,
+    plans: dict,
+) -> Plan:
+    read_value = _compile(writers_schema.values, readers_schema.values, plans)
+
+    def read_map(decoder: Decoder) -> dict:
+        items = {}
+        while count := decoder.read_long():
+            if count < 0:
+                count = -count
+                decoder.skip_long()
+            for _ in range(count):
+                key = decoder.read_utf8()
+                items[key] = read_value(decoder)
+        return items
+
+    return read_map
+
+
+def _skip_blocks(skip_item: Plan) -> Plan:
+    """
+    Return a plan that skips over the blocks of an array or map.
+
+    Blocks with a negative count are followed by their size in bytes, so
+    they can be skipped without decoding their items.
+    """
+
+    def skip_blocks(decoder: Decoder) -> None:
+        while count := decoder.read_long():
+            if count < 0:
+                decoder.skip(decoder.read_long())
+                continue
+            for _ in range(count):
+                skip_item(decoder)
+
+    return skip_blocks
+
+
+def _compile_skip(writers_schema: avro.schema.Schema, plans: dict) -> Plan:  # noqa: PLR0911
+    """
+    Compile the plan for skipping over data written with ``writers_schema``.
+    """
+
+    key = (id(writers_schema), None)
+    if key in plans:
+        return plans[key]
+
+    match writers_schema:
+        case avro.schema.RecordSchema():
+            # Register the plan before compiling the fields, for recursion
+            steps: list[Plan] = []
+
+            def skip_record(decoder: Decoder) -> None:
+                for step in steps:
+                    step(decoder)
+
+            plans[key] = skip_record
+            steps.extend(
+                _compile_skip(field.type, plans)
+                for field in writers_schema.fields
+            )
+            return skip_record
+        case avro.schema.UnionSchema():
+            branches = [
+                _compile_skip(branch, plans)
+                for branch in writers_schema.schemas
+            ]
+            return lambda decoder: branches[decoder.read_long()](decoder)
+        case avro.schema.ArraySchema():
+            return _skip_blocks(_compile_skip(writers_schema.items, plans))
+        case avro.schema.MapSchema():
+            skip_value = _compile_skip(writers_schema.values, plans)
+
+            def skip_item(decoder: Decoder) -> None:
+                decoder.skip_utf8()
+                skip_value(decoder)
+
+            return _skip_blocks(skip_item)
+        case avro.schema.FixedSchema():
+            size = writers_schema.size
+            return lambda decoder: decoder.skip(size)
+        case avro.schema.EnumSchema():
+            return Decoder.skip_long
+        case _:
+            skippers = {
+                "null": lambda _: None,
+                "boolean": Decoder.skip_boolean,
+                "int": Decoder.skip_long,
+                "long": Decoder.skip_long,
+                "float": Decoder.skip_float,
+                "double": Decoder.skip_double,
+                "bytes": Decoder.skip_bytes,
+                "string": Decoder.skip_bytes,
+            }
+            return skippers[writers_schema.type]
+
+
+def _compile_record(
+    writers_schema: avro.schema.RecordSchema,
+    readers_schema: avro.schema.RecordSchema,
+    plans: dict,
+) -> Plan:
+    """
+    Compile the field-by-field steps for the record.
+
+    Each step either reads a field into the reader's record or skips over
+    a field the reader doesn't want. Reader fields that the writer doesn't
+    have are filled from their (pre-converted) defaults.
+    """
+
+    # Register the plan before compiling the fields, so that recursive
+    # schemas refer back to it rather than compiling forever
+    key = (id(writers_schema), id(readers_schema))
+    steps: list[tuple[str | None, Plan]] = []
+    defaults: list[tuple[str, Any]] = []
+
+    def read_record(decoder: Decoder) -> dict:
+        record = {}
+        for name, step in steps:
+            value = step(decoder)
+            if name is not None:
+                record[name] = value
+        for name, default in defaults:
+            record[name] = (
+                copy.deepcopy(default)
+                if isinstance(default, _MUTABLE_DEFAULTS)
+                else default
+            )
+        return record
+
+    plans[key] = read_record
+
+    readers_fields = readers_schema.fields_dict
+    for field in writers_schema.fields:
+        readers_field = readers_fields.get(field.name)
+        if readers_field is None:
+            steps.append((None, _compile_skip(field.type, plans)))
+        else:
+            steps.append(
+                (field.name, _compile(field.type, readers_field.type, plans))
+            )
+
+    writers_fields = writers_schema.fields_dict
+    for name, field in readers_fields.items():
+        if name in writers_fields:
+            continue
+        if not field.has_default:
+            raise _resolution_error(
+                f"No default value for field {name}",
+                writers_schema,
+                readers_schema,
+            )
+        defaults.append(
+            (name, _DATUM_READER._read_default_value(field.type, field.default))
+        )
+
+    return read_record
+
+
+def _compile(  # noqa: PLR0911, PLR0912
+    writers_schema: avro.schema.Schema,
+    readers_schema: avro.schema.Schema,
+    plans: dict,
+) -> Plan:
+    """
+    Compile the plan for reading data written with ``writers_schema`` into
+    the shape of ``readers_schema``, following the Avro resolution rules.
+    """
+
+    if (id(writers_schema), id(readers_schema)) in plans:
+        return plans[id(writers_schema), id(readers_schema)]
+
+    if isinstance(writers_schema, avro.schema.UnionSchema):
+        return _compile_union(writers_schema, readers_schema, plans)
+
+    if isinstance(readers_schema, avro.schema.UnionSchema):
+        for branch in readers_schema.schemas:
+            if branch.match(writers_schema):
+                return _compile(writers_schema, branch, plans)
+        raise _resolution_error(
+            "Schemas do not match.", writers_schema, readers_schema
+        )
+
+    if not readers_schema.match(writers_schema):
+        raise _resolution_error(
+            "Schemas do not match.", writers_schema, readers_schema
+        )
+
+    # Logical types are rare enough to leave to the generic reader
+    if getattr(writers_schema, "logical_type", None):
+        return lambda decoder: _DATUM_READER.read_data(
+            writers_schema, readers_schema, decoder
+        )
+
+    match writers_schema:
+        case avro.schema.RecordSchema():
+            return _compile_record(writers_schema, readers_schema, plans)
+        case avro.schema.ArraySchema():
+            return _compile_array(writers_schema, readers_schema, plans)
+        case avro.schema.MapSchema():
+            return _compile_map(writers_schema, readers_schema, plans)
+        case avro.schema.EnumSchema():
+            return _compile_enum(writers_schema, readers_schema)
+        case avro.schema.FixedSchema():
+            size = writers_schema.size
+            return lambda decoder: decoder.read(size)
+        case _:
+            return _compile_primitive(writers_schema, readers_schema)
+
+
+def get_plan(
+    writers_schema: avro.schema.Schema,
+    readers_schema: avro.schema.Schema | None = None,
+) -> Plan:
+    """
+    Return the (cached) plan for reading data written with
+    ``writers_schema`` using ``readers_schema``.
+
+    Without a reader's schema, the data is read as it was written.
+    """
+
+    if readers_schema is None:
+        readers_schema = writers_schema
+    key = (fingerprint(writers_schema), fingerprint(readers_schema))
+    if key not in _PLANS:
+        _PLANS[key] = _compile(writers_schema, readers_schema, {})
+
+    return _PLANS[key]
+
+
+def clear_plans() -> None:
+    """
+    Clear the cache of plans.
+    """
+
+    _PLANS.clear()
+
+
+class PlannedDatumReader(avro.io.DatumReader):
+    """
+    A drop-in ``DatumReader`` that reads with a cached plan.
+
+    The plan is looked up on the first read after either schema is set
+    (``DataFileReader`` sets the writer's schema once, when it reads the
+    file header).
+    """
+
+    _plan: Plan | None = None
+
+    @property
+    def writers_schema(self) -> avro.schema.Schema | None:
+        return self._writers_schema
+
+    @writers_schema.setter
+    def writers_schema(self, writers_schema: avro.schema.Schema) -> None:
+        self._writers_schema = writers_schema
+        self._plan = None
+
+    @property
+    def readers_schema(self) -> avro.schema.Schema | None:
+        return self._readers_schema
+
+    @readers_schema.setter
+    def readers_schema(self, readers_schema: avro.schema.Schema) -> None:
+        self._readers_schema = readers_schema
+        self._plan = None
+
+    def read(self, decoder: Decoder) -> object:
+        if self._plan is None:
+            if self.writers_schema is None:
+                raise avro.errors.IONotReadyException(
+                    "Cannot read without a writer's schema."
+                )
+            self._plan = get_plan(self.writers_schema, self.readers_schema)
+
+        return self._plan(decoder)
+
+
+def read_avro_file(
+    path: pathlib.Path,
+    readers_schema: avro.schema.Schema | None = None,
+) -> Iterator[Any]:
+    """
+    Yield the records in the Avro file, read using ``readers_schema``.
+
+    Each block is decoded in one go with the file's (cached) plan.
+    """
+
+    with avro.datafile.DataFileReader(
+        open(path, "rb"),
+        avro.io.DatumReader(),
+    ) as reader:
+        plan = get_plan(reader.datum_reader.writers_schema, readers_schema)
+        codec = avro.codecs.get_codec(reader.codec)
+        raw_decoder, file = reader.raw_decoder, reader.reader
+        while file.tell() < reader.file_length:
+            count = raw_decoder.read_long()
+            decoder = codec.decompress(raw_decoder)
+            yield from [plan(decoder) for _ in range(count)]
+            if file.read(avro.datafile.SYNC_SIZE) != reader.sync_marker:
+                raise avro.errors.DataFileException(
+                    f"Missing sync marker after block in {path}"
+                )
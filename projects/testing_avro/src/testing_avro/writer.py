@@ -0,0 +1,160 @@
+"""
+Write Avro files in batches rather than one record at a time.
+
+The ``avro`` package validates every record before it encodes it, and
+cuts a new block at a fixed (hard-coded) sync interval with the null
+codec by default. The writer here takes batches of records (lists of
+dicts, or Arrow tables/record batches), lets us pick the codec and the
+block size, and uses fastavro when it's installed.
+"""
+
+import pathlib
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, BinaryIO
+
+import avro.codecs
+import avro.datafile
+import avro.io
+import avro.schema
+
+try:
+    import fastavro
+except ImportError:  # pragma: no cover
+    fastavro = None
+
+BACKENDS = ("avro", "fastavro")
+DEFAULT_BACKEND = "avro" if fastavro is None else "fastavro"
+DEFAULT_CODEC = "null"
+DEFAULT_BLOCK_SIZE = 64_000  # bytes, before compression
+CODEC_ALIASES = {"zstd": "zstandard"}
+
+Record = Mapping[str, Any]
+
+
+def codec_name(codec: str) -> str:
+    """
+    Return the Avro name for the codec, allowing ``zstd`` for ``zstandard``.
+    """
+
+    return CODEC_ALIASES.get(codec, codec)
+
+
+def _records(batches: Iterable[Any]) -> Iterator[Record]:
+    """
+    Flatten the batches into records, converting any Arrow batches on the
+    way (one batch at a time, so only one is ever materialised).
+    """
+
+    for batch in batches:
+        yield from batch.to_pylist() if hasattr(batch, "to_pylist") else batch
+
+
+def _write_with_avro(
+    file: BinaryIO,
+    schema: avro.schema.Schema,
+    records: Iterable[Record],
+    codec: str,
+    block_size: int,
+) -> None:
+    """
+    Write the records with the ``avro`` package, cutting a block whenever
+    the buffered (uncompressed) data reaches ``block_size`` bytes.
+
+    This skips the ``avro.io.validate`` pass that ``DataFileWriter.append``
+    makes for every record: ``write_data`` already raises on values that
+    don't match the schema.
+    """
+
+    if codec not in avro.codecs.KNOWN_CODECS:
+        raise ValueError(
+            f"Codec {codec!r} is not available for the avro backend, "
+            f"expected one of {list(avro.codecs.KNOWN_CODECS)}"
+        )
+
+    writer = avro.datafile.DataFileWriter(
+        file, avro.io.DatumWriter(), schema, codec=codec
+    )
+    write_data = writer.datum_writer.write_data
+    buffer, encoder = writer.buffer_writer, writer.buffer_encoder
+    with writer:
+        for record in records:
+            write_data(schema, record, encoder)
+            writer.block_count += 1
+            if buffer.tell() >= block_size:
+                writer.sync()
+
+
+def _write_with_fastavro(
+    file: BinaryIO,
+    schema: avro.schema.Schema,
+    records: Iterable[Record],
+    codec: str,
+    block_size: int,
+) -> None:
+    """
+    Write the records with fastavro.
+    """
+
+    if fastavro is None:
+        raise ModuleNotFoundError("The fastavro backend needs fastavro")
+
+    fastavro.writer(
+        file,
+        fastavro.parse_schema(schema.to_json()),
+        records,
+        codec=codec,
+        sync_interval=block_size,
+    )
+
+
+def write_avro_file(  # noqa: PLR0913
+    target: pathlib.Path,
+    schema: avro.schema.Schema,
+    batches: Iterable[Any],
+    *,
+    codec: str = DEFAULT_CODEC,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    backend: str = DEFAULT_BACKEND,
+) -> int:
+    """
+    Write the batches of records to a new Avro file.
+
+    Return the number of records written.
+
+    :param target: The file to (over)write.
+    :param schema: The writer's schema.
+    :param batches: Batches of records, each either a sequence of dicts or
+        an Arrow table/record batch.
+    :param codec: The block compression codec, e.g. ``null``, ``deflate``,
+        ``snappy`` or ``zstd``.
+    :param block_size: The approximate uncompressed size of each block, in
+        bytes. Bigger blocks compress better; smaller blocks make reads
+        that skip around cheaper.
+    :param backend: Either ``avro`` or ``fastavro`` (the default when it's
+        installed).
+    """
+
+    writers = {"avro": _write_with_avro, "fastavro": _write_with_fastavro}
+    if backend not in writers:
+        raise ValueError(
+            f"Unknown backend {backend!r}, expected one of {BACKENDS}"
+        )
+
+    count = 0
+
+    def _counted(records: Iterable[Record]) -> Iterator[Record]:
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    with open(target, "wb") as file:
+        writers[backend](
+            file,
+            schema,
+            _counted(_records(batches)),
+            codec_name(codec),
+            block_size,
+        )
+
+    return count
@@ -0,0 +1,86 @@
+import avro.datafile
+import avro.errors
+import avro.io
+import pytest
+from testing_avro import appender, reader, writer
+from testing_avro.main import get_schema
+
+SCHEMA = get_schema("user-v1.avsc")
+
+
+def _users(start, stop) -> list:
+    return [
+        {"name": f"user-{i}", "favorite_number": i, "favorite_color": None}
+        for i in range(start, stop)
+    ]
+
+
+def test__appender_appends_to_an_existing_file(tmp_path):
+    target = tmp_path / "users.avro"
+    writer.write_avro_file(target, SCHEMA, [_users(0, 10)], codec="deflate")
+
+    with appender.AvroAppender(target) as appender_:
+        appender_.extend(_users(10, 20))
+        appender_.flush()
+        appender_.extend(_users(20, 30))
+
+    assert appender_.paths == [target]
+    assert list(reader.read_avro_file(target)) == _users(0, 30)
+
+
+def test__appender_only_writes_full_blocks_until_flushed(tmp_path):
+    target = tmp_path / "users.avro"
+    appender_ = appender.AvroAppender(target, SCHEMA, block_size=1_000_000)
+    header_size = target.stat().st_size
+
+    appender_.extend(_users(0, 100))
+    assert target.stat().st_size == header_size
+
+    appender_.flush()
+    assert target.stat().st_size > header_size
+
+    appender_.close()
+    with avro.datafile.DataFileReader(
+        open(target, "rb"), avro.io.DatumReader()
+    ) as reader_:
+        assert list(reader_) == _users(0, 100)
+
+
+def test__appender_rolls_over_by_size(tmp_path):
+    target = tmp_path / "users.avro"
+    with appender.AvroAppender(
+        target,
+        SCHEMA,
+        block_size=100,
+        max_file_size=1_000,
+        fsync="flush",
+    ) as appender_:
+        appender_.extend(_users(0, 200))
+
+    assert len(appender_.paths) > 1
+    assert appender_.paths[1] == tmp_path / "users-00001.avro"
+    assert [
+        user for path in appender_.paths for user in reader.read_avro_file(path)
+    ] == _users(0, 200)
+
+
+def test__appender_rejects_a_different_schema(tmp_path):
+    target = tmp_path / "users.avro"
+    writer.write_avro_file(target, SCHEMA, [_users(0, 1)])
+
+    with pytest.raises(ValueError, match="does not match"):
+        appender.AvroAppender(target, get_schema("user-v3.avsc"))
+
+
+def test__appender_rejects_invalid_records_cleanly(tmp_path):
+    target = tmp_path / "users.avro"
+    appender_ = appender.AvroAppender(target, SCHEMA)
+
+    appender_.extend(_users(0, 5))
+    with pytest.raises(avro.errors.AvroTypeException):
+        appender_.append({"name": "bad", "favorite_number": "x"})
+    appender_.extend(_users(5, 10))
+    appender_.close()
+    appender_.close()
+
+    assert list(reader.read_avro_file(target)) == _users(0, 10)
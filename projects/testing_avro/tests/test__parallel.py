@@ -0,0 +1,105 @@
+import avro.schema
+import pytest
+from testing_avro import parallel, reader, writer
+from testing_avro.main import get_schema
+
+
+@pytest.fixture
+def users_files(tmp_path):
+    users_v1 = [
+        {"name": f"v1-{i}", "favorite_number": i, "favorite_color": None}
+        for i in range(500)
+    ]
+    users_v3 = [{"name": f"v3-{i}"} for i in range(500)]
+    for i in range(3):
+        writer.write_avro_file(
+            tmp_path / f"users-{2 * i}.avro",
+            get_schema("user-v1.avsc"),
+            [users_v1],
+            block_size=256,
+        )
+        writer.write_avro_file(
+            tmp_path / f"users-{2 * i + 1}.avro",
+            get_schema("user-v3.avsc"),
+            [users_v3],
+            block_size=256,
+        )
+
+    return tmp_path
+
+
+def test__unified_schema_makes_missing_fields_nullable(users_files):
+    schema = parallel.unified_schema(sorted(users_files.glob("*.avro")))
+
+    assert [field.name for field in schema.fields] == [
+        "name",
+        "favorite_number",
+        "favorite_color",
+    ]
+    assert schema.fields_dict["name"].type == avro.schema.parse('"string"')
+    assert schema.fields_dict["favorite_number"].default is None
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test__read_avro_batches_matches_reading_each_file(users_files, max_workers):
+    paths = sorted(users_files.glob("*.avro"))
+    schema = parallel.unified_schema(paths)
+    expected = [
+        record
+        for path in paths
+        for record in reader.read_avro_file(path, schema)
+    ]
+
+    batches = parallel.read_avro_batches(
+        users_files / "users-*.avro",
+        max_workers=max_workers,
+        split_size=1_000,  # several splits per file, cutting through blocks
+        batch_size=100,
+    )
+
+    assert [row for batch in batches for row in batch.to_pylist()] == expected
+
+
+def test__unified_schema_keeps_defaults(tmp_path):
+    for i, schema_name in enumerate(["user-v1.avsc", "user-v2.avsc"]):
+        writer.write_avro_file(
+            tmp_path / f"users-{i}.avro",
+            get_schema(schema_name),
+            [[{"name": "Alyssa", "favorite_number": 1}]],
+        )
+
+    batches = list(
+        parallel.read_avro_batches(tmp_path / "*.avro", max_workers=1)
+    )
+
+    assert batches[0].schema.names == [
+        "name",
+        "favorite_number",
+        "favorite_color",
+        "id",
+    ]
+    assert [batch.column("id").to_pylist() for batch in batches] == [[None]] * 2
+
+
+def test__unified_schema_promotes_differing_types(tmp_path):
+    for i, number_type in enumerate(["int", "long"]):
+        schema = avro.schema.parse(
+            '{"type": "record", "name": "User", "fields": ['
+            '{"name": "name", "type": "string"}, '
+            f'{{"name": "favorite_number", "type": "{number_type}"}}'
+            "]}"
+        )
+        writer.write_avro_file(
+            tmp_path / f"users-{i}.avro",
+            schema,
+            [[{"name": "Alyssa", "favorite_number": 2**40 if i else 1}]],
+        )
+
+    schema = parallel.unified_schema(sorted(tmp_path.glob("*.avro")))
+    batches = parallel.read_avro_batches(tmp_path / "*.avro", max_workers=2)
+
+    assert schema.fields_dict["favorite_number"].type.type == "long"
+    assert [row for batch in batches for row in batch.to_pylist()] == [
+        {"name": "Alyssa", "favorite_number": 1},
+        {"name": "Alyssa", "favorite_number": 2**40},
+    ]
@@ -0,0 +1,132 @@
+import avro.datafile
+import avro.errors
+import avro.io
+import avro.schema
+import pytest
+from testing_avro import reader, writer
+from testing_avro.main import get_schema
+
+USERS = [
+    {"name": "Alyssa", "favorite_number": 256, "favorite_color": None},
+    {"name": "Ben", "favorite_number": 7, "favorite_color": "red"},
+    {"name": "Chrissie", "favorite_number": None, "favorite_color": None},
+]
+
+
+@pytest.fixture
+def users_file(tmp_path):
+    path = tmp_path / "users.avro"
+    writer.write_avro_file(
+        path,
+        get_schema("user-v1.avsc"),
+        [USERS],
+        codec="deflate",
+        block_size=1,  # one record per block
+    )
+
+    return path
+
+
+def _read_with_datum_reader(path, schema) -> list:
+    with avro.datafile.DataFileReader(
+        open(path, "rb"),
+        avro.io.DatumReader(readers_schema=schema),
+    ) as reader_:
+        return list(reader_)
+
+
+@pytest.mark.parametrize(
+    "schema_name",
+    [None, "user-v1.avsc", "user-v2.avsc", "user-v3.avsc"],
+)
+def test__read_avro_file_matches_the_datum_reader(users_file, schema_name):
+    schema = schema_name and get_schema(schema_name)
+
+    assert list(reader.read_avro_file(users_file, schema)) == (
+        _read_with_datum_reader(users_file, schema)
+    )
+
+
+def test__planned_datum_reader_is_a_drop_in_replacement(users_file):
+    schema = get_schema("user-v2.avsc")
+    with avro.datafile.DataFileReader(
+        open(users_file, "rb"),
+        reader.PlannedDatumReader(readers_schema=schema),
+    ) as reader_:
+        users = list(reader_)
+
+    assert users == _read_with_datum_reader(users_file, schema)
+    assert users[0] == {"id": None} | USERS[0]
+
+
+def test__plans_are_shared_across_schema_objects():
+    reader.clear_plans()
+    plan = reader.get_plan(
+        get_schema("user-v1.avsc"),
+        get_schema("user-v3.avsc"),
+    )
+    schema_copy = avro.schema.parse(str(get_schema("user-v1.avsc")))
+
+    assert reader.get_plan(schema_copy, get_schema("user-v3.avsc")) is plan
+
+
+def test__reader_fields_without_defaults_cannot_be_resolved():
+    writers_schema = get_schema("user-v3.avsc")
+    readers_schema = get_schema("user-v1.avsc")
+
+    with pytest.raises(avro.errors.SchemaResolutionException):
+        reader.get_plan(writers_schema, readers_schema)
+
+
+def test__complex_types_and_promotions_are_resolved(tmp_path):
+    writers_schema = avro.schema.parse(
+        """
+        {
+          "type": "record", "name": "Node",
+          "fields": [
+            {"name": "value", "type": "int"},
+            {"name": "tags", "type": {"type": "map", "values": "long"}},
+            {"name": "dropped", "type": {"type": "array", "items": "string"}},
+            {"name": "colour", "type": {"type": "enum", "name": "Colour", "symbols": ["RED", "BLUE"]}},
+            {"name": "children", "type": {"type": "array", "items": "Node"}}
+          ]
+        }
+        """
+    )
+    readers_schema = avro.schema.parse(
+        """
+        {
+          "type": "record", "name": "Node",
+          "fields": [
+            {"name": "value", "type": ["null", "double"]},
+            {"name": "tags", "type": {"type": "map", "values": "long"}},
+            {"name": "colour", "type": {"type": "enum", "name": "Colour", "symbols": ["BLUE", "RED"]}},
+            {"name": "children", "type": {"type": "array", "items": "Node"}},
+            {"name": "labels", "type": {"type": "array", "items": "string"}, "default": ["new"]}
+          ]
+        }
+        """
+    )
+    leaf = {
+        "value": 2,
+        "tags": {},
+        "dropped": [],
+        "colour": "BLUE",
+        "children": [],
+    }
+    root = {
+        "value": 1,
+        "tags": {"a": 1},
+        "dropped": ["x", "y"],
+        "colour": "RED",
+        "children": [leaf, leaf],
+    }
+    path = tmp_path / "nodes.avro"
+    writer.write_avro_file(path, writers_schema, [[root]], backend="avro")
+
+    (node,) = reader.read_avro_file(path, readers_schema)
+
+    assert node == _read_with_datum_reader(path, readers_schema)[0]
+    assert isinstance(node["value"], float)
+    assert node["children"][0]["labels"] == ["new"]
+    assert node["children"][0]["labels"] is not node["children"][1]["labels"]
@@ -0,0 +1,139 @@
+"""
+Compare single-row inserts (as in ``main``) with the batched writer.
+
+By default this runs against a Quack server, like ``main``. With
+``--local``, the clients are cursors on a single in-process database with
+an in-memory ``server`` catalog instead, which needs no extension (but
+has no network round trips either).
+
+    python -m testing_duckdb_quack.benchmark --local --concurrency 4
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import time
+from collections.abc import Callable, Sequence
+
+from testing_duckdb_quack import ingest
+from testing_duckdb_quack.main import (
+    HERE,
+    connect_client,
+    insert_log,
+    start_server,
+)
+
+SUCCESS = 0
+
+
+def single_rows(pool: ingest.ClientPool, rows: int, concurrency: int) -> None:
+    def insert(i: int) -> None:
+        with pool.client() as client:
+            insert_log(client, f"doing iteration {i}")
+
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(insert, range(rows)))
+
+
+def batched(
+    pool: ingest.ClientPool,
+    rows: int,
+    concurrency: int,
+    *,
+    batch_size: int,
+    method: ingest.InsertMethod,
+) -> None:
+    def produce(writer: ingest.LogWriter, producer: int) -> None:
+        for i in range(producer, rows, concurrency):
+            writer.add(f"client_{producer}", f"doing iteration {i}")
+
+    with (
+        ingest.LogWriter(pool, batch_size=batch_size, method=method) as writer,
+        concurrent.futures.ThreadPoolExecutor(concurrency) as executor,
+    ):
+        list(
+            executor.map(functools.partial(produce, writer), range(concurrency))
+        )
+
+
+def _time(
+    label: str,
+    func: Callable[[], None],
+    pool: ingest.ClientPool,
+    rows: int,
+) -> None:
+    with pool.client() as client:
+        client.sql("delete from server.logs")
+
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    with pool.client() as client:
+        written = client.sql("select count(*) from server.logs").fetchone()[0]
+    if written != rows:
+        raise RuntimeError(f"{label}: wrote {written} rows, expected {rows}")
+    print(f"{label:<20}{seconds:>8.2f}s {rows / seconds:>12,.0f} rows/s")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Parse the arguments and run the benchmark.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="the number of clients and of threads writing through them",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=ingest.DEFAULT_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="use an in-process database rather than a Quack server",
+    )
+
+    args = parser.parse_args(argv)
+    if args.local:
+        pool = ingest.local_pool(args.concurrency)
+    else:
+        server = start_server(HERE / "server.duckdb")
+        pool = ingest.ClientPool(connect_client, args.concurrency)
+
+    rows, concurrency = args.rows, args.concurrency
+    print(f"Inserting {rows:,} rows with {concurrency} clients")
+    _time(
+        "single rows",
+        lambda: single_rows(pool, rows, concurrency),
+        pool,
+        rows,
+    )
+    for method in ("arrow", "values"):
+        _time(
+            f"batched ({method})",
+            functools.partial(
+                batched,
+                pool,
+                rows,
+                concurrency,
+                batch_size=args.batch_size,
+                method=method,
+            ),
+            pool,
+            rows,
+        )
+
+    pool.close()
+    if not args.local:
+        server.close()
+
+    return SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,303 @@
+"""
+Coalesce concurrent writes to the ``logs`` table into group commits, and
+measure how reads hold up under write load.
+
+Every write to the server's ``logs`` table is its own transaction, and
+DuckDB commits one transaction at a time, so many small concurrent
+writes queue up behind each other's commits. The coalescer here runs in
+the server process and takes the writes instead: a single thread
+collects whatever writes arrive within a short window and commits them
+together, as one transaction, then tells each writer that its rows are
+in. Writers wait no longer than the window (plus the commit) for this.
+
+If a group fails to commit, its writes are retried one at a time, so
+only the writes that fail on their own get the error.
+
+Quack doesn't let the server hook into the writes it receives, so writes
+go through the coalescer by calling it in the server process (e.g. from
+whatever receives the remote writes) rather than through ``quack_serve``.
+
+The benchmark starts some writer threads and some reader threads (which
+run ``main``'s query) against the server's database, and reports the
+readers' latency for each number of writers, with and without
+coalescing:
+
+    python -m testing_duckdb_quack.coalesce --writers 1 4 16 --readers 2
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import dataclasses
+import datetime
+import queue
+import statistics
+import threading
+import time
+from collections.abc import Sequence
+from types import TracebackType
+from typing import Self
+
+import duckdb
+
+from testing_duckdb_quack import ingest
+from testing_duckdb_quack.main import LOGS_SQL, SHOW_SQL, Client
+
+SUCCESS = 0
+DEFAULT_MAX_DELAY = 0.005  # seconds
+DEFAULT_MAX_BATCH_ROWS = 100_000
+
+
+@dataclasses.dataclass
+class _Write:
+    rows: list[ingest.Row]
+    future: concurrent.futures.Future[int] = dataclasses.field(
+        default_factory=concurrent.futures.Future
+    )
+
+
+class WriteCoalescer:
+    """
+    Commit concurrent writes to a table together, in one transaction per
+    group.
+
+    :param conn: The server's connection. The coalescer uses its own
+        cursor on it, from its own thread.
+    :param table: The table to insert into.
+    :param max_delay: The longest time, in seconds, that the first write
+        of a group waits for others to join it.
+    :param max_batch_rows: The most rows to commit in one transaction.
+    """
+
+    def __init__(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        *,
+        table: str = "logs",
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_batch_rows: int = DEFAULT_MAX_BATCH_ROWS,
+    ) -> None:
+        self.table = table
+        self.max_delay = max_delay
+        self.max_batch_rows = max_batch_rows
+        self.group_sizes: list[int] = []
+        self._conn = conn.cursor()
+        self._client = Client("coalescer", self._conn)
+        self._writes: queue.Queue[_Write | None] = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: list[ingest.Row]) -> concurrent.futures.Future[int]:
+        """
+        Queue the rows to be written, returning a future that resolves to
+        the number of rows once they are committed.
+        """
+
+        write = _Write(rows)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The coalescer is closed")
+            self._writes.put(write)
+        return write.future
+
+    def write(self, rows: list[ingest.Row]) -> int:
+        """
+        Write the rows, waiting until they are committed.
+        """
+
+        return self.submit(rows).result()
+
+    def _group(self, first: _Write) -> tuple[list[_Write], bool]:
+        """
+        Collect the writes that arrive within ``max_delay`` of the first,
+        and whether the coalescer has been closed.
+        """
+
+        group, rows = [first], len(first.rows)
+        deadline = time.monotonic() + self.max_delay
+        while rows < self.max_batch_rows:
+            timeout = deadline - time.monotonic()
+            try:
+                write = (
+                    self._writes.get(timeout=timeout)
+                    if timeout > 0
+                    else self._writes.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if write is None:
+                return group, True
+            group.append(write)
+            rows += len(write.rows)
+
+        return group, False
+
+    def _insert(self, rows: list[ingest.Row]) -> None:
+        """
+        Insert the rows in one transaction, rolling it back on any error.
+        """
+
+        self._conn.begin()
+        try:
+            ingest.insert_rows(self._client, rows, self.table)
+            self._conn.commit()
+        except Exception:
+            with contextlib.suppress(duckdb.Error):
+                self._conn.rollback()
+            raise
+
+    def _commit(self, group: list[_Write]) -> None:
+        try:
+            self._insert([row for write in group for row in write.rows])
+        except Exception as e:
+            if len(group) == 1:
+                group[0].future.set_exception(e)
+                return
+            # Find the writes that failed, so the others still go in
+            for write in group:
+                self._commit([write])
+            return
+
+        self.group_sizes.append(len(group))
+        for write in group:
+            write.future.set_result(len(write.rows))
+
+    def _run(self) -> None:
+        closed = False
+        while not closed:
+            first = self._writes.get()
+            if first is None:
+                return
+            group, closed = self._group(first)
+            self._commit(group)
+
+    def close(self) -> None:
+        """
+        Commit the queued writes, and stop the coalescer's thread. Writes
+        can't be submitted after this.
+        """
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._writes.put(None)
+        self._thread.join()
+        self._conn.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def run_load(  # noqa: PLR0913
+    conn: duckdb.DuckDBPyConnection,
+    *,
+    writers: int,
+    readers: int,
+    duration: float,
+    rows_per_write: int,
+    coalesce: bool,
+) -> dict[str, float]:
+    """
+    Run writers and readers against the server's connection for the
+    duration, and return the readers' latency (in milliseconds) and the
+    writers' throughput.
+    """
+
+    conn.execute(LOGS_SQL)
+    stop = threading.Event()
+    latencies: list[float] = []
+    written = [0] * writers
+    coalescer = WriteCoalescer(conn) if coalesce else None
+
+    def write(writer: int) -> None:
+        client = Client(f"client_{writer}", conn.cursor())
+        while not stop.is_set():
+            rows = [
+                (datetime.datetime.now(), client.id, "load")
+                for _ in range(rows_per_write)
+            ]
+            if coalescer:
+                coalescer.write(rows)
+            else:
+                ingest.insert_rows(client, rows, "logs")
+            written[writer] += rows_per_write
+
+    def read() -> None:
+        cursor = conn.cursor()
+        while not stop.is_set():
+            start = time.perf_counter()
+            cursor.sql(SHOW_SQL).fetchall()
+            latencies.append(time.perf_counter() - start)
+
+    with concurrent.futures.ThreadPoolExecutor(writers + readers) as executor:
+        futures = [executor.submit(write, i) for i in range(writers)]
+        futures += [executor.submit(read) for _ in range(readers)]
+        time.sleep(duration)
+        stop.set()
+        for future in futures:
+            future.result()
+    if coalescer:
+        coalescer.close()
+
+    latencies_ms = [1_000 * latency for latency in latencies] or [0.0, 0.0]
+    percentiles = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+    return {
+        "reads": len(latencies),
+        "read_p50_ms": percentiles[49],
+        "read_p99_ms": percentiles[98],
+        "rows_per_second": sum(written) / duration,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Parse the arguments and run the benchmark.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rows-per-write", type=int, default=10)
+    parser.add_argument("--database", default=":memory:")
+
+    args = parser.parse_args(argv)
+    conn = duckdb.connect(args.database)
+    print(
+        f"{'writers':>8}{'mode':>11}{'reads':>8}{'p50':>10}{'p99':>10}"
+        f"{'rows/s':>12}"
+    )
+    for writers in args.writers:
+        for coalesce in (False, True):
+            result = run_load(
+                conn,
+                writers=writers,
+                readers=args.readers,
+                duration=args.duration,
+                rows_per_write=args.rows_per_write,
+                coalesce=coalesce,
+            )
+            print(
+                f"{writers:>8}{'coalesced' if coalesce else 'direct':>11}"
+                f"{result['reads']:>8}"
+                f"{result['read_p50_ms']:>8.1f}ms"
+                f"{result['read_p99_ms']:>8.1f}ms"
+                f"{result['rows_per_second']:>12,.0f}"
+            )
+
+    return SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,315 @@
+"""
+Batched ingestion of log rows through a pool of clients.
+
+``main`` sends each log row as its own ``insert``, which is a round trip
+(and a transaction) per row. The writer here buffers the rows for each
+client ID and sends them as one insert per batch, once a batch fills up
+or has been waiting for long enough (checked when a row is added, and by
+a background thread, so that a client that goes quiet isn't left with
+rows waiting in its buffer):
+
+- ``arrow`` (the default) registers the batch as an Arrow table and
+  inserts from that
+- ``values`` sends a single parameterised multi-row ``insert``
+
+DuckDB's Python client binds parameters one value at a time, which is
+slow enough that ``values`` only beats single-row inserts by a little;
+``arrow`` hands the whole batch over at once.
+
+The inserts go through a pool of clients (connections), which the writer
+borrows one at a time, so any number of threads can share a few
+connections. DuckDB connections aren't safe to share between threads, so
+the pool never hands the same client to two threads at once.
+"""
+
+import contextlib
+import dataclasses
+import datetime
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from types import TracebackType
+from typing import Literal, Self
+
+import duckdb
+import pyarrow
+
+from testing_duckdb_quack.main import LOGS_SQL, Client
+
+DEFAULT_TABLE = "server.logs"
+DEFAULT_BATCH_SIZE = 1_000  # rows
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+InsertMethod = Literal["arrow", "values"]
+LOGS_SCHEMA = pyarrow.schema(
+    [
+        ("log_ts", pyarrow.timestamp("us")),
+        ("client_id", pyarrow.string()),
+        ("log_data", pyarrow.string()),
+    ]
+)
+
+Row = tuple[datetime.datetime, str, str]
+
+
+class ClientPool:
+    """
+    A fixed set of clients, handed out to one thread at a time.
+
+    :param connect: Makes a client from its ID, e.g.
+        ``main.connect_client``.
+    :param size: The number of clients.
+    """
+
+    def __init__(self, connect: Callable[[str], Client], size: int) -> None:
+        self.clients = [connect(f"client_{i}") for i in range(size)]
+        self._idle: queue.Queue[Client] = queue.Queue()
+        for client in self.clients:
+            self._idle.put(client)
+
+    @contextlib.contextmanager
+    def client(self) -> Iterator[Client]:
+        """
+        Borrow a client, waiting for one to be free if need be.
+        """
+
+        client = self._idle.get()
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.conn.close()
+
+
+def local_pool(size: int) -> ClientPool:
+    """
+    Return a pool of cursors on an in-process database, with the ``logs``
+    table in a catalog named ``server`` (as the clients of ``main`` see
+    it).
+    """
+
+    database = duckdb.connect(":memory:")
+    database.execute("attach ':memory:' as server; use server;")
+    database.execute(LOGS_SQL)
+
+    return ClientPool(
+        lambda client_id: Client(client_id, database.cursor()),
+        size,
+    )
+
+
+@dataclasses.dataclass
+class _Buffer:
+    rows: list[Row] = dataclasses.field(default_factory=list)
+    started_at: float = 0.0
+
+
+def insert_rows(
+    client: Client,
+    rows: list[Row],
+    table: str = DEFAULT_TABLE,
+    method: InsertMethod = "arrow",
+) -> None:
+    """
+    Insert the log rows in one statement.
+    """
+
+    if not rows:
+        return
+
+    # The table name is configuration, not input, so formatting it in is OK
+    if method == "arrow":
+        batch = pyarrow.table(
+            [list(column) for column in zip(*rows, strict=True)],
+            schema=LOGS_SCHEMA,
+        )
+        client.conn.register("log_batch", batch)
+        try:
+            client.conn.execute(
+                f"insert into {table} by name select * from log_batch"  # noqa: S608
+            )
+        finally:
+            client.conn.unregister("log_batch")
+    else:
+        values = ", ".join(["(?, ?, ?)"] * len(rows))
+        client.conn.execute(
+            f"insert into {table} (log_ts, client_id, log_data) values {values}",  # noqa: S608
+            [value for row in rows for value in row],
+        )
+
+
+class LogWriter:
+    """
+    Buffer log rows per client ID, and insert them in batches.
+
+    :param pool: The clients to insert through.
+    :param table: The table to insert into.
+    :param batch_size: The number of rows at which a buffer is flushed.
+    :param flush_interval: The longest time, in seconds, that a row stays
+        buffered. Checked whenever a row is added, and in the background.
+    :param method: How to send the batches, as ``arrow`` or ``values``.
+    """
+
+    def __init__(
+        self,
+        pool: ClientPool,
+        *,
+        table: str = DEFAULT_TABLE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float | None = DEFAULT_FLUSH_INTERVAL,
+        method: InsertMethod = "arrow",
+    ) -> None:
+        self.pool = pool
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.method = method
+        self.rows_written = 0
+        self._buffers: dict[str, _Buffer] = {}
+        self._lock = threading.Lock()
+        self._error: Exception | None = None
+        self._stop = threading.Event()
+        self._timer: threading.Thread | None = None
+        if flush_interval is not None:
+            self._timer = threading.Thread(
+                target=self._flush_periodically,
+                name="log-writer-flush",
+                daemon=True,
+            )
+            self._timer.start()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _flush_due(self) -> float:
+        """
+        Insert the buffers that have waited for the flush interval, and
+        return the time until the next one will have.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                client_id
+                for client_id, buffer in self._buffers.items()
+                if now - buffer.started_at >= self.flush_interval
+            ]
+            batches = {client_id: self._take(client_id) for client_id in due}
+            waits = [
+                buffer.started_at + self.flush_interval - now
+                for buffer in self._buffers.values()
+            ]
+        self._write_all(batches)
+
+        return min(waits, default=self.flush_interval)
+
+    def _flush_periodically(self) -> None:
+        wait = self.flush_interval
+        while not self._stop.wait(wait):
+            try:
+                wait = self._flush_due()
+            except Exception as e:
+                # Raised in the next call to ``add``, ``flush``, or ``close``
+                self._error = e
+                wait = self.flush_interval
+
+    def add(
+        self,
+        client_id: str,
+        content: str,
+        log_ts: datetime.datetime | None = None,
+    ) -> None:
+        """
+        Buffer a log row, flushing the client's buffer if it's due.
+
+        The timestamp defaults to now, rather than to when the row is
+        inserted.
+        """
+
+        self._raise_error()
+        row = (log_ts or datetime.datetime.now(), client_id, content)
+        now = time.monotonic()
+        with self._lock:
+            buffer = self._buffers.setdefault(client_id, _Buffer())
+            if not buffer.rows:
+                buffer.started_at = now
+            buffer.rows.append(row)
+            due = len(buffer.rows) >= self.batch_size or (
+                self.flush_interval is not None
+                and now - buffer.started_at >= self.flush_interval
+            )
+            batches = {client_id: self._take(client_id)} if due else {}
+
+        self._write_all(batches)
+
+    def _take(self, client_id: str) -> _Buffer:
+        return self._buffers.pop(client_id)
+
+    def _put_back(self, client_id: str, buffer: _Buffer) -> None:
+        """
+        Return a batch's rows to the front of the client's buffer, keeping
+        when they started waiting.
+        """
+
+        with self._lock:
+            if current := self._buffers.get(client_id):
+                buffer.rows.extend(current.rows)
+            self._buffers[client_id] = buffer
+
+    def _write_all(self, batches: dict[str, _Buffer]) -> None:
+        """
+        Insert each client's batch, putting back the rows of any that fail,
+        and raise the first error once the others have been written.
+        """
+
+        errors = []
+        for client_id, buffer in batches.items():
+            try:
+                with self.pool.client() as client:
+                    insert_rows(client, buffer.rows, self.table, self.method)
+            except Exception as e:
+                errors.append(e)
+                self._put_back(client_id, buffer)
+                continue
+            with self._lock:
+                self.rows_written += len(buffer.rows)
+
+        if errors:
+            raise errors[0]
+
+    def flush(self) -> None:
+        """
+        Insert every buffered row. A client whose rows fail to insert keeps
+        them buffered, and the first error is raised after the other
+        clients' rows are inserted.
+        """
+
+        self._raise_error()
+        with self._lock:
+            batches = {
+                client_id: self._take(client_id)
+                for client_id in list(self._buffers)
+            }
+        self._write_all(batches)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
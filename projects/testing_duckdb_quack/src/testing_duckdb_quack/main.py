@@ -14,6 +14,22 @@ import duckdb
 HERE = pathlib.Path(__file__).parent
 DUCKDB_HOST = "localhost"
 DUCKDB_PASSWORD = "P4$$word"  # noqa: S105
+INSTALL_SQL = "install quack from core_nightly; load quack;"
+SECRET_SQL = (
+    f"create or replace secret (type quack, token '{DUCKDB_PASSWORD}');"
+)
+LOGS_SQL = """
+    create or replace table logs (
+        log_ts timestamp,
+        client_id text,
+        log_data text
+    );
+"""
+SHOW_SQL = """
+    select * replace (strftime(log_ts, '%Y-%m-%d %H:%M:%S.%f') as log_ts)
+    from logs
+    order by logs.log_ts
+"""
 
 
 @dataclasses.dataclass
@@ -25,71 +41,71 @@ class Client:
         return self.conn.sql(*args, **kwargs)
 
 
-async def main() -> int:
-    server = duckdb.connect(HERE / "server.duckdb")
-    clients: list[Client] = [
-        Client(id=f"client_{i}", conn=duckdb.connect(":memory:"))
-        for i in range(10)
-    ]
-
-    # Verify version
-    print(duckdb.sql("select version()").fetchone()[0])  # type: ignore
-
-    # Install Quack
-    _install_sql = "install quack from core_nightly; load quack;"
-    server.sql(_install_sql)
-    [client.sql(_install_sql) for client in clients]
-
-    # Create secrets
-    _secret_sql = (
-        f"create or replace secret (type quack, token '{DUCKDB_PASSWORD}');"
-    )
-    server.sql(_secret_sql)
-    [client.sql(_secret_sql) for client in clients]
+def start_server(database: pathlib.Path) -> duckdb.DuckDBPyConnection:
+    """
+    Create the ``logs`` table in the database, and serve it over Quack.
+    """
 
-    # Start server
+    server = duckdb.connect(database)
+    server.sql(INSTALL_SQL)
+    server.sql(SECRET_SQL)
     server.sql(
         f"""
-        create or replace table logs (
-            log_ts timestamp,
-            client_id text,
-            log_data text
-        );
+        {LOGS_SQL}
         call quack_serve('quack:{DUCKDB_HOST}', token='{DUCKDB_PASSWORD}');
         """
     )
 
-    # Attach server in clients
-    _attach_sql = f"attach 'quack:{DUCKDB_HOST}' as server;"
-    [client.sql(_attach_sql) for client in clients]
+    return server
 
-    # Add some data
-    def _insert(
-        client: Client,
-        content: str,
-    ) -> None:
-        _insert_sql = """
-            insert into server.logs (log_ts, client_id, log_data)
-            values (current_timestamp, '{client_id}', '{content}')
+
+def connect_client(client_id: str) -> Client:
+    """
+    Connect a client to the Quack server, attached as ``server``.
+    """
+
+    client = Client(id=client_id, conn=duckdb.connect(":memory:"))
+    client.sql(INSTALL_SQL)
+    client.sql(SECRET_SQL)
+    client.sql(f"attach 'quack:{DUCKDB_HOST}' as server;")
+
+    return client
+
+
+def insert_log(client: Client, content: str) -> None:
+    """
+    Insert a single log row, the way ``main`` does.
+    """
+
+    client.conn.execute(
         """
-        client.sql(_insert_sql.format(client_id=client.id, content=content))
+        insert into server.logs (log_ts, client_id, log_data)
+        values (current_timestamp, $client_id, $content)
+        """,
+        {"client_id": client.id, "content": content},
+    )
+
 
+async def main() -> int:
+    # Verify version
+    print(duckdb.sql("select version()").fetchone()[0])  # type: ignore
+
+    # Start server, and attach it in the clients
+    server = start_server(HERE / "server.duckdb")
+    clients = [connect_client(f"client_{i}") for i in range(10)]
+
+    # Add some data
     async with asyncio.TaskGroup() as tg:
         [
             tg.create_task(
-                asyncio.to_thread(_insert, client, f"doing iteration {i}")
+                asyncio.to_thread(insert_log, client, f"doing iteration {i}")
             )
             for i in range(5)
             for client in clients
         ]
 
     # Print the added data
-    _show_sql = """
-        select * replace (strftime(log_ts, '%Y-%m-%d %H:%M:%S.%f') as log_ts)
-        from logs
-        order by logs.log_ts
-    """
-    server.sql(_show_sql).show(max_rows=int(1e6), null_value="")
+    server.sql(SHOW_SQL).show(max_rows=int(1e6), null_value="")
 
     return 0
 
@@ -0,0 +1,235 @@
+"""
+An asyncio pipeline for writing log rows into the ``logs`` table.
+
+``main`` starts every insert at once, each on its own thread. Here, the
+producers put rows onto a bounded queue instead, and a fixed number of
+writer workers take them off in batches and insert each batch through
+the client pool (see ``ingest``). When the writers fall behind, the queue
+fills up and ``put`` waits, so a burst of logs slows the producers down
+rather than piling up threads or memory.
+
+Each worker keeps the order of the rows it takes, so with one worker the
+rows are inserted in the order they were put. With more, batches can
+commit out of order (but every row has its own timestamp).
+
+A batch that fails to insert is dropped and its error recorded, and the
+worker carries on, so the queue keeps draining and producers don't wait
+on workers that have died. The first error is raised on exit.
+
+The pipeline records the queue depth whenever a batch is taken, the
+batch sizes, and the time that each batch takes to commit.
+"""
+
+import asyncio
+import dataclasses
+import datetime
+import statistics
+import time
+from types import TracebackType
+from typing import Self
+
+from testing_duckdb_quack import ingest
+from testing_duckdb_quack.main import HERE, connect_client, start_server
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_QUEUE_SIZE = 10_000  # rows
+DEFAULT_BATCH_TIMEOUT = 0.1  # seconds
+
+
+@dataclasses.dataclass
+class Metrics:
+    queue_depths: list[int] = dataclasses.field(default_factory=list)
+    batch_sizes: list[int] = dataclasses.field(default_factory=list)
+    commit_latencies: list[float] = dataclasses.field(default_factory=list)
+
+    def summary(self) -> dict[str, float]:
+        """
+        Summarise the metrics, with the commit latencies in milliseconds.
+        """
+
+        if not self.batch_sizes:
+            return {"rows": 0, "batches": 0}
+
+        latencies = [1_000 * latency for latency in self.commit_latencies]
+        percentiles = (
+            statistics.quantiles(latencies, n=100, method="inclusive")
+            if len(latencies) > 1
+            else latencies * 99
+        )
+        return {
+            "rows": sum(self.batch_sizes),
+            "batches": len(self.batch_sizes),
+            "mean_batch_size": statistics.fmean(self.batch_sizes),
+            "max_queue_depth": max(self.queue_depths),
+            "mean_queue_depth": statistics.fmean(self.queue_depths),
+            "commit_p50_ms": percentiles[49],
+            "commit_p99_ms": percentiles[98],
+        }
+
+
+class LogPipeline:
+    """
+    Write log rows through a bounded queue and a pool of writer workers.
+
+    Use it as an async context manager: the workers start on entry, and
+    on exit the queue is drained and the workers are stopped. If any batch
+    failed, the first error is raised then, and all of them are kept in
+    ``errors``.
+
+    :param pool: The clients to insert through. There should be at least
+        as many clients as workers, or the workers will wait on the pool.
+    :param workers: The number of writer workers.
+    :param max_queue_size: The number of rows the queue holds before
+        ``put`` waits.
+    :param batch_size: The most rows a worker inserts at once.
+    :param batch_timeout: The longest time, in seconds, that a worker
+        waits to fill a batch before inserting what it has.
+    :param table: The table to insert into.
+    :param method: How to send the batches (see ``ingest.insert_rows``).
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        pool: ingest.ClientPool,
+        *,
+        workers: int = DEFAULT_WORKERS,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        batch_size: int = ingest.DEFAULT_BATCH_SIZE,
+        batch_timeout: float = DEFAULT_BATCH_TIMEOUT,
+        table: str = ingest.DEFAULT_TABLE,
+        method: ingest.InsertMethod = "arrow",
+    ) -> None:
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.table = table
+        self.method = method
+        self.metrics = Metrics()
+        self._queue: asyncio.Queue[ingest.Row | None] = asyncio.Queue(
+            max_queue_size
+        )
+        self._tasks: list[asyncio.Task] = []
+        self.errors: list[Exception] = []
+
+    async def put(
+        self,
+        client_id: str,
+        content: str,
+        log_ts: datetime.datetime | None = None,
+    ) -> None:
+        """
+        Queue a log row, waiting for space if the queue is full.
+        """
+
+        row = (log_ts or datetime.datetime.now(), client_id, content)
+        await self._queue.put(row)
+
+    async def _take_batch(self) -> tuple[list[ingest.Row], bool]:
+        """
+        Take the next batch off the queue, and whether to stop after it.
+        """
+
+        row = await self._queue.get()
+        if row is None:
+            return [], True
+        self.metrics.queue_depths.append(self._queue.qsize() + 1)
+
+        batch = [row]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            try:
+                row = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    async with asyncio.timeout(timeout):
+                        row = await self._queue.get()
+                except TimeoutError:
+                    break
+            if row is None:
+                return batch, True
+            batch.append(row)
+
+        return batch, False
+
+    def _insert(self, rows: list[ingest.Row]) -> None:
+        with self.pool.client() as client:
+            ingest.insert_rows(client, rows, self.table, self.method)
+
+    async def _work(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = await self._take_batch()
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._insert, batch)
+            except Exception as e:
+                self.errors.append(e)
+                continue
+            self.metrics.commit_latencies.append(time.perf_counter() - start)
+            self.metrics.batch_sizes.append(len(batch))
+
+    async def __aenter__(self) -> Self:
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        # One stop marker per worker, queued behind the remaining rows. If
+        # the workers are gone, nothing takes them, so stop waiting then
+        for _ in self._tasks:
+            put = asyncio.create_task(self._queue.put(None))
+            running = {task for task in self._tasks if not task.done()}
+            while running and not put.done():
+                await asyncio.wait(
+                    {put, *running}, return_when=asyncio.FIRST_COMPLETED
+                )
+                running = {task for task in running if not task.done()}
+            if not put.done():
+                put.cancel()
+                for task in self._tasks:
+                    task.cancel()
+                break
+
+        for result in await asyncio.gather(
+            *self._tasks, return_exceptions=True
+        ):
+            if isinstance(result, Exception):
+                self.errors.append(result)
+        if self.errors and exc_val is None:
+            raise self.errors[0]
+
+
+async def main(clients: int = 10, rows_per_client: int = 1_000) -> int:
+    server = start_server(HERE / "server.duckdb")
+    pool = ingest.ClientPool(connect_client, DEFAULT_WORKERS)
+
+    async def produce(client_id: str) -> None:
+        for i in range(rows_per_client):
+            await pipeline.put(client_id, f"doing iteration {i}")
+
+    async with LogPipeline(pool) as pipeline, asyncio.TaskGroup() as tg:
+        for i in range(clients):
+            tg.create_task(produce(f"client_{i}"))
+
+    print(pipeline.metrics.summary())
+    print(server.sql("select count(*) from logs").fetchone()[0])
+    pool.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,64 @@
+import concurrent.futures
+import datetime
+
+import duckdb
+import pyarrow
+import pytest
+from testing_duckdb_quack import coalesce
+from testing_duckdb_quack.main import LOGS_SQL
+
+
+def test__write_coalescer_commits_concurrent_writes_in_groups():
+    conn = duckdb.connect(":memory:")
+    conn.execute(LOGS_SQL)
+    now = datetime.datetime(2026, 1, 1)
+
+    with (
+        coalesce.WriteCoalescer(conn, max_delay=0.05) as coalescer,
+        concurrent.futures.ThreadPoolExecutor(8) as executor,
+    ):
+        written = list(
+            executor.map(
+                lambda i: coalescer.write([(now, f"client_{i}", "row")] * 10),
+                range(40),
+            )
+        )
+
+    assert written == [10] * 40
+    assert conn.sql("select count(*) from logs").fetchone()[0] == 400
+    assert sum(coalescer.group_sizes) == 40
+    assert len(coalescer.group_sizes) < 40
+
+
+def test__write_coalescer_only_fails_the_bad_write():
+    conn = duckdb.connect(":memory:")
+    conn.execute(LOGS_SQL)
+    now = datetime.datetime(2026, 1, 1)
+
+    with coalesce.WriteCoalescer(conn, max_delay=0.2) as coalescer:
+        good = coalescer.submit([(now, "client_0", "row")])
+        bad = coalescer.submit([(now, 123, "row")])
+        also_good = coalescer.submit([(now, "client_1", "row")])
+
+        assert good.result(timeout=5) == also_good.result(timeout=5) == 1
+        with pytest.raises(pyarrow.ArrowTypeError):
+            bad.result(timeout=5)
+
+    assert conn.sql("select count(*) from logs").fetchone()[0] == 2
+    with pytest.raises(RuntimeError):
+        coalescer.submit([(now, "client_0", "row")])
+
+
+def test__run_load_reports_reader_latency():
+    result = coalesce.run_load(
+        duckdb.connect(":memory:"),
+        writers=2,
+        readers=1,
+        duration=0.2,
+        rows_per_write=5,
+        coalesce=True,
+    )
+
+    assert result["reads"] > 0
+    assert result["read_p50_ms"] <= result["read_p99_ms"]
+    assert result["rows_per_second"] > 0
@@ -0,0 +1,66 @@
+import concurrent.futures
+import datetime
+import time
+
+import pyarrow
+import pytest
+from testing_duckdb_quack import ingest
+
+
+@pytest.mark.parametrize("method", ["arrow", "values"])
+def test__log_writer_batches_rows_per_client(method):
+    pool = ingest.local_pool(3)
+    log_ts = datetime.datetime(2026, 1, 1)
+
+    def produce(producer: int) -> None:
+        for i in range(25):
+            writer.add(f"client_{producer}", f"row {i}", log_ts)
+
+    with ingest.LogWriter(
+        pool, batch_size=10, flush_interval=None, method=method
+    ) as writer:
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            list(executor.map(produce, range(4)))
+        assert writer.rows_written == 4 * 20
+
+    with pool.client() as client:
+        counts = client.sql(
+            """
+            select client_id, count(*), min(log_ts)
+            from server.logs
+            group by client_id
+            order by client_id
+            """
+        ).fetchall()
+    assert writer.rows_written == 100
+    assert counts == [(f"client_{i}", 25, log_ts) for i in range(4)]
+
+
+def test__log_writer_flushes_quiet_clients_in_the_background():
+    pool = ingest.local_pool(1)
+
+    with ingest.LogWriter(pool, flush_interval=0.05) as writer:
+        writer.add("client_0", "the only row")
+        deadline = time.monotonic() + 5
+        while writer.rows_written == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert writer.rows_written == 1
+
+
+def test__log_writer_keeps_the_rows_that_fail_to_insert():
+    pool = ingest.local_pool(1)
+    writer = ingest.LogWriter(pool, flush_interval=None)
+    writer.add("a", "bad row", "not a timestamp")
+    writer.add("b", "good row")
+
+    with pytest.raises(pyarrow.ArrowTypeError):
+        writer.flush()
+
+    assert writer.rows_written == 1
+    assert [row[2] for row in writer._buffers["a"].rows] == ["bad row"]
+    assert "b" not in writer._buffers
+    with pool.client() as client:
+        assert client.sql("select log_data from server.logs").fetchall() == [
+            ("good row",)
+        ]
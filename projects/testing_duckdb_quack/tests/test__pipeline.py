@@ -0,0 +1,50 @@
+import asyncio
+
+import duckdb
+import pytest
+from testing_duckdb_quack import ingest, pipeline
+
+
+def test__log_pipeline_drains_every_row_in_batches():
+    pool = ingest.local_pool(2)
+
+    async def run() -> pipeline.LogPipeline:
+        async with pipeline.LogPipeline(
+            pool, workers=2, max_queue_size=50, batch_size=20
+        ) as pipeline_:
+            for i in range(500):
+                await pipeline_.put(f"client_{i % 5}", f"row {i}")
+
+        return pipeline_
+
+    metrics = asyncio.run(run()).metrics
+    summary = metrics.summary()
+
+    with pool.client() as client:
+        rows = client.sql("select count(*) from server.logs").fetchone()[0]
+    assert rows == summary["rows"] == 500
+    assert max(metrics.batch_sizes) <= 20
+    assert summary["max_queue_depth"] <= 50
+    assert summary["commit_p50_ms"] <= summary["commit_p99_ms"]
+
+
+def test__log_pipeline_raises_insert_errors_on_exit():
+    pool = ingest.local_pool(2)
+
+    async def run() -> pipeline.LogPipeline:
+        async with pipeline.LogPipeline(
+            pool,
+            workers=2,
+            max_queue_size=10,
+            batch_size=5,
+            table="server.nope",
+        ) as pipeline_:
+            for i in range(100):
+                await pipeline_.put("client_0", f"row {i}")
+
+    async def run_with_timeout() -> None:
+        async with asyncio.timeout(10):
+            await run()
+
+    with pytest.raises(duckdb.CatalogException):
+        asyncio.run(run_with_timeout())
@@ -0,0 +1,412 @@
+"""
+Read Orc files with column projection and stripe skipping.
+
+An Orc file keeps min/max statistics for every column of every stripe
+(in the file's "metadata" section, just before the footer). A lookup like
+``id = 1234`` only needs the stripes whose ``id`` range covers 1234, and
+only needs the columns it asks for, so most of the file is never read.
+
+Arrow's ``ORCFile`` reads stripes and columns but doesn't expose the
+stripe statistics, so they're decoded here from the file's tail: the
+metadata section is a small protobuf message, compressed in chunks with
+the file's codec.
+
+Statistics are decoded for integer, float, string, decimal and date
+columns; filters on other columns never skip a stripe (but still filter
+the rows). Files compressed with LZ4 are read without skipping, since
+Arrow can't decompress a raw LZ4 chunk without knowing its size.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import operator
+import pathlib
+import struct
+import zlib
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+import pyarrow
+import pyarrow.compute
+import pyarrow.orc
+
+from testing_orc import writer
+
+HERE = pathlib.Path(__file__).parent
+TARGET = HERE / "lookup.orc"
+EPOCH = datetime.date(1970, 1, 1)
+
+Filter = tuple[str, str, Any]
+EXPRESSIONS: dict[str, Callable[[pyarrow.compute.Expression, Any], Any]] = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda field, values: field.isin(values),
+    "not in": lambda field, values: ~field.isin(values),
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class ColumnStatistics:
+    """
+    The statistics for a column in a stripe.
+
+    ``minimum`` and ``maximum`` are ``None`` when they aren't known (or
+    when the column has no non-null values).
+    """
+
+    count: int
+    has_null: bool
+    minimum: Any = None
+    maximum: Any = None
+
+
+def _varint(data: bytes, position: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:  # noqa: PLR2004
+            return result, position
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def _fields(data: bytes) -> Iterator[tuple[int, int | bytes]]:
+    """
+    Yield the field numbers and (raw) values of a protobuf message.
+
+    Varints are yielded as ints, everything else as bytes.
+    """
+
+    position = 0
+    while position < len(data):
+        key, position = _varint(data, position)
+        number, wire_type = key >> 3, key & 0x07
+        match wire_type:
+            case 0:
+                value, position = _varint(data, position)
+            case 1:
+                value, position = data[position : position + 8], position + 8
+            case 2:
+                length, position = _varint(data, position)
+                value = data[position : position + length]
+                position += length
+            case 5:
+                value, position = data[position : position + 4], position + 4
+            case _:
+                raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+        yield number, value
+
+
+def _bounds(data: bytes, decode: Callable[[Any], Any]) -> tuple[Any, Any]:
+    """
+    Return the decoded min/max (fields 1 and 2) of a statistics message.
+    """
+
+    fields = dict(_fields(data))
+    minimum, maximum = fields.get(1), fields.get(2)
+    return (
+        None if minimum is None else decode(minimum),
+        None if maximum is None else decode(maximum),
+    )
+
+
+def _string_bounds(data: bytes) -> tuple[Any, Any]:
+    """
+    Return the min/max of a string statistics message.
+
+    Long strings are stored as (truncated) lower and upper bounds instead,
+    which are just as good for skipping stripes.
+    """
+
+    fields = dict(_fields(data))
+    minimum, maximum = (
+        fields.get(1, fields.get(4)),
+        fields.get(2, fields.get(5)),
+    )
+    return (
+        None if minimum is None else minimum.decode(),
+        None if maximum is None else maximum.decode(),
+    )
+
+
+def _column_statistics(data: bytes) -> ColumnStatistics:
+    count, has_null, bounds = 0, True, (None, None)
+    for number, value in _fields(data):
+        match number:
+            case 1:
+                count = value
+            case 2:
+                bounds = _bounds(value, _zigzag)
+            case 3:
+                bounds = _bounds(value, lambda v: struct.unpack("<d", v)[0])
+            case 4:
+                bounds = _string_bounds(value)
+            case 6:
+                bounds = _bounds(value, lambda v: decimal.Decimal(v.decode()))
+            case 7:
+                bounds = _bounds(
+                    value,
+                    lambda v: EPOCH + datetime.timedelta(days=_zigzag(v)),
+                )
+            case 10:
+                has_null = bool(value)
+
+    return ColumnStatistics(count, has_null, *bounds)
+
+
+def _decompress(data: bytes, compression: str) -> bytes:
+    """
+    Decompress a section of an Orc file.
+
+    Compressed sections are a run of chunks, each with a 3-byte header
+    holding the chunk's length and whether it was stored uncompressed.
+    """
+
+    if compression == "UNCOMPRESSED":
+        return data
+
+    chunks, position = [], 0
+    while position < len(data):
+        header = int.from_bytes(data[position : position + 3], "little")
+        position += 3
+        chunk = data[position : position + (header >> 1)]
+        position += header >> 1
+        if header & 1:
+            chunks.append(chunk)
+            continue
+
+        match compression:
+            case "ZLIB":
+                chunks.append(zlib.decompress(chunk, -zlib.MAX_WBITS))
+            case "ZSTD":
+                chunks.append(
+                    pyarrow.input_stream(
+                        pyarrow.py_buffer(chunk), compression="zstd"
+                    ).read()
+                )
+            case "SNAPPY":
+                # Snappy chunks start with their uncompressed length
+                size, _ = _varint(chunk, 0)
+                chunks.append(
+                    pyarrow.Codec("snappy").decompress(
+                        chunk, decompressed_size=size, asbytes=True
+                    )
+                )
+            case _:
+                raise ValueError(f"Unsupported compression {compression}")
+
+    return b"".join(chunks)
+
+
+def _column_count(type_: pyarrow.DataType) -> int:
+    """
+    Return the number of Orc columns that the type takes up.
+
+    Orc numbers the columns of nested types too, depth first.
+    """
+
+    if isinstance(type_, pyarrow.MapType):
+        return (
+            1 + _column_count(type_.key_type) + _column_count(type_.item_type)
+        )
+    return 1 + sum(
+        _column_count(type_.field(i).type) for i in range(type_.num_fields)
+    )
+
+
+def _column_ids(schema: pyarrow.Schema) -> dict[str, int]:
+    """
+    Return the Orc column ID of each top-level field.
+
+    Column 0 is the file's (root) struct.
+    """
+
+    ids, next_id = {}, 1
+    for field in schema:
+        ids[field.name] = next_id
+        next_id += _column_count(field.type)
+
+    return ids
+
+
+def stripe_statistics(
+    source: str | pathlib.Path,
+) -> list[dict[str, ColumnStatistics]]:
+    """
+    Return the statistics for each top-level column of each stripe.
+
+    Return an empty list when the file has no stripe statistics (or they
+    can't be decompressed).
+    """
+
+    orc_file = pyarrow.orc.ORCFile(str(source))
+    if (
+        orc_file.nstripe_statistics != orc_file.nstripes
+        or orc_file.compression == "LZ4"
+    ):
+        return []
+
+    length = orc_file.stripe_statistics_length
+    offset = (
+        orc_file.file_length
+        - 1  # the postscript's length
+        - orc_file.file_postscript_length
+        - orc_file.file_footer_length
+        - length
+    )
+    with open(source, "rb") as file:
+        file.seek(offset)
+        metadata = _decompress(file.read(length), orc_file.compression)
+
+    ids = _column_ids(orc_file.schema)
+    statistics = []
+    for number, stripe in _fields(metadata):
+        if number != 1:
+            continue
+        columns = [
+            _column_statistics(column)
+            for number_, column in _fields(stripe)
+            if number_ == 1
+        ]
+        statistics.append({name: columns[id_] for name, id_ in ids.items()})
+
+    return statistics
+
+
+def _range_may_match(low: Any, high: Any, op: str, value: Any) -> bool:  # noqa: PLR0911
+    """
+    Return whether a value in ``[low, high]`` could match the filter.
+    """
+
+    match op:
+        case "=" | "==":
+            return low <= value <= high
+        case "!=":
+            return not (low == high == value)
+        case "<":
+            return low < value
+        case "<=":
+            return low <= value
+        case ">":
+            return high > value
+        case ">=":
+            return high >= value
+        case "in":
+            return any(low <= v <= high for v in value)
+        case "not in":
+            return not (low == high and low in value)
+        case _:
+            raise ValueError(f"Unsupported filter operator {op!r}")
+
+
+def may_match(
+    statistics: dict[str, ColumnStatistics],
+    filters: Sequence[Filter],
+) -> bool:
+    """
+    Return whether any row of the stripe could match all the filters.
+
+    The filters are ``(column, op, value)`` tuples, as in
+    ``pyarrow.parquet.read_table``.
+    """
+
+    for column, op, value in filters:
+        stats = statistics.get(column)
+        if stats is None:
+            continue
+        if stats.count == 0:
+            # Only nulls, which never match a comparison
+            return False
+        if stats.minimum is None or stats.maximum is None:
+            continue
+        if not _range_may_match(stats.minimum, stats.maximum, op, value):
+            return False
+
+    return True
+
+
+def _expression(filters: Sequence[Filter]) -> pyarrow.compute.Expression:
+    expressions = [
+        EXPRESSIONS[op](pyarrow.compute.field(column), value)
+        for column, op, value in filters
+    ]
+    expression = expressions[0]
+    for other in expressions[1:]:
+        expression &= other
+
+    return expression
+
+
+def read_orc_batches(
+    source: str | pathlib.Path,
+    columns: Sequence[str] | None = None,
+    filters: Sequence[Filter] | None = None,
+) -> Iterator[pyarrow.RecordBatch]:
+    """
+    Yield the rows of the Orc file that match the filters, a stripe at a
+    time.
+
+    Stripes whose statistics rule out a match are skipped without being
+    read, and only the requested (and filtered) columns are read from the
+    rest.
+
+    :param source: The Orc file to read.
+    :param columns: The columns to return. Defaults to all of them.
+    :param filters: ``(column, op, value)`` tuples that every row must
+        match, where ``op`` is one of ``=``, ``!=``, ``<``, ``<=``, ``>``,
+        ``>=``, ``in`` or ``not in``.
+    """
+
+    orc_file = pyarrow.orc.ORCFile(str(source))
+    filters = list(filters or [])
+    if columns is not None:
+        read_columns = list(
+            dict.fromkeys([*columns, *(column for column, *_ in filters)])
+        )
+    else:
+        read_columns = None
+    statistics = stripe_statistics(source) if filters else []
+    expression = _expression(filters) if filters else None
+
+    for stripe in range(orc_file.nstripes):
+        if statistics and not may_match(statistics[stripe], filters):
+            continue
+
+        batch = orc_file.read_stripe(stripe, columns=read_columns)
+        if expression is not None:
+            batch = batch.filter(expression)
+        if columns is not None:
+            batch = batch.select(list(columns))
+        if batch.num_rows:
+            yield batch
+
+
+def main(rows: int = 10_000_000) -> None:
+    if not TARGET.exists():
+        writer.write_orc_batches(
+            TARGET,
+            writer.generate_batches(rows),
+            stripe_size=8 * 1024 * 1024,
+        )
+
+    filters = [("id", "=", rows // 2)]
+    statistics = stripe_statistics(TARGET)
+    read = sum(may_match(stripe, filters) for stripe in statistics)
+    print(f"stripes: {len(statistics)}, read: {read}")
+    for batch in read_orc_batches(TARGET, ["id", "amount"], filters):
+        print(batch.to_pylist())
+
+
+if __name__ == "__main__":
+    main()
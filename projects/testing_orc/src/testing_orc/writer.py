@@ -0,0 +1,114 @@
+"""
+Write Orc files from a stream of record batches.
+
+``pyarrow.orc.write_table`` needs the whole table in memory. The
+``ORCWriter`` takes the data a batch at a time instead and cuts a stripe
+whenever its buffer reaches the stripe size, so memory is bounded by the
+stripe size (plus a batch) however big the file gets.
+"""
+
+import pathlib
+from collections.abc import Iterable, Iterator
+
+import pyarrow
+import pyarrow.orc
+
+HERE = pathlib.Path(__file__).parent
+TARGET = HERE / "large.orc"
+DEFAULT_STRIPE_SIZE = 64 * 1024 * 1024  # bytes
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_COMPRESSION_BLOCK_SIZE = 64 * 1024  # bytes
+DEFAULT_ROW_INDEX_STRIDE = 10_000  # rows
+
+
+def write_orc_batches(  # noqa: PLR0913
+    target: pathlib.Path,
+    batches: Iterable[pyarrow.RecordBatch | pyarrow.Table],
+    *,
+    schema: pyarrow.Schema | None = None,
+    stripe_size: int = DEFAULT_STRIPE_SIZE,
+    compression: str = DEFAULT_COMPRESSION,
+    compression_block_size: int = DEFAULT_COMPRESSION_BLOCK_SIZE,
+    dictionary_key_size_threshold: float = 0.0,
+    row_index_stride: int = DEFAULT_ROW_INDEX_STRIDE,
+    bloom_filter_columns: list[str] | None = None,
+) -> int:
+    """
+    Stream the batches into an Orc file.
+
+    Return the number of rows written.
+
+    :param target: The file to (over)write.
+    :param batches: Record batches (or tables), all with the same schema.
+    :param schema: The schema to cast each batch to. Defaults to the
+        schema of the first batch.
+    :param stripe_size: The (approximate, uncompressed) size of each
+        stripe, in bytes. This bounds the writer's memory.
+    :param compression: The compression codec, e.g. ``zstd``, ``snappy``,
+        ``lz4``, ``zlib`` or ``uncompressed``.
+    :param compression_block_size: The size of each compression chunk
+        within a stripe, in bytes.
+    :param dictionary_key_size_threshold: Dictionary-encode a string column
+        when its distinct values are at most this fraction of its values.
+        Zero (the default) turns dictionary encoding off.
+    :param row_index_stride: The number of rows between row-index entries,
+        which are what readers use to skip rows within a stripe.
+    :param bloom_filter_columns: The columns to write bloom filters for.
+    """
+
+    rows = 0
+    with pyarrow.orc.ORCWriter(
+        where=str(target),
+        stripe_size=stripe_size,
+        compression=compression,
+        compression_block_size=compression_block_size,
+        dictionary_key_size_threshold=dictionary_key_size_threshold,
+        row_index_stride=row_index_stride,
+        bloom_filter_columns=bloom_filter_columns,
+    ) as writer:
+        for batch in batches:
+            table = (
+                batch
+                if isinstance(batch, pyarrow.Table)
+                else pyarrow.Table.from_batches([batch])
+            )
+            if schema is not None:
+                table = table.cast(schema)
+            writer.write(table)
+            rows += table.num_rows
+
+    return rows
+
+
+def generate_batches(
+    rows: int, batch_size: int = 100_000
+) -> Iterator[pyarrow.RecordBatch]:
+    """
+    Generate batches of synthetic data, one batch at a time.
+    """
+
+    for start in range(0, rows, batch_size):
+        ids = range(start, min(start + batch_size, rows))
+        yield pyarrow.RecordBatch.from_pydict(
+            {
+                "id": pyarrow.array(ids, type=pyarrow.int64()),
+                "category": [f"category-{i % 100}" for i in ids],
+                "amount": [i / 100 for i in ids],
+            }
+        )
+
+
+def main(rows: int = 10_000_000) -> None:
+    written = write_orc_batches(
+        TARGET,
+        generate_batches(rows),
+        dictionary_key_size_threshold=1.0,
+    )
+    orc_file = pyarrow.orc.ORCFile(str(TARGET))
+    print(f"rows: {written}, stripes: {orc_file.nstripes}")
+    print(f"file size: {TARGET.stat().st_size:,} bytes")
+    print(orc_file.read_stripe(0).slice(0, 1).to_pylist())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import pyarrow.orc
+from testing_orc import reader, writer
+
+
+def test__read_orc_batches_skips_stripes_and_projects_columns(tmp_path):
+    target = tmp_path / "example.orc"
+    writer.write_orc_batches(
+        target,
+        writer.generate_batches(50_000, batch_size=1_000),
+        stripe_size=64 * 1024,
+        compression="zlib",
+    )
+    statistics = reader.stripe_statistics(target)
+    filters = [("id", ">=", 10_000), ("id", "<", 10_005)]
+
+    assert len(statistics) == pyarrow.orc.ORCFile(str(target)).nstripes > 1
+    assert statistics[0]["id"].minimum == 0
+    assert sum(reader.may_match(s, filters) for s in statistics) == 1
+    assert [
+        batch.to_pylist()
+        for batch in reader.read_orc_batches(target, ["amount"], filters)
+    ] == [[{"amount": (10_000 + i) / 100} for i in range(5)]]
+
+
+def test__read_orc_batches_reads_everything_without_filters(tmp_path):
+    target = tmp_path / "example.orc"
+    table = pyarrow.table({"col1": [1, 2, 3], "col2": ["a", "b", None]})
+    pyarrow.orc.write_table(table, str(target), compression="zstd")
+
+    batches = list(reader.read_orc_batches(target))
+
+    assert pyarrow.Table.from_batches(batches).equals(table)
+    assert reader.stripe_statistics(target)[0]["col2"] == (
+        reader.ColumnStatistics(2, True, "a", "b")
+    )
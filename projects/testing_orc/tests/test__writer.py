@@ -0,0 +1,41 @@
+import pyarrow
+import pyarrow.orc
+from testing_orc import writer
+
+
+def test__write_orc_batches_streams_every_batch(tmp_path):
+    target = tmp_path / "example.orc"
+    rows = writer.write_orc_batches(
+        target,
+        writer.generate_batches(50_000, batch_size=1_000),
+        stripe_size=64 * 1024,
+        compression="snappy",
+    )
+    orc_file = pyarrow.orc.ORCFile(str(target))
+
+    assert rows == orc_file.nrows == 50_000
+    assert orc_file.nstripes > 1
+    assert orc_file.compression == "SNAPPY"
+    assert orc_file.read(columns=["id"]).column("id").to_pylist() == list(
+        range(50_000)
+    )
+
+
+def test__write_orc_batches_casts_to_the_schema(tmp_path):
+    target = tmp_path / "example.orc"
+    schema = pyarrow.schema(
+        [("col1", pyarrow.int16()), ("col2", pyarrow.string())]
+    )
+    writer.write_orc_batches(
+        target,
+        [
+            pyarrow.table({"col1": [1, 2], "col2": ["a", "b"]}),
+            pyarrow.RecordBatch.from_pydict({"col1": [3], "col2": [None]}),
+        ],
+        schema=schema,
+    )
+
+    assert pyarrow.orc.read_table(target).to_pydict() == {
+        "col1": [1, 2, 3],
+        "col2": ["a", "b", None],
+    }
@@ -0,0 +1,351 @@
+"""
+A catalogue of the known tables and columns, loaded once and refreshed
+incrementally.
+
+``get_information_schema_objects`` queries the information schema every
+time, and ``validate_query_objects`` searches a list of the table names
+for every table in a query. The catalogue instead keeps each table's
+columns as a frozen set in a dictionary, keyed by the schema-qualified
+name (``schema.table``), along with an index of the bare table names, so
+validating a query is a few hash lookups and subset checks.
+
+The tables come from a source:
+
+- ``DuckDBSource``, from DuckDB's catalogue
+- ``ManifestSource``, from a dbt ``manifest.json`` (its models, seeds,
+  snapshots, and sources), which avoids a database query at all
+
+Each source gives a fingerprint for each table, which is cheap to get, so
+``refresh`` only loads the columns of the tables that are new or have
+changed, and drops the ones that have gone.
+
+Names are case-insensitive, as in DuckDB, so they're kept case folded.
+
+``mapping_schema`` gives the catalogue as a SQLGlot schema, for
+qualifying queries against. It's built once per change to the catalogue,
+which ``version`` counts.
+"""
+
+import hashlib
+import json
+import pathlib
+import time
+from collections.abc import Collection
+from typing import Protocol
+
+import duckdb
+from sqlglot.schema import MappingSchema
+
+from testing_sqlglot.validate_llm_sql import ObjectNotFoundError, TableColumns
+
+DEFAULT_SCHEMA = "main"
+UNKNOWN_TYPE = "unknown"  # the catalogue doesn't keep the column types
+MANIFEST_RESOURCE_TYPES = {"model", "seed", "snapshot"}
+# Above this, reading every column is faster than binding the names
+MAX_FILTERED_TABLES = 256
+
+
+class CatalogueSource(Protocol):
+    def fingerprints(self) -> dict[str, str]:
+        """
+        Return a fingerprint for each table, which changes when its
+        columns do, keyed by the table's schema-qualified name.
+        """
+
+    def columns(self, tables: Collection[str]) -> dict[str, set[str]]:
+        """
+        Return the columns of each of the tables.
+        """
+
+
+class DuckDBSource:
+    """
+    The tables and views in a DuckDB database.
+
+    The fingerprints are hashes of the tables' and views' definitions,
+    which DuckDB updates when they're altered.
+    """
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection) -> None:
+        self.conn = conn
+
+    def fingerprints(self) -> dict[str, str]:
+        return dict(
+            self.conn.sql(
+                """
+                select lower(schema_name || '.' || table_name), md5(sql)
+                from duckdb_tables()
+                where not internal
+                union all
+                select lower(schema_name || '.' || view_name), md5(sql)
+                from duckdb_views()
+                where not internal
+                """
+            ).fetchall()
+        )
+
+    def columns(self, tables: Collection[str]) -> dict[str, set[str]]:
+        columns: dict[str, set[str]] = {table: set() for table in tables}
+        if len(columns) <= MAX_FILTERED_TABLES:
+            rows = self.conn.execute(
+                """
+                select
+                    lower(schema_name || '.' || table_name),
+                    lower(column_name)
+                from duckdb_columns()
+                where not internal
+                    and lower(schema_name || '.' || table_name)
+                        in (select unnest($tables))
+                """,
+                {"tables": list(columns)},
+            ).fetchall()
+        else:
+            # Binding a long list of names is slower than reading every
+            # column and filtering them here
+            rows = self.conn.sql(
+                """
+                select
+                    lower(schema_name || '.' || table_name),
+                    lower(column_name)
+                from duckdb_columns()
+                where not internal
+                """
+            ).fetchall()
+        for table, column in rows:
+            if table in columns:
+                columns[table].add(column)
+
+        return columns
+
+
+class ManifestSource:
+    """
+    The models, seeds, snapshots, and sources in a dbt manifest.
+
+    The manifest is only re-read when its modified time changes. Each
+    table's fingerprint is a hash of its columns (and, for nodes, its
+    checksum).
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self._mtime: int | None = None
+        self._tables: dict[str, tuple[str, set[str]]] = {}
+
+    def _load(self) -> dict[str, tuple[str, set[str]]]:
+        mtime = self.path.stat().st_mtime_ns
+        if mtime == self._mtime:
+            return self._tables
+
+        manifest = json.loads(self.path.read_text(encoding="utf-8"))
+        nodes = [
+            node
+            for node in manifest.get("nodes", {}).values()
+            if node.get("resource_type") in MANIFEST_RESOURCE_TYPES
+        ]
+        nodes += manifest.get("sources", {}).values()
+
+        tables = {}
+        for node in nodes:
+            name = node.get("identifier") or node.get("alias") or node["name"]
+            columns = {column.casefold() for column in node.get("columns", {})}
+            fingerprint = hashlib.md5(  # noqa: S324
+                json.dumps(
+                    [node.get("checksum"), sorted(columns)],
+                    sort_keys=True,
+                ).encode("utf-8")
+            ).hexdigest()
+            table = f"{node['schema']}.{name}".casefold()
+            tables[table] = (fingerprint, columns)
+
+        self._mtime, self._tables = mtime, tables
+        return tables
+
+    def fingerprints(self) -> dict[str, str]:
+        return {
+            table: fingerprint
+            for table, (fingerprint, _) in self._load().items()
+        }
+
+    def columns(self, tables: Collection[str]) -> dict[str, set[str]]:
+        loaded = self._load()
+        return {table: loaded[table][1] for table in tables}
+
+
+class Catalogue:
+    """
+    The known tables and their columns, keyed by their schema-qualified
+    names.
+
+    :param source: Where to load the tables from.
+    :param default_schema: The schema to look for bare table names in
+        first. A bare name that isn't in it is looked for in the other
+        schemas, and is only found if exactly one of them has it.
+    """
+
+    def __init__(
+        self,
+        source: CatalogueSource,
+        default_schema: str = DEFAULT_SCHEMA,
+    ) -> None:
+        self.source = source
+        self.default_schema = default_schema.casefold()
+        self.tables: dict[str, frozenset[str]] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._schemas: dict[str, set[str]] = {}  # bare name -> schemas
+        self._mapping_schema: MappingSchema | None = None
+        self.version = 0
+        self.refresh()
+
+    @classmethod
+    def from_duckdb(cls, conn: duckdb.DuckDBPyConnection) -> "Catalogue":
+        return cls(DuckDBSource(conn))
+
+    @classmethod
+    def from_manifest(cls, path: pathlib.Path) -> "Catalogue":
+        return cls(ManifestSource(path))
+
+    def refresh(self) -> set[str]:
+        """
+        Load the tables that are new or have changed since the last
+        refresh, drop the ones that have gone, and return all of them.
+        """
+
+        fingerprints = self.source.fingerprints()
+        removed = self._fingerprints.keys() - fingerprints.keys()
+        changed = {
+            table
+            for table, fingerprint in fingerprints.items()
+            if self._fingerprints.get(table) != fingerprint
+        }
+
+        for table in removed:
+            del self.tables[table]
+            schema, _, name = table.rpartition(".")
+            self._schemas[name].discard(schema)
+        for table, columns in self.source.columns(changed).items():
+            self.tables[table] = frozenset(columns)
+            schema, _, name = table.rpartition(".")
+            self._schemas.setdefault(name, set()).add(schema)
+
+        self._fingerprints = fingerprints
+        if changed or removed:
+            self.version += 1
+            self._mapping_schema = None
+
+        return changed | removed
+
+    def resolve(self, table: str) -> str | None:
+        """
+        Return the schema-qualified name of the table, or ``None`` if it
+        isn't in the catalogue (or is ambiguous).
+        """
+
+        table = table.casefold()
+        if "." in table:
+            return table if table in self.tables else None
+
+        schemas = self._schemas.get(table, set())
+        if self.default_schema in schemas:
+            return f"{self.default_schema}.{table}"
+        if len(schemas) == 1:
+            return f"{next(iter(schemas))}.{table}"
+
+        return None
+
+    def mapping_schema(self) -> MappingSchema:
+        """
+        Return the catalogue as a SQLGlot schema, with every column's type
+        unknown.
+        """
+
+        if self._mapping_schema is None:
+            nested: dict[str, dict[str, dict[str, str]]] = {}
+            for table, columns in self.tables.items():
+                schema, _, name = table.rpartition(".")
+                nested.setdefault(schema, {})[name] = dict.fromkeys(
+                    columns, UNKNOWN_TYPE
+                )
+            self._mapping_schema = MappingSchema(nested, normalize=False)
+
+        return self._mapping_schema
+
+    def unresolved(self, query_objects: TableColumns) -> list[str]:
+        """
+        Return every table and column in the query objects that isn't in
+        the catalogue.
+        """
+
+        problems = []
+        for table, columns in query_objects.items():
+            qualified = self.resolve(table)
+            if qualified is None:
+                problems.append(f"Table '{table}' not found.")
+                continue
+
+            known_columns = self.tables[qualified]
+            problems.extend(
+                f"Column '{column}' not found in table '{table}'."
+                for column in sorted(columns)
+                if column.casefold() not in known_columns
+            )
+
+        return problems
+
+    def validate(self, query_objects: TableColumns) -> None:
+        """
+        Validate that the query objects exist in the catalogue, like
+        ``validate_query_objects``, but reporting all of the missing ones.
+        """
+
+        problems = self.unresolved(query_objects)
+        if problems:
+            raise ObjectNotFoundError("\n".join(problems))
+
+    def __contains__(self, table: str) -> bool:
+        return self.resolve(table) is not None
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+
+def main(schemas: int = 10, tables_per_schema: int = 1_000) -> None:
+    """
+    Load a catalogue of 10k tables from DuckDB, time validating against it,
+    and refresh it after a change.
+    """
+
+    conn = duckdb.connect()
+    for s in range(schemas):
+        conn.execute(f"create schema s{s}")
+        conn.execute(
+            ";".join(
+                f"create table s{s}.t{t} (id integer, value_{t} text)"
+                for t in range(tables_per_schema)
+            )
+        )
+
+    start = time.perf_counter()
+    catalogue = Catalogue.from_duckdb(conn)
+    print(
+        f"loaded {len(catalogue):,} tables in {time.perf_counter() - start:.2f}s"
+    )
+
+    queries = [
+        {f"s{i % schemas}.t{i}": {"id", f"value_{i}"}}
+        for i in range(tables_per_schema)
+    ]
+    start = time.perf_counter()
+    for query_objects in queries:
+        catalogue.validate(query_objects)
+    seconds = time.perf_counter() - start
+    print(f"validated in {1_000_000 * seconds / len(queries):.1f}us per query")
+
+    conn.execute("alter table s0.t0 add column extra text")
+    start = time.perf_counter()
+    changed = catalogue.refresh()
+    print(f"refreshed {changed} in {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
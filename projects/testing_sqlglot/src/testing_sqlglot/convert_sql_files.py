@@ -1,33 +1,271 @@
-import glob
+"""
+Migrate a directory of SQL scripts from one dialect to another.
+
+The files are transpiled in parallel, in a process pool, since SQLGlot's
+parsing is CPU-bound. A file that fails (e.g. one that doesn't parse) is
+recorded as failed rather than stopping the rest.
+
+Each migrated file's hashes are kept in a JSON cache, keyed by its path,
+so a re-run skips the files that haven't changed since: the hash of the
+source file (which decides whether it needs migrating again), and the
+hash of the migrated file (so an edited or deleted output is written
+again). When migrating in place, the source's hash is of the migrated
+file, so the already-migrated files aren't migrated a second time. The
+cache is only used for the same dialects and SQLGlot version that wrote
+it.
+
+The time spent on each file is recorded too, to find the slow ones.
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import hashlib
+import json
+import multiprocessing
+import os
 import pathlib
+import time
+from collections.abc import Sequence
+from typing import Literal
 
 import sqlglot
 
 HERE = pathlib.Path(__file__).parent
+CACHE_FILE = ".migration-cache.json"
+SUCCESS = 0
+FAILURE = 1
+
+Status = Literal["migrated", "cached", "failed"]
+Hashes = dict[str, str]  # the "source" and "output" hashes
+
+
+@dataclasses.dataclass(frozen=True)
+class MigrationResult:
+    path: pathlib.Path
+    status: Status
+    seconds: float = 0.0
+    error: str | None = None
+    hashes: Hashes | None = None
+
+
+def _hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _migrate_file(
+    source: pathlib.Path,
+    target: pathlib.Path,
+    cached: Hashes | None,
+    dialects: tuple[str, str],
+    relative: pathlib.Path,
+) -> MigrationResult:
+    """
+    Migrate one file, returning how it went rather than raising.
+    """
+
+    from_dialect, to_dialect = dialects
+    start = time.perf_counter()
+    try:
+        content = source.read_text(encoding="utf-8")
+        if (
+            cached is not None
+            and _hash(content) == cached["source"]
+            and target.exists()
+            and (
+                target == source
+                or _hash(target.read_text("utf-8")) == cached["output"]
+            )
+        ):
+            return MigrationResult(relative, "cached", hashes=cached)
+
+        migrated = ";\n\n".join(
+            sqlglot.transpile(
+                content,
+                read=from_dialect,
+                write=to_dialect,
+                pretty=True,
+            )
+        )
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(migrated, encoding="utf-8")
+    except Exception as e:
+        return MigrationResult(
+            relative,
+            "failed",
+            seconds=time.perf_counter() - start,
+            error=f"{type(e).__name__}: {e}",
+        )
+
+    output_hash = _hash(migrated)
+    return MigrationResult(
+        relative,
+        "migrated",
+        seconds=time.perf_counter() - start,
+        hashes={
+            # In place, the source is the migrated file from now on
+            "source": output_hash if target == source else _hash(content),
+            "output": output_hash,
+        },
+    )
+
+
+def _cache_key(from_dialect: str, to_dialect: str) -> str:
+    return f"{from_dialect}->{to_dialect} (sqlglot {sqlglot.__version__})"
+
+
+def _read_cache(path: pathlib.Path, key: str) -> dict[str, Hashes]:
+    try:
+        cache = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if cache.get("key") != key:
+        return {}
 
+    return cache["files"]
 
-def migrate_scripts(sql_dir: pathlib.Path) -> None:
+
+def _write_cache(
+    path: pathlib.Path,
+    key: str,
+    results: list[MigrationResult],
+) -> None:
+    files = {
+        result.path.as_posix(): result.hashes
+        for result in results
+        if result.hashes is not None
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({"key": key, "files": files}, indent=2),
+        encoding="utf-8",
+    )
+
+
+def migrate_scripts(  # noqa: PLR0913
+    sql_dir: pathlib.Path,
+    output_dir: pathlib.Path | None = None,
+    *,
+    from_dialect: str = "tsql",
+    to_dialect: str = "postgres",
+    cache_path: pathlib.Path | None = None,
+    workers: int | None = None,
+) -> list[MigrationResult]:
+    """
+    Migrate the SQL scripts under ``sql_dir`` (recursively) from T-SQL to
+    PostgreSQL using SQLGlot.
+
+    :param sql_dir: The directory of scripts to migrate.
+    :param output_dir: Where to write the migrated scripts, under the same
+        relative paths. Defaults to rewriting them in place.
+    :param from_dialect: The dialect to migrate from.
+    :param to_dialect: The dialect to migrate to.
+    :param cache_path: The JSON file of the hashes of the migrated files, to
+        skip the unchanged ones. Defaults to no cache.
+    :param workers: The number of processes. Defaults to the CPU count.
+    """
+
+    output_dir = output_dir or sql_dir
+    key = _cache_key(from_dialect, to_dialect)
+    cache = _read_cache(cache_path, key) if cache_path else {}
+    paths = sorted(path.relative_to(sql_dir) for path in sql_dir.rglob("*.sql"))
+    workers = workers or os.cpu_count() or 1
+
+    # Forking a process that runs other threads can deadlock, so spawn
+    with concurrent.futures.ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        results = list(
+            executor.map(
+                _migrate_file,
+                [sql_dir / path for path in paths],
+                [output_dir / path for path in paths],
+                [cache.get(path.as_posix()) for path in paths],
+                [(from_dialect, to_dialect)] * len(paths),
+                paths,
+                # a few files per task, to cut down on the IPC per file
+                chunksize=max(1, len(paths) // (4 * workers)),
+            )
+        )
+
+    if cache_path:
+        _write_cache(cache_path, key, results)
+
+    return results
+
+
+def summarise(results: list[MigrationResult], slowest: int = 10) -> str:
     """
-    Migrate SQL scripts from T-SQL to PostgreSQL using SQLGlot.
+    Return a summary of the migration: the counts of each status, the
+    failures, and the slowest files.
     """
 
-    from_dialect, to_dialect = "tsql", "postgres"
-    paths = glob.glob(f"{sql_dir}/**/*.sql", recursive=True)
-    for path in paths:
-        file = sql_dir / path
-        content = file.read_text(encoding="utf-8")
-        migrated = sqlglot.transpile(
-            content,
-            read=from_dialect,
-            write=to_dialect,
-            pretty=True,
+    counts = {
+        status: sum(result.status == status for result in results)
+        for status in ("migrated", "cached", "failed")
+    }
+    total = sum(result.seconds for result in results)
+    lines = [
+        ", ".join(f"{count} {status}" for status, count in counts.items())
+        + f" in {total:.2f}s of processing time"
+    ]
+
+    failed = [result for result in results if result.status == "failed"]
+    if failed:
+        lines.append("Failed:")
+        lines.extend(f"  {result.path}: {result.error}" for result in failed)
+
+    timed = sorted(
+        (result for result in results if result.status != "cached"),
+        key=lambda result: result.seconds,
+        reverse=True,
+    )
+    if timed[:slowest]:
+        lines.append("Slowest:")
+        lines.extend(
+            f"  {result.seconds:8.3f}s  {result.path}"
+            for result in timed[:slowest]
         )
-        file.write_text(";\n\n".join(migrated))
 
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Parse the arguments and migrate the scripts.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sql_dir", nargs="?", type=pathlib.Path)
+    parser.add_argument("--output", type=pathlib.Path)
+    parser.add_argument("--from", dest="from_dialect", default="tsql")
+    parser.add_argument("--to", dest="to_dialect", default="postgres")
+    parser.add_argument(
+        "--cache",
+        type=pathlib.Path,
+        help=f"defaults to {CACHE_FILE} in the output directory",
+    )
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--slowest", type=int, default=10)
+
+    args = parser.parse_args(argv)
+    sql_dir = args.sql_dir or HERE / "models"
+    start = time.perf_counter()
+    results = migrate_scripts(
+        sql_dir,
+        args.output,
+        from_dialect=args.from_dialect,
+        to_dialect=args.to_dialect,
+        cache_path=args.cache or (args.output or sql_dir) / CACHE_FILE,
+        workers=args.workers,
+    )
+
+    print(summarise(results, args.slowest))
+    print(f"Finished in {time.perf_counter() - start:.2f}s")
 
-def main() -> None:
-    migrate_scripts(HERE / "models")
+    return FAILURE if any(r.status == "failed" for r in results) else SUCCESS
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,410 @@
+"""
+Transpile a directory of SQL models incrementally, following their
+dependencies.
+
+``migrate_scripts`` treats every file on its own and transpiles all of
+them on every run. Here, each model (a ``.sql`` file, named by its stem,
+like in dbt) is parsed once, and the tables it selects from give the
+graph of models. Between runs, the builder keeps:
+
+- a state file with each model's content hash and the models it refers
+  to, so the unchanged models aren't read past their hash
+- the parsed trees, as JSON (SQLGlot's ``serde``) named by the content
+  hash, so a model that needs transpiling again isn't parsed again
+
+A build then transpiles (and validates) only the models that changed and
+the models downstream of them, in dependency order. Deleting a model
+removes its output and rebuilds its dependants too, which then fail
+validation (on every build, until fixed) if they still refer to it.
+
+A model can select from itself (e.g. an incremental model), but models
+that refer to each other in a longer cycle can't be ordered, so they're
+reported as problems rather than built.
+
+Validation checks that each table a model refers to is either another
+model or, given a ``Catalogue``, a table in it.
+"""
+
+import argparse
+import dataclasses
+import graphlib
+import hashlib
+import json
+import pathlib
+import tempfile
+import time
+from collections.abc import Sequence
+
+import sqlglot
+import sqlglot.errors
+from sqlglot import exp, serde
+
+from testing_sqlglot.catalogue import Catalogue
+
+STATE_FILE = "state.json"
+SUCCESS = 0
+FAILURE = 1
+
+
+@dataclasses.dataclass
+class Model:
+    path: str  # relative to the models directory
+    hash: str
+    refs: list[str]
+
+
+@dataclasses.dataclass
+class BuildResult:
+    built: list[str]
+    unchanged: int
+    problems: dict[str, list[str]]
+    seconds: float
+
+
+def _hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _refs(trees: list[exp.Expression]) -> list[str]:
+    """
+    Return the (bare) names of the tables the trees select from, other
+    than their CTEs.
+    """
+
+    refs = set()
+    for tree in trees:
+        ctes = {cte.alias for cte in tree.find_all(exp.CTE)}
+        refs.update(
+            table.name
+            for table in tree.find_all(exp.Table)
+            if table.name not in ctes
+        )
+
+    return sorted(refs)
+
+
+class ModelGraph:
+    """
+    The models in a directory, and the models that each refers to.
+
+    :param models_dir: The directory of models, searched recursively.
+    :param output_dir: Where to write the transpiled models, under the
+        same relative paths.
+    :param cache_dir: Where to keep the state and the parsed trees.
+    :param from_dialect: The dialect of the models.
+    :param to_dialect: The dialect to transpile to.
+    :param catalogue: The tables (other than the models) that the models
+        can refer to. Without one, any table is allowed.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        models_dir: pathlib.Path,
+        output_dir: pathlib.Path,
+        cache_dir: pathlib.Path,
+        *,
+        from_dialect: str = "tsql",
+        to_dialect: str = "postgres",
+        catalogue: Catalogue | None = None,
+    ) -> None:
+        self.models_dir = models_dir
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir
+        self.from_dialect = from_dialect
+        self.to_dialect = to_dialect
+        self.catalogue = catalogue
+        self.models: dict[str, Model] = {}
+        self.removed: set[str] = set()
+
+    @property
+    def _state_path(self) -> pathlib.Path:
+        return self.cache_dir / STATE_FILE
+
+    @property
+    def _key(self) -> str:
+        return f"{self.from_dialect}->{self.to_dialect} (sqlglot {sqlglot.__version__})"
+
+    def _load_state(self) -> tuple[dict[str, Model], set[str]]:
+        """
+        Return the models and the removed models from the last build.
+        """
+
+        try:
+            state = json.loads(self._state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}, set()
+        if state.get("key") != self._key:
+            return {}, set()
+
+        return (
+            {name: Model(**model) for name, model in state["models"].items()},
+            set(state.get("removed", [])),
+        )
+
+    def _save_state(self) -> None:
+        self._state_path.write_text(
+            json.dumps(
+                {
+                    "key": self._key,
+                    "models": {
+                        name: dataclasses.asdict(model)
+                        for name, model in self.models.items()
+                    },
+                    "removed": sorted(self.removed),
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+    def _trees(self, model: Model) -> list[exp.Expression]:
+        """
+        Return the model's parsed trees, from the cache if they're there.
+        """
+
+        cached = self.cache_dir / f"{model.hash}.json"
+        if cached.exists():
+            dumped = json.loads(cached.read_text(encoding="utf-8"))
+            return [serde.load(tree) for tree in dumped]
+
+        sql = (self.models_dir / model.path).read_text(encoding="utf-8")
+        trees = [
+            tree
+            for tree in sqlglot.parse(sql, read=self.from_dialect)
+            if tree is not None
+        ]
+        cached.write_text(
+            json.dumps([serde.dump(tree) for tree in trees]),
+            encoding="utf-8",
+        )
+
+        return trees
+
+    def _scan(self) -> tuple[set[str], dict[str, list[exp.Expression]]]:
+        """
+        Hash every model, and parse the new and changed ones. Return the
+        names of the models that changed (including removed ones) and the
+        trees that were parsed.
+        """
+
+        previous, removed = self._load_state()
+        self.models = {}
+        changed: set[str] = set()
+        parsed: dict[str, list[exp.Expression]] = {}
+        for path in sorted(self.models_dir.rglob("*.sql")):
+            name = path.stem
+            if name in self.models:
+                raise ValueError(
+                    f"Models {self.models[name].path} and {path} have the same name"
+                )
+            model = Model(
+                path.relative_to(self.models_dir).as_posix(),
+                _hash(path.read_bytes()),
+                [],
+            )
+            old = previous.get(name)
+            if old and old.hash == model.hash and old.path == model.path:
+                self.models[name] = old
+                continue
+            if old and old.path != model.path:
+                (self.output_dir / old.path).unlink(missing_ok=True)
+
+            changed.add(name)
+            self.models[name] = model
+            try:
+                parsed[name] = self._trees(model)
+            except sqlglot.errors.SqlglotError:
+                continue  # reported when the model is built
+            model.refs = _refs(parsed[name])
+
+        newly_removed = previous.keys() - self.models.keys()
+        for name in newly_removed:
+            (self.output_dir / previous[name].path).unlink(missing_ok=True)
+
+        # Keep the removed models that are still referred to, so that the
+        # models that refer to them keep failing
+        refs = {ref for model in self.models.values() for ref in model.refs}
+        self.removed = ((removed | newly_removed) - self.models.keys()) & refs
+
+        return changed | newly_removed, parsed
+
+    def dependants(self) -> dict[str, set[str]]:
+        """
+        Return the models that refer directly to each model.
+        """
+
+        dependants: dict[str, set[str]] = {name: set() for name in self.models}
+        for name, model in self.models.items():
+            for ref in model.refs:
+                dependants.setdefault(ref, set()).add(name)
+
+        return dependants
+
+    def downstream(self, names: set[str]) -> set[str]:
+        """
+        Return the models, and all of the models downstream of them.
+        """
+
+        dependants = self.dependants()
+        seen, stack = set(), list(names)
+        while stack:
+            name = stack.pop()
+            if name not in seen:
+                seen.add(name)
+                stack.extend(dependants.get(name, ()))
+
+        return seen & self.models.keys()
+
+    def _validate(self, name: str) -> list[str]:
+        problems = []
+        for ref in self.models[name].refs:
+            if ref in self.models:
+                continue
+            if ref in self.removed:
+                problems.append(f"Model '{ref}' was removed.")
+            elif self.catalogue is not None and ref not in self.catalogue:
+                problems.append(f"Table '{ref}' not found.")
+
+        return problems
+
+    def _build(
+        self, name: str, trees: list[exp.Expression] | None
+    ) -> list[str]:
+        """
+        Transpile and validate the model, and return its problems.
+        """
+
+        model = self.models[name]
+        try:
+            trees = self._trees(model) if trees is None else trees
+            sql = ";\n\n".join(
+                tree.sql(dialect=self.to_dialect, pretty=True) for tree in trees
+            )
+        except sqlglot.errors.SqlglotError as e:
+            return [str(e)]
+
+        target = self.output_dir / model.path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(sql, encoding="utf-8")
+
+        return self._validate(name)
+
+    def _order(self, names: set[str]) -> tuple[list[str], dict[str, list[str]]]:
+        """
+        Return the models in dependency order, and the problems of the
+        models in cycles (which are left out of the order).
+        """
+
+        graph = {
+            name: {
+                ref
+                for ref in self.models[name].refs
+                if ref in names
+                and ref != name  # a model can select from itself
+            }
+            for name in names
+        }
+        problems = {}
+        while True:
+            try:
+                return list(
+                    graphlib.TopologicalSorter(graph).static_order()
+                ), problems
+            except graphlib.CycleError as e:
+                cycle = e.args[1]
+                for name in cycle[:-1]:
+                    problems[name] = [
+                        f"Models form a cycle: {' -> '.join(cycle)}."
+                    ]
+                    graph.pop(name, None)
+                for refs in graph.values():
+                    refs.difference_update(cycle)
+
+    def build(self) -> BuildResult:
+        """
+        Transpile and validate the changed models and their dependants, in
+        dependency order.
+        """
+
+        start = time.perf_counter()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        changed, parsed = self._scan()
+        affected = self.downstream(changed)
+
+        order, problems = self._order(affected)
+        built = []
+        for name in order:
+            built.append(name)
+            if model_problems := self._build(name, parsed.get(name)):
+                problems[name] = model_problems
+
+        # A model that failed is built again on the next run
+        for name in problems:
+            self.models[name].hash = ""
+        self._save_state()
+
+        return BuildResult(
+            built,
+            len(self.models) - len(built),
+            problems,
+            time.perf_counter() - start,
+        )
+
+
+def _write_models(models_dir: pathlib.Path, count: int) -> None:
+    """
+    Write a chain of models, each selecting from a source and the model
+    ten before it.
+    """
+
+    for i in range(count):
+        upstream = f"model_{i - 10}" if i >= 10 else "source_table"  # noqa: PLR2004
+        path = models_dir / f"group_{i % 20}" / f"model_{i}.sql"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            f"SELECT TOP 100 a.id, b.value, GETDATE() AS loaded_at\n"
+            f"FROM {upstream} AS a\n"
+            f"INNER JOIN source_values AS b ON a.id = b.id\n"
+            f"WHERE DATEDIFF(DAY, b.created_at, GETDATE()) < {i}",
+            encoding="utf-8",
+        )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Build a project of generated models, then build it again after
+    changing one model.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=2_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        _write_models(root / "models", args.models)
+        graph = ModelGraph(root / "models", root / "output", root / "cache")
+
+        for label in ("first build", "no changes", "one change"):
+            if label == "one change":
+                changed = (
+                    root
+                    / "models"
+                    / "group_0"
+                    / f"model_{args.models - 20}.sql"
+                )
+                changed.write_text(
+                    changed.read_text(encoding="utf-8") + " AND a.id > 0",
+                    encoding="utf-8",
+                )
+            result = graph.build()
+            print(
+                f"{label:<12} built {len(result.built):>5,} models "
+                f"({result.unchanged:,} unchanged) in {result.seconds:.2f}s"
+            )
+
+    return FAILURE if result.problems else SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
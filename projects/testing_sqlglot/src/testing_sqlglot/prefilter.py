@@ -0,0 +1,603 @@
+"""
+Validate queries in tiers, only parsing them when a cheap check can't
+decide.
+
+Most generated queries are simple and valid, but ``QueryValidator`` still
+parses and qualifies every new one. The first tier here only tokenizes the
+query (which is several times faster than parsing it), picks out the
+tables in the ``FROM`` and ``JOIN`` clauses and the other identifiers,
+and checks them against the catalogue's sets:
+
+- if every table and column is known, the query is valid
+- if a table or a qualified column isn't known, the query is invalid
+
+A query is passed on to the second tier, the full qualification, when the
+tokens alone can't tell, e.g.:
+
+- it has a CTE, a subquery, or a set operation (more than one ``select``)
+- it has a token that the first tier doesn't understand (which includes
+  keywords that can be used as names, like ``date``)
+- it has an identifier that is neither a known column nor an alias, or
+  an unqualified column that more than one of its tables has (counting
+  a table joined to itself twice)
+- it has a ``using`` column that isn't in both sides of its join
+- its clauses aren't a ``select`` list followed by ``from``, ``where``,
+  ``group by``, ``having``, ``order by``, and ``limit`` (in that order,
+  each optional and with a body), or a clause's body isn't a well-formed
+  list of expressions (e.g. a keyword or a dangling operator where a
+  column should be, or unbalanced parentheses)
+
+so malformed queries are left for the parser to reject.
+
+The benchmark reports the latency of each tier, and of the two together,
+for a mix of queries:
+
+    python -m testing_sqlglot.prefilter
+"""
+
+import dataclasses
+import random
+import statistics
+import time
+from collections.abc import Callable, Iterable
+from typing import Literal
+
+import duckdb
+import sqlglot.errors
+from sqlglot.dialects.dialect import Dialect
+from sqlglot.tokens import Token, TokenType
+
+from testing_sqlglot.catalogue import Catalogue
+from testing_sqlglot.query_validator import DEFAULT_CACHE_SIZE, QueryValidator
+from testing_sqlglot.validate_llm_sql import SQL_DIALECT
+
+Tier = Literal["tokens", "qualify"]
+
+NAMES = {TokenType.VAR, TokenType.IDENTIFIER}
+TABLE_CLAUSES = {TokenType.FROM, TokenType.JOIN}
+# The other tokens that the first tier understands
+KNOWN_TOKENS = {
+    *NAMES,
+    *TABLE_CLAUSES,
+    TokenType.ALIAS,
+    TokenType.ALL,
+    TokenType.AND,
+    TokenType.ASC,
+    TokenType.BETWEEN,
+    TokenType.COMMA,
+    TokenType.CROSS,
+    TokenType.DASH,
+    TokenType.DESC,
+    TokenType.DISTINCT,
+    TokenType.DOT,
+    TokenType.EQ,
+    TokenType.FALSE,
+    TokenType.FULL,
+    TokenType.GROUP_BY,
+    TokenType.GT,
+    TokenType.GTE,
+    TokenType.HAVING,
+    TokenType.IN,
+    TokenType.INNER,
+    TokenType.IS,
+    TokenType.L_PAREN,
+    TokenType.LEFT,
+    TokenType.LIKE,
+    TokenType.LIMIT,
+    TokenType.LT,
+    TokenType.LTE,
+    TokenType.NEQ,
+    TokenType.NOT,
+    TokenType.NULL,
+    TokenType.NUMBER,
+    TokenType.ON,
+    TokenType.OR,
+    TokenType.ORDER_BY,
+    TokenType.OUTER,
+    TokenType.PLUS,
+    TokenType.R_PAREN,
+    TokenType.RIGHT,
+    TokenType.SELECT,
+    TokenType.SEMICOLON,
+    TokenType.SLASH,
+    TokenType.STAR,
+    TokenType.STRING,
+    TokenType.TRUE,
+    TokenType.USING,
+    TokenType.WHERE,
+}
+# Where a list of tables (``from a, b``) ends
+END_OF_TABLES = KNOWN_TOKENS - NAMES - {TokenType.COMMA, TokenType.DOT}
+NULL_ORDERING = {"nulls", "first", "last"}
+
+# The clauses that the first tier understands, in the order they must be in
+CLAUSES = [
+    TokenType.SELECT,
+    TokenType.FROM,
+    TokenType.WHERE,
+    TokenType.GROUP_BY,
+    TokenType.HAVING,
+    TokenType.ORDER_BY,
+    TokenType.LIMIT,
+]
+# In an expression: the tokens that are (or start) an operand, and the
+# tokens that can follow an operand
+OPERANDS = {
+    *NAMES,
+    TokenType.ALL,
+    TokenType.FALSE,
+    TokenType.NULL,
+    TokenType.NUMBER,
+    TokenType.STAR,
+    TokenType.STRING,
+    TokenType.TRUE,
+}
+PREFIXES = {
+    TokenType.DASH,
+    TokenType.DISTINCT,
+    TokenType.L_PAREN,
+    TokenType.NOT,
+}
+OPERATORS = {
+    TokenType.AND,
+    TokenType.BETWEEN,
+    TokenType.COMMA,
+    TokenType.DASH,
+    TokenType.DOT,
+    TokenType.EQ,
+    TokenType.GT,
+    TokenType.GTE,
+    TokenType.IN,
+    TokenType.IS,
+    TokenType.LIKE,
+    TokenType.LT,
+    TokenType.LTE,
+    TokenType.NEQ,
+    TokenType.NOT,
+    TokenType.OR,
+    TokenType.PLUS,
+    TokenType.SLASH,
+    TokenType.STAR,
+}
+SUFFIXES = {TokenType.ASC, TokenType.DESC, TokenType.R_PAREN}
+# Where an ``on`` (or ``using``) condition in the ``from`` clause ends
+JOIN_TOKENS = {
+    TokenType.CROSS,
+    TokenType.FULL,
+    TokenType.INNER,
+    TokenType.JOIN,
+    TokenType.LEFT,
+    TokenType.OUTER,
+    TokenType.RIGHT,
+}
+
+
+class _Ambiguous(Exception):  # noqa: N818
+    """
+    Raised when the tokens alone can't decide whether the query is valid.
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class TieredResult:
+    sql: str
+    tier: Tier
+    problems: list[str]
+
+    @property
+    def valid(self) -> bool:
+        return not self.problems
+
+
+class _Expression:
+    """
+    Check that a clause's expressions are well formed: that an operand
+    comes wherever one is needed, so that a keyword or a dangling
+    operator can't sit where a column should be.
+    """
+
+    def __init__(self) -> None:
+        self.expect_operand = True
+        self.previous: TokenType | None = None
+
+    def add(self, token_type: TokenType) -> None:
+        if self.expect_operand:
+            if token_type in OPERANDS:
+                self.expect_operand = False
+            elif token_type == TokenType.R_PAREN and (
+                self.previous == TokenType.L_PAREN
+            ):
+                self.expect_operand = False  # a call with no arguments
+            elif token_type not in PREFIXES:
+                raise _Ambiguous
+        elif token_type in OPERATORS or token_type == TokenType.L_PAREN:
+            self.expect_operand = True
+        elif token_type == TokenType.ALIAS:
+            self.expect_operand = True  # the alias's name
+        elif token_type not in SUFFIXES and token_type not in NAMES:
+            raise _Ambiguous  # (names here are aliases, or ``nulls last``)
+        self.previous = token_type
+
+    def end(self) -> None:
+        if self.expect_operand:
+            raise _Ambiguous  # an empty clause, or a dangling operator
+
+
+def _clauses(tokens: list[Token]) -> list[tuple[TokenType, list[TokenType]]]:
+    """
+    Split the query's tokens into its clauses and their bodies, checking
+    that the clauses are in order and the parentheses are balanced.
+    """
+
+    if tokens and tokens[-1].token_type == TokenType.SEMICOLON:
+        tokens = tokens[:-1]
+    if not tokens or tokens[0].token_type != TokenType.SELECT:
+        raise _Ambiguous
+
+    clauses: list[tuple[TokenType, list[TokenType]]] = []
+    depth = 0
+    for token in tokens:
+        token_type = token.token_type
+        if depth == 0 and token_type in CLAUSES:
+            if clauses and CLAUSES.index(token_type) <= CLAUSES.index(
+                clauses[-1][0]
+            ):
+                raise _Ambiguous  # out of order, or repeated
+            clauses.append((token_type, []))
+            continue
+
+        clauses[-1][1].append(token_type)
+        if token_type == TokenType.L_PAREN:
+            depth += 1
+        elif token_type == TokenType.R_PAREN:
+            depth -= 1
+            if depth < 0:
+                raise _Ambiguous
+    if depth != 0:
+        raise _Ambiguous
+
+    return clauses
+
+
+def _check_from(body: list[TokenType]) -> None:
+    """
+    Check the join conditions in a ``from`` clause; the tables themselves
+    are read by ``_TokenCheck._table``.
+    """
+
+    expression = None
+    depth = 0
+    for token_type in body:
+        if depth == 0 and token_type in JOIN_TOKENS:
+            if expression is not None:
+                expression.end()
+            expression = None
+        elif token_type in {TokenType.ON, TokenType.USING}:
+            expression = _Expression()
+            continue
+        elif expression is not None:
+            expression.add(token_type)
+        depth += (token_type == TokenType.L_PAREN) - (
+            token_type == TokenType.R_PAREN
+        )
+    if expression is not None:
+        expression.end()
+
+
+def _check_clauses(tokens: list[Token]) -> None:
+    """
+    Check that the query is a ``select`` with its clauses in order, each
+    with a well-formed body, raising ``_Ambiguous`` if not, so that
+    qualifying it decides.
+    """
+
+    for clause, body in _clauses(tokens):
+        if not body:
+            raise _Ambiguous  # an empty clause
+        if clause == TokenType.FROM:
+            _check_from(body)
+        elif clause == TokenType.LIMIT:
+            if body != [TokenType.NUMBER]:
+                raise _Ambiguous
+        else:
+            expression = _Expression()
+            for token_type in body:
+                expression.add(token_type)
+            expression.end()
+
+
+def _name(token: Token) -> str:
+    # DuckDB's names are case-insensitive, quoted or not, and the catalogue
+    # stores them casefolded
+    return token.text.casefold()
+
+
+class _TokenCheck:
+    """
+    Check one query's tokens against the catalogue.
+    """
+
+    def __init__(self, catalogue: Catalogue, tokens: list[Token]) -> None:
+        self.catalogue = catalogue
+        self.tokens = tokens
+        self.tables: dict[str, str | None] = {}  # alias -> qualified name
+        self.missing: list[str] = []
+        self.aliases: set[str] = set()
+        self.columns: list[tuple[str | None, str]] = []
+        self.using: set[str] = set()
+
+    def _type(self, i: int) -> TokenType | None:
+        return self.tokens[i].token_type if i < len(self.tokens) else None
+
+    def _table(self, i: int) -> int:
+        """
+        Read the table (and its alias) starting at ``i``, and return the
+        index after it.
+        """
+
+        if self._type(i) not in NAMES:
+            raise _Ambiguous  # e.g. a subquery
+        parts = [_name(self.tokens[i])]
+        i += 1
+        while self._type(i) == TokenType.DOT and self._type(i + 1) in NAMES:
+            parts.append(_name(self.tokens[i + 1]))
+            i += 2
+        if self._type(i) == TokenType.L_PAREN or len(parts) > 2:  # noqa: PLR2004
+            raise _Ambiguous  # a table function, or a database name
+
+        table = ".".join(parts)
+        alias = parts[-1]
+        if self._type(i) == TokenType.ALIAS:
+            i += 1
+        if self._type(i) in NAMES:
+            alias = _name(self.tokens[i])
+            i += 1
+        if alias in self.tables:
+            raise _Ambiguous  # a duplicate alias
+        self.tables[alias] = self.catalogue.resolve(table)
+        if self.tables[alias] is None:
+            self.missing.append(table)
+
+        return i
+
+    def _identifier(self, i: int) -> int:  # noqa: PLR0911
+        """
+        Read the name (a column, a qualified column, an alias, or a
+        function) at ``i``, and return the index after it.
+        """
+
+        name = _name(self.tokens[i])
+        if self._type(i + 1) == TokenType.L_PAREN:
+            return i + 1  # a function
+        if self._type(i - 1) == TokenType.ALIAS:
+            self.aliases.add(name)
+            return i + 1
+        if name == "nulls" and self._type(i - 1) in {
+            TokenType.ASC,
+            TokenType.DESC,
+            *NAMES,
+        }:
+            following = self.tokens[i + 1] if i + 1 < len(self.tokens) else None
+            if following and _name(following) in NULL_ORDERING:
+                return i + 2
+            return i + 1
+
+        if self._type(i + 1) != TokenType.DOT:
+            self.columns.append((None, name))
+            return i + 1
+        if self._type(i + 2) == TokenType.STAR:
+            self.columns.append((name, "*"))
+            return i + 3
+        if self._type(i + 2) not in NAMES or self._type(i + 3) == TokenType.DOT:
+            raise _Ambiguous  # e.g. a struct field
+        self.columns.append((name, _name(self.tokens[i + 2])))
+
+        return i + 3
+
+    def _using(self, i: int) -> int:
+        """
+        Read the columns of a ``using`` condition starting at ``i`` (its
+        opening parenthesis), and return the index after it.
+
+        Each column must be in the joined table and in exactly one of the
+        tables before it, or qualifying the query decides.
+        """
+
+        *left, right = self.tables.values()
+        if right is None or None in left:
+            raise _Ambiguous  # the columns of an unknown table are unknown
+        if self._type(i) != TokenType.L_PAREN:
+            raise _Ambiguous
+        i += 1
+        while self._type(i) in NAMES:
+            column = _name(self.tokens[i])
+            if column not in self.catalogue.tables[right] or (
+                sum(column in self.catalogue.tables[t] for t in left) != 1
+            ):
+                raise _Ambiguous
+            self.using.add(column)
+            i += 1
+            if self._type(i) != TokenType.COMMA:
+                break
+            i += 1
+        if self._type(i) != TokenType.R_PAREN:
+            raise _Ambiguous
+
+        return i + 1
+
+    def run(self) -> list[str]:
+        _check_clauses(self.tokens)
+        selects = 0
+        in_tables = False
+        i = 0
+        while i < len(self.tokens):
+            token_type = self.tokens[i].token_type
+            if token_type not in KNOWN_TOKENS:
+                raise _Ambiguous
+            if token_type == TokenType.SELECT:
+                selects += 1
+                if selects > 1:
+                    raise _Ambiguous
+            if token_type in TABLE_CLAUSES:
+                in_tables = token_type == TokenType.FROM
+                i = self._table(i + 1)
+            elif in_tables and token_type == TokenType.COMMA:
+                i = self._table(i + 1)
+            elif token_type == TokenType.USING:
+                i = self._using(i + 1)
+            elif token_type in NAMES:
+                i = self._identifier(i)
+            else:
+                in_tables = in_tables and token_type not in END_OF_TABLES
+                i += 1
+
+        return self._problems()
+
+    def _problems(self) -> list[str]:
+        problems = [f"Table '{table}' not found." for table in self.missing]
+        # Per alias, so a table joined to itself counts twice
+        known = [self.catalogue.tables[t] for t in self.tables.values() if t]
+        for qualifier, column in self.columns:
+            if qualifier is None:
+                if column in self.aliases:
+                    continue
+                # A ``using`` column is in (at least) both of the joined
+                # tables. Any other is ambiguous if it's in more than one
+                tables = sum(column in columns for columns in known)
+                if tables != 1 and not (column in self.using and tables > 1):
+                    raise _Ambiguous
+            elif qualifier not in self.tables:
+                raise _Ambiguous
+            elif (table := self.tables[qualifier]) and column != "*":
+                if column not in self.catalogue.tables[table]:
+                    problems.append(
+                        f"Column '{column}' not found in table '{table}'."
+                    )
+
+        return problems
+
+
+class TieredValidator:
+    """
+    Validate queries against a catalogue, by their tokens if possible and
+    by qualifying them if not.
+
+    :param catalogue: The known tables and columns.
+    :param dialect: The dialect of the queries.
+    :param cache_size: The most qualified trees to keep, for the second
+        tier.
+    """
+
+    def __init__(
+        self,
+        catalogue: Catalogue,
+        dialect: str = SQL_DIALECT,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.catalogue = catalogue
+        self.dialect = Dialect.get_or_raise(dialect)
+        self.qualifier = QueryValidator(catalogue, dialect, cache_size)
+
+    def prefilter(self, sql: str) -> list[str] | None:
+        """
+        Return the problems with the query found from its tokens alone, or
+        ``None`` if the tokens can't decide.
+        """
+
+        try:
+            tokens = self.dialect.tokenize(sql)
+            return _TokenCheck(self.catalogue, tokens).run()
+        except (_Ambiguous, sqlglot.errors.TokenError):
+            return None
+
+    def qualify(self, sql: str) -> list[str]:
+        """
+        Return the problems with the query found by qualifying it.
+        """
+
+        try:
+            return self.qualifier.unresolved(sql)
+        except sqlglot.errors.SqlglotError as e:
+            return [str(e)]
+
+    def validate(self, sql: str) -> TieredResult:
+        problems = self.prefilter(sql)
+        if problems is not None:
+            return TieredResult(sql, "tokens", problems)
+
+        return TieredResult(sql, "qualify", self.qualify(sql))
+
+    def validate_many(self, sqls: Iterable[str]) -> list[TieredResult]:
+        return [self.validate(sql) for sql in sqls]
+
+
+def _queries(count: int, seed: int = 42) -> list[str]:
+    """
+    Return a mix of simple valid, invalid, and more complex queries, each
+    one different (so that the qualified trees aren't cached).
+    """
+
+    rng = random.Random(seed)  # noqa: S311
+    templates = [
+        "select payments.amount, users.user_name from payments left join users using (user_id) where payments.amount > {n}",
+        "select payment_id, amount from payments where user_id = {n} order by amount desc nulls last",
+        "select p.payment_id, u.user_name from payments as p inner join users as u on p.user_id = u.user_id limit {n}",
+        "select customers.customer_id from customers where customers.id = {n}",
+        "select payments.total from payments where payments.user_id = {n}",
+        "with big as (select * from payments where amount > {n}) select big.user_id, count(*) from big group by all",
+    ]
+    weights = [30, 30, 20, 5, 5, 10]
+
+    return [
+        rng.choices(templates, weights)[0].format(n=n) for n in range(count)
+    ]
+
+
+def _latencies(
+    func: Callable[[str], object],
+    queries: list[str],
+) -> list[float]:
+    latencies = []
+    for sql in queries:
+        start = time.perf_counter()
+        func(sql)
+        latencies.append(1_000 * (time.perf_counter() - start))
+
+    return latencies
+
+
+def main(count: int = 2_000) -> None:
+    """
+    Time each tier, and the two together, on a mix of queries.
+    """
+
+    conn = duckdb.connect()
+    conn.execute(
+        """
+        create table users (user_id integer, user_name text);
+        create table payments (
+            payment_id integer,
+            user_id integer,
+            amount numeric(12, 2),
+        );
+        """
+    )
+    validator = TieredValidator(Catalogue.from_duckdb(conn), cache_size=0)
+    queries = _queries(count)
+
+    decided = sum(validator.prefilter(sql) is not None for sql in queries)
+    print(f"{decided:,} of {count:,} queries decided from their tokens")
+    print(f"{'tier':<10}{'p50':>10}{'p99':>10}")
+    for tier, func in [
+        ("tokens", validator.prefilter),
+        ("qualify", validator.qualify),
+        ("tiered", validator.validate),
+    ]:
+        percentiles = statistics.quantiles(
+            _latencies(func, queries), n=100, method="inclusive"
+        )
+        print(f"{tier:<10}{percentiles[49]:>8.3f}ms{percentiles[98]:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
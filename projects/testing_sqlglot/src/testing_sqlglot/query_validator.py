@@ -0,0 +1,340 @@
+"""
+Validate many generated SQL queries against the known tables and columns.
+
+``validate_llm_sql`` parses and qualifies each query every time, then
+walks the tree twice (once for the tables, once for the columns). Here:
+
+- the qualified trees are kept in an LRU cache, keyed by the normalised
+  SQL (the dialect's tokens, with the comments dropped, the whitespace
+  collapsed, and the case folded outside of quoted strings and
+  identifiers), so repeated queries are only parsed once. Queries that
+  fail to parse or qualify are cached too, as their errors
+- the tables and columns are collected in a single pass over the tree's
+  scopes
+- ``validate_many`` validates a batch of queries, returning a result per
+  query rather than raising on the first invalid one
+
+Unlike ``get_query_objects``, table aliases and CTEs are resolved, so
+``from payments as p`` is checked as ``payments`` and a CTE isn't
+mistaken for a table. Aliases are resolved in their own scope, so a
+subquery can reuse an outer query's alias.
+
+With a ``Catalogue``, the queries are qualified against its schema, so
+stars are expanded and unqualified columns are resolved to their tables
+while qualifying. Qualification doesn't stop at the first column that it
+can't resolve, and every unknown table and column in a query is reported
+together.
+
+The cached trees are shared, so treat them as read-only.
+"""
+
+import dataclasses
+import functools
+from collections.abc import Iterable
+
+import duckdb
+import sqlglot
+import sqlglot.errors
+import sqlglot.optimizer.qualify
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect
+from sqlglot.optimizer.scope import Scope, traverse_scope
+from sqlglot.tokens import TokenType
+
+from testing_sqlglot.catalogue import Catalogue
+from testing_sqlglot.validate_llm_sql import (
+    INVALID_SQL,
+    SQL_DIALECT,
+    VALID_SQL,
+    ObjectNotFoundError,
+    TableColumns,
+    validate_query_objects,
+)
+
+DEFAULT_CACHE_SIZE = 1_024
+# The tokens whose case matters
+QUOTED = frozenset(
+    {
+        TokenType.IDENTIFIER,  # a quoted identifier, unlike ``VAR``
+        TokenType.STRING,
+        TokenType.NATIONAL_STRING,
+        TokenType.RAW_STRING,
+        TokenType.NATIONAL_RAW_STRING,
+        TokenType.HEREDOC_STRING,
+        TokenType.UNICODE_STRING,
+        TokenType.BIT_STRING,
+        TokenType.BYTE_STRING,
+        TokenType.HEX_STRING,
+    }
+)
+
+
+def normalise(sql: str, dialect: str = SQL_DIALECT) -> str:
+    """
+    Return the SQL without its comments, with its whitespace collapsed and
+    its case folded, but with its quoted strings and identifiers left as
+    they are.
+
+    The SQL is split into the dialect's tokens, so a comment can't hide
+    the rest of the query (as ``--`` would once the newlines are gone).
+    """
+
+    tokens = Dialect.get_or_raise(dialect).tokenize(sql)
+    while tokens and tokens[-1].token_type == TokenType.SEMICOLON:
+        tokens.pop()
+
+    parts = []
+    end = None
+    for token in tokens:
+        # Keep the tokens apart where they were, e.g. by a comment
+        if end is not None and token.start > end + 1:
+            parts.append(" ")
+        text = sql[token.start : token.end + 1]
+        parts.append(text if token.token_type in QUOTED else text.casefold())
+        end = token.end
+
+    return "".join(parts)
+
+
+def _source(scope: Scope, alias: str) -> exp.Table | Scope | None:
+    """
+    Return what the alias refers to in the scope, looking in the outer
+    scopes for correlated columns.
+    """
+
+    while scope is not None:
+        if alias in scope.sources:
+            return scope.sources[alias]
+        scope = scope.parent
+
+    return None
+
+
+def _table_name(table: exp.Table) -> str:
+    return f"{table.db}.{table.name}" if table.db else table.name
+
+
+def _walk(tree: exp.Expression) -> tuple[TableColumns, list[str]]:
+    """
+    Return the source tables and their columns in a qualified tree, and the
+    columns that couldn't be qualified, in a single pass over its scopes.
+    """
+
+    query_objects: TableColumns = {}
+    unresolved: list[str] = []
+    for scope in traverse_scope(tree):
+        # CTEs and subqueries are sources too, but as scopes, not tables
+        for source in scope.sources.values():
+            if isinstance(source, exp.Table):
+                query_objects.setdefault(_table_name(source), set())
+
+        projections = {
+            select.alias
+            for select in getattr(scope.expression, "selects", [])
+            if isinstance(select, exp.Alias)
+        }
+        for column in scope.columns:
+            if isinstance(column.this, exp.Star):
+                continue
+            if not column.table:
+                # ORDER BY can refer to the projections by their aliases
+                if not (
+                    column.name in projections
+                    and column.find_ancestor(exp.Order)
+                ):
+                    unresolved.append(column.name)
+                continue
+
+            source = _source(scope, column.table)
+            if isinstance(source, exp.Table):
+                query_objects[_table_name(source)].add(column.name)
+
+    return query_objects, unresolved
+
+
+def extract_objects(tree: exp.Expression) -> TableColumns:
+    """
+    Return the source tables and their columns in a qualified tree. Tables
+    written with their schema are keyed by ``schema.table``.
+    """
+
+    return _walk(tree)[0]
+
+
+@dataclasses.dataclass(frozen=True)
+class ValidationResult:
+    sql: str
+    objects: TableColumns | None
+    error: str | None = None
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None
+
+
+class QueryValidator:
+    """
+    Validate queries against the known tables and columns, caching the
+    parsed queries.
+
+    :param known_objects: The known tables and their columns, e.g. from
+        ``get_information_schema_objects``, or a ``Catalogue``.
+    :param dialect: The dialect of the queries.
+    :param cache_size: The most qualified trees to keep.
+    """
+
+    def __init__(
+        self,
+        known_objects: TableColumns | Catalogue,
+        dialect: str = SQL_DIALECT,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.known_objects = known_objects
+        self.catalogue = (
+            known_objects if isinstance(known_objects, Catalogue) else None
+        )
+        self.dialect = dialect
+        self._qualified = functools.lru_cache(cache_size)(self._qualify)
+
+    def _set_schemas(self, tree: exp.Expression) -> None:
+        """
+        Set the schema of each table written without one to the schema the
+        catalogue finds it in.
+        """
+
+        ctes = {cte.alias for cte in tree.find_all(exp.CTE)}
+        for table in tree.find_all(exp.Table):
+            if table.db or table.name in ctes:
+                continue
+            qualified = self.catalogue.resolve(table.name)
+            if qualified:
+                schema = qualified.rpartition(".")[0]
+                table.set("db", exp.to_identifier(schema))
+
+    def _qualify(
+        self,
+        normalised_sql: str,
+        catalogue_version: int,  # part of the cache key
+    ) -> exp.Expression | sqlglot.errors.SqlglotError:
+        try:
+            tree = sqlglot.parse_one(normalised_sql, read=self.dialect)
+            if self.catalogue is None:
+                return sqlglot.optimizer.qualify.qualify(
+                    tree, dialect=self.dialect
+                )
+
+            self._set_schemas(tree)
+            return sqlglot.optimizer.qualify.qualify(
+                tree,
+                schema=self.catalogue.mapping_schema(),
+                dialect=self.dialect,
+                validate_qualify_columns=False,
+                allow_partial_qualification=True,
+            )
+        except sqlglot.errors.SqlglotError as e:
+            return e
+
+    def qualified(self, sql: str) -> exp.Expression:
+        """
+        Return the query's qualified tree, from the cache if it's there.
+        """
+
+        version = self.catalogue.version if self.catalogue else 0
+        qualified = self._qualified(normalise(sql, self.dialect), version)
+        if isinstance(qualified, sqlglot.errors.SqlglotError):
+            raise qualified.with_traceback(None)
+        return qualified
+
+    def query_objects(self, sql: str) -> TableColumns:
+        """
+        Return the source tables and columns in the query.
+        """
+
+        return extract_objects(self.qualified(sql))
+
+    def _check(self, tree: exp.Expression) -> tuple[TableColumns, list[str]]:
+        objects, unqualified = _walk(tree)
+        if self.catalogue is None:
+            try:
+                validate_query_objects(self.known_objects, objects)
+            except ObjectNotFoundError as e:
+                return objects, [str(e)]
+            return objects, []
+
+        return objects, [
+            *self.catalogue.unresolved(objects),
+            *(
+                f"Column '{column}' could not be resolved."
+                for column in unqualified
+            ),
+        ]
+
+    def unresolved(self, sql: str) -> list[str]:
+        """
+        Return every table and column in the query that isn't known. Without
+        a catalogue, only the first is returned.
+        """
+
+        return self._check(self.qualified(sql))[1]
+
+    def validate(self, sql: str) -> None:
+        """
+        Validate that the query's objects exist, raising
+        ``ObjectNotFoundError`` (listing the unknown ones) if not.
+        """
+
+        problems = self.unresolved(sql)
+        if problems:
+            raise ObjectNotFoundError("\n".join(problems))
+
+    def validate_many(self, sqls: Iterable[str]) -> list[ValidationResult]:
+        """
+        Validate each query, returning a result for each (in order) with
+        the reason that it's invalid, if it is.
+        """
+
+        results = []
+        for sql in sqls:
+            try:
+                tree = self.qualified(sql)
+            except sqlglot.errors.SqlglotError as e:
+                results.append(ValidationResult(sql, None, str(e)))
+                continue
+
+            objects, problems = self._check(tree)
+            results.append(
+                ValidationResult(sql, objects, "\n".join(problems) or None)
+            )
+
+        return results
+
+    def cache_info(self) -> functools._CacheInfo:
+        return self._qualified.cache_info()
+
+
+def main() -> None:
+    """
+    Validate a batch of "LLM-generated" queries, some of them repeated,
+    against a catalogue of the DuckDB objects.
+    """
+
+    conn = duckdb.connect()
+    conn.execute(
+        """
+        create table users (user_id integer, user_name text);
+        create table payments (
+            payment_id integer,
+            user_id integer,
+            amount numeric(12, 2),
+        );
+        """
+    )
+    validator = QueryValidator(Catalogue.from_duckdb(conn))
+    queries = [VALID_SQL, INVALID_SQL, VALID_SQL.upper(), "select (1 from"]
+    for result in validator.validate_many(queries * 25)[: len(queries)]:
+        print(result.error or "valid")
+    print(validator.cache_info())
+
+
+if __name__ == "__main__":
+    main()
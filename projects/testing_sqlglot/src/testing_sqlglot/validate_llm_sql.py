@@ -101,11 +101,11 @@ def validate_query_objects(
     Validate that the query objects exist in the catalogue.
     """
 
-    known_tables = list(known_objects)
     for table, columns in query_objects.items():
-        if table not in known_tables:
+        if table not in known_objects:
             raise ObjectNotFoundError(
-                f"Table '{table}' not found.\nKnown tables are: {known_tables}"
+                f"Table '{table}' not found.\n"
+                f"Known tables are: {list(known_objects)}"
             )
 
         known_columns = known_objects[table]
@@ -0,0 +1,182 @@
+import json
+
+import duckdb
+import pytest
+from testing_sqlglot import catalogue, query_validator
+from testing_sqlglot.validate_llm_sql import ObjectNotFoundError
+
+
+def test__catalogue_from_duckdb_refreshes_incrementally():
+    conn = duckdb.connect()
+    conn.execute(
+        """
+        create schema finance;
+        create table users (user_id integer, user_name text);
+        create table finance.payments (payment_id integer, Amount numeric);
+        """
+    )
+    catalogue_ = catalogue.Catalogue.from_duckdb(conn)
+
+    assert catalogue_.tables == {
+        "main.users": {"user_id", "user_name"},
+        "finance.payments": {"payment_id", "amount"},
+    }
+    assert catalogue_.resolve("PAYMENTS") == "finance.payments"
+
+    conn.execute(
+        """
+        alter table users add column email text;
+        drop table finance.payments;
+        create table finance.users (user_id integer);
+        """
+    )
+
+    assert catalogue_.refresh() == {
+        "main.users",
+        "finance.payments",
+        "finance.users",
+    }
+    assert catalogue_.refresh() == set()
+    assert catalogue_.resolve("users") == "main.users"
+    assert "email" in catalogue_.tables["main.users"]
+    assert "payments" not in catalogue_
+
+
+@pytest.mark.parametrize("max_filtered_tables", [0, 256])
+def test__duckdb_source_reads_only_the_requested_tables(
+    monkeypatch, max_filtered_tables
+):
+    monkeypatch.setattr(catalogue, "MAX_FILTERED_TABLES", max_filtered_tables)
+    conn = duckdb.connect()
+    conn.execute(
+        """
+        create table users (user_id integer, user_name text);
+        create table payments (payment_id integer);
+        """
+    )
+
+    assert catalogue.DuckDBSource(conn).columns(
+        ["main.users", "main.missing"]
+    ) == {"main.users": {"user_id", "user_name"}, "main.missing": set()}
+
+
+def test__catalogue_from_manifest_validates_queries(tmp_path):
+    manifest = {
+        "nodes": {
+            "model.shop.orders": {
+                "resource_type": "model",
+                "name": "orders",
+                "alias": "orders",
+                "schema": "analytics",
+                "checksum": {"name": "sha256", "checksum": "abc"},
+                "columns": {"order_id": {}, "amount": {}},
+            },
+            "test.shop.not_null": {"resource_type": "test", "name": "x"},
+        },
+        "sources": {
+            "source.shop.raw.customers": {
+                "name": "customers",
+                "identifier": "customers",
+                "schema": "raw",
+                "columns": {"customer_id": {}},
+            },
+        },
+    }
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(manifest))
+    validator = query_validator.QueryValidator(
+        catalogue.Catalogue.from_manifest(path)
+    )
+
+    validator.validate(
+        """
+        select orders.amount, c.customer_id
+        from analytics.orders
+            inner join raw.customers as c
+                on orders.order_id = c.customer_id
+        """
+    )
+    with pytest.raises(ObjectNotFoundError):
+        validator.validate("select orders.total from orders")
+
+
+def test__validator_with_catalogue_reports_every_unresolved_reference():
+    conn = duckdb.connect()
+    conn.execute(
+        """
+        create table users (user_id integer, user_name text);
+        create table payments (payment_id integer, user_id integer);
+        """
+    )
+    catalogue_ = catalogue.Catalogue.from_duckdb(conn)
+    validator = query_validator.QueryValidator(catalogue_)
+
+    assert validator.query_objects("select * from users") == {
+        "main.users": {"user_id", "user_name"}
+    }
+    assert validator.unresolved(
+        """
+        select customer_id, payments.amount, user_name as name
+        from payments
+            inner join users using (user_id)
+            inner join customers using (user_id)
+        order by name
+        """
+    ) == [
+        "Column 'amount' not found in table 'main.payments'.",
+        "Table 'customers' not found.",
+        "Column 'customer_id' could not be resolved.",
+    ]
+
+    conn.execute("alter table payments add column amount numeric")
+    catalogue_.refresh()
+    assert validator.unresolved("select amount from payments") == []
+
+
+def test__validator_with_catalogue_resolves_aliases_per_scope():
+    conn = duckdb.connect()
+    conn.execute(
+        """
+        create table users (user_id integer, user_name text);
+        create table payments (payment_id integer, amount numeric);
+        """
+    )
+    validator = query_validator.QueryValidator(
+        catalogue.Catalogue.from_duckdb(conn)
+    )
+
+    assert validator.unresolved(
+        """
+        select 1
+        from nonexistent as t
+        where exists (select 1 from users as t)
+        """
+    ) == ["Table 'nonexistent' not found."]
+    assert (
+        validator.unresolved(
+            """
+            select t.user_name
+            from users as t
+            where exists (select 1 from payments as t where t.amount > 0)
+            """
+        )
+        == []
+    )
+
+
+def test__validator_with_catalogue_reads_past_line_comments():
+    conn = duckdb.connect()
+    conn.execute("create table payments (payment_id integer, amount numeric)")
+    validator = query_validator.QueryValidator(
+        catalogue.Catalogue.from_duckdb(conn)
+    )
+
+    assert validator.unresolved(
+        "select payments.nope -- pick a column\nfrom payments"
+    ) == ["Column 'nope' not found in table 'main.payments'."]
+    assert validator.unresolved(
+        "select nope_col\n-- comment\nfrom nope_table"
+    ) == [
+        "Table 'nope_table' not found.",
+        "Column 'nope_col' could not be resolved.",
+    ]
@@ -0,0 +1,69 @@
+import json
+
+from testing_sqlglot import convert_sql_files
+
+
+def test__migrate_scripts_captures_errors_and_skips_cached_files(tmp_path):
+    sql_dir, output_dir = tmp_path / "models", tmp_path / "output"
+    (sql_dir / "staging").mkdir(parents=True)
+    (sql_dir / "staging" / "good.sql").write_text("select top 5 a from b")
+    (sql_dir / "bad.sql").write_text("select (1 from")
+    cache_path = tmp_path / "cache.json"
+
+    results = convert_sql_files.migrate_scripts(
+        sql_dir, output_dir, cache_path=cache_path, workers=2
+    )
+    statuses = {result.path.as_posix(): result.status for result in results}
+
+    assert statuses == {"bad.sql": "failed", "staging/good.sql": "migrated"}
+    assert (output_dir / "staging" / "good.sql").read_text() == (
+        "SELECT\n  a\nFROM b\nLIMIT 5"
+    )
+    assert list(json.loads(cache_path.read_text())["files"]) == [
+        "staging/good.sql"
+    ]
+
+    rerun = convert_sql_files.migrate_scripts(
+        sql_dir, output_dir, cache_path=cache_path, workers=2
+    )
+    assert [result.status for result in rerun] == ["failed", "cached"]
+    assert "1 failed" in convert_sql_files.summarise(rerun)
+
+
+def test__migrate_scripts_in_place_does_not_migrate_twice(tmp_path):
+    script = tmp_path / "model.sql"
+    script.write_text("select getdate()")
+    cache_path = tmp_path / "cache.json"
+
+    first = convert_sql_files.migrate_scripts(tmp_path, cache_path=cache_path)
+    migrated = script.read_text()
+    second = convert_sql_files.migrate_scripts(tmp_path, cache_path=cache_path)
+
+    assert [first[0].status, second[0].status] == ["migrated", "cached"]
+    assert script.read_text() == migrated
+
+
+def test__migrate_scripts_migrates_edited_sources_again(tmp_path):
+    sql_dir, output_dir = tmp_path / "models", tmp_path / "output"
+    sql_dir.mkdir()
+    script = sql_dir / "model.sql"
+    script.write_text("select top 5 a from b")
+    cache_path = tmp_path / "cache.json"
+
+    convert_sql_files.migrate_scripts(
+        sql_dir, output_dir, cache_path=cache_path
+    )
+    script.write_text("select top 10 a from b")
+    rerun = convert_sql_files.migrate_scripts(
+        sql_dir, output_dir, cache_path=cache_path
+    )
+
+    assert rerun[0].status == "migrated"
+    assert (output_dir / "model.sql").read_text().endswith("LIMIT 10")
+
+    (output_dir / "model.sql").write_text("edited")
+    rerun = convert_sql_files.migrate_scripts(
+        sql_dir, output_dir, cache_path=cache_path
+    )
+
+    assert rerun[0].status == "migrated"
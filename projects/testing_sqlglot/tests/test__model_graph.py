@@ -0,0 +1,63 @@
+from testing_sqlglot import model_graph
+
+
+def test__model_graph_rebuilds_changed_models_and_their_dependants(tmp_path):
+    models_dir = tmp_path / "models"
+    (models_dir / "staging").mkdir(parents=True)
+    (models_dir / "staging" / "stg_orders.sql").write_text(
+        "SELECT TOP 5 id, GETDATE() AS loaded_at FROM raw_orders"
+    )
+    (models_dir / "orders.sql").write_text("SELECT id FROM stg_orders")
+    (models_dir / "report.sql").write_text(
+        "WITH o AS (SELECT id FROM orders) SELECT COUNT(*) AS n FROM o"
+    )
+    (models_dir / "other.sql").write_text("SELECT 1 AS x")
+    graph = model_graph.ModelGraph(
+        models_dir, tmp_path / "output", tmp_path / "cache"
+    )
+
+    first = graph.build()
+    assert sorted(first.built) == ["orders", "other", "report", "stg_orders"]
+    assert (tmp_path / "output" / "staging" / "stg_orders.sql").read_text() == (
+        "SELECT\n  id,\n  CURRENT_TIMESTAMP AS loaded_at\nFROM raw_orders\nLIMIT 5"
+    )
+    assert graph.build().built == []
+
+    (models_dir / "staging" / "stg_orders.sql").write_text(
+        "SELECT id FROM raw_orders"
+    )
+    rebuilt = model_graph.ModelGraph(
+        models_dir, tmp_path / "output", tmp_path / "cache"
+    ).build()
+    assert rebuilt.built == ["stg_orders", "orders", "report"]
+    assert rebuilt.unchanged == 1
+
+    (models_dir / "orders.sql").unlink()
+    removed = graph.build()
+    assert removed.built == ["report"]
+    assert removed.problems == {"report": ["Model 'orders' was removed."]}
+    assert not (tmp_path / "output" / "orders.sql").exists()
+    assert graph.build().problems == {"report": ["Model 'orders' was removed."]}
+
+    (models_dir / "orders.sql").write_text("SELECT id FROM stg_orders")
+    restored = graph.build()
+    assert restored.built == ["orders", "report"]
+    assert restored.problems == {}
+
+
+def test__model_graph_reports_cycles_but_allows_self_references(tmp_path):
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    (models_dir / "inc.sql").write_text("SELECT id FROM inc")
+    (models_dir / "a.sql").write_text("SELECT id FROM b")
+    (models_dir / "b.sql").write_text("SELECT id FROM a")
+    (models_dir / "c.sql").write_text("SELECT id FROM a")
+    graph = model_graph.ModelGraph(
+        models_dir, tmp_path / "output", tmp_path / "cache"
+    )
+
+    result = graph.build()
+
+    assert sorted(result.built) == ["c", "inc"]
+    assert set(result.problems) == {"a", "b"}
+    assert "Models form a cycle" in result.problems["a"][0]
@@ -0,0 +1,71 @@
+import duckdb
+import pytest
+from testing_sqlglot import catalogue, prefilter
+
+
+@pytest.fixture
+def validator() -> prefilter.TieredValidator:
+    conn = duckdb.connect()
+    conn.execute(
+        """
+        create table users (user_id integer, user_name text);
+        create table payments (payment_id integer, user_id integer);
+        """
+    )
+    return prefilter.TieredValidator(catalogue.Catalogue.from_duckdb(conn))
+
+
+@pytest.mark.parametrize(
+    ("sql", "tier", "problems"),
+    [
+        (
+            "select p.payment_id, user_name as name from payments as p left join users using (user_id) order by name desc nulls last",
+            "tokens",
+            [],
+        ),
+        (
+            "select customers.id, payments.amount from customers, payments",
+            "tokens",
+            [
+                "Table 'customers' not found.",
+                "Column 'amount' not found in table 'main.payments'.",
+            ],
+        ),
+        ('select payments."Payment_Id" from payments', "tokens", []),
+        (
+            "with p as (select * from payments) select p.user_id from p",
+            "qualify",
+            [],
+        ),
+        (
+            "select bogus from users",
+            "qualify",
+            ["Column 'bogus' could not be resolved."],
+        ),
+    ],
+)
+def test__tiered_validator_decides_simple_queries_from_tokens(
+    validator, sql, tier, problems
+):
+    result = validator.validate(sql)
+
+    assert (result.tier, result.problems) == (tier, problems)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "select payment_id from payments where",
+        "select , payment_id from payments where ((",
+        "select payment_id from payments order by desc",
+        "select payment_id from payments where payment_id =",
+        "select user_id from payments join users on payments.user_id = users.user_id",
+        "select user_id from payments a join payments b on a.payment_id = b.payment_id",
+        "select user_id from payments, payments p2",
+        "select user_name from payments join users using (nope)",
+        "select user_name from payments join users using (payment_id)",
+    ],
+)
+def test__tiers_agree_on_invalid_queries(validator, sql):
+    assert validator.prefilter(sql) is None
+    assert validator.validate(sql).problems == validator.qualify(sql) != []
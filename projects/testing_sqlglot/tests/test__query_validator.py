@@ -0,0 +1,65 @@
+from testing_sqlglot import query_validator
+
+KNOWN_OBJECTS = {
+    "users": {"user_id", "user_name"},
+    "payments": {"payment_id", "user_id", "amount"},
+}
+
+
+def test__normalise_keeps_quoted_text():
+    assert (
+        query_validator.normalise(
+            "SELECT  a,\n  'Two  Spaces' FROM \"My  Table\";"
+        )
+        == "select a, 'Two  Spaces' from \"My  Table\""
+    )
+    assert (
+        query_validator.normalise("SELECT a -- A Comment\nFROM/* b */t;")
+        == "select a from t"
+    )
+
+
+def test__query_objects_resolves_aliases_and_ctes():
+    validator = query_validator.QueryValidator(KNOWN_OBJECTS)
+
+    assert validator.query_objects(
+        """
+        with big as (select u.user_id from users as u)
+        select p.amount, big.user_id
+        from payments as p
+            inner join big using (user_id)
+        """
+    ) == {"users": {"user_id"}, "payments": {"amount", "user_id"}}
+
+
+def test__validate_many_reports_each_query_and_caches_repeats():
+    validator = query_validator.QueryValidator(KNOWN_OBJECTS)
+    valid = "select payments.amount from payments"
+
+    results = validator.validate_many(
+        [
+            valid,
+            valid.upper(),
+            "select customers.customer_id from customers",
+            "select (1 from",
+        ]
+    )
+
+    assert [result.valid for result in results] == [True, True, False, False]
+    assert "customers" in results[2].error
+    assert results[0].objects == {"payments": {"amount"}}
+    assert validator.cache_info().hits == 1
+
+
+def test__query_objects_resolves_aliases_in_their_own_scope():
+    validator = query_validator.QueryValidator(
+        {"x": {"a"}, "y": {"b"}},
+    )
+
+    assert validator.query_objects(
+        """
+        select t.a
+        from x as t
+        where exists (select 1 from y as t where t.b = 1)
+        """
+    ) == {"x": {"a"}, "y": {"b"}}
@@ -0,0 +1,179 @@
+"""
+Convert a fixed-width file into a columnar format (Parquet or Orc).
+
+The input is streamed in batches of lines, and each batch is written out
+as soon as it is parsed (one Parquet row group per batch; Orc stripes are
+cut by the writer once they reach the stripe size). Peak memory therefore
+depends on the batch size rather than on the size of the input file.
+
+    python -m testing_struct.convert example.fwf example.parquet
+    python -m testing_struct.convert example.fwf example.orc --format orc
+"""
+
+import argparse
+import itertools
+import pathlib
+from collections.abc import Iterable, Iterator, Sequence
+
+import pyarrow
+import pyarrow.orc
+import pyarrow.parquet
+
+from testing_struct.main import SCHEMA, make_parser
+
+SUCCESS = 0
+DEFAULT_BATCH_SIZE = 65_536
+DEFAULT_COMPRESSION = "zstd"
+FORMATS = ("parquet", "orc")
+ARROW_SCHEMA = pyarrow.schema(
+    [
+        (column, pyarrow.string())
+        for column, width in SCHEMA.items()
+        if width > 0
+    ]
+)
+
+
+def read_batches(
+    lines: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[pyarrow.RecordBatch]:
+    """
+    Parse fixed-width lines into record batches of at most ``batch_size``
+    rows.
+
+    Values are stripped of their padding, and blank values become nulls.
+    Short lines (for example, ones with their trailing spaces trimmed) are
+    padded back out to the full width before parsing.
+    """
+
+    parse = make_parser(tuple(SCHEMA.values()))
+    width = sum(abs(fw) for fw in SCHEMA.values())
+    stripped_lines = (line.rstrip("\r\n") for line in lines)
+    non_blank_lines = (line for line in stripped_lines if line.strip())
+
+    while chunk := list(itertools.islice(non_blank_lines, batch_size)):
+        columns = zip(
+            *(parse(line.ljust(width)) for line in chunk), strict=True
+        )
+        yield pyarrow.RecordBatch.from_arrays(
+            [
+                pyarrow.array(
+                    [value.strip() or None for value in column],
+                    type=pyarrow.string(),
+                )
+                for column in columns
+            ],
+            schema=ARROW_SCHEMA,
+        )
+
+
+def write_parquet(
+    batches: Iterable[pyarrow.RecordBatch],
+    target: pathlib.Path,
+    compression: str = DEFAULT_COMPRESSION,
+) -> int:
+    """
+    Write the batches to a Parquet file, one row group per batch.
+
+    Return the number of rows written.
+    """
+
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(
+        where=str(target),
+        schema=ARROW_SCHEMA,
+        compression=compression,
+    ) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+
+    return rows
+
+
+def write_orc(
+    batches: Iterable[pyarrow.RecordBatch],
+    target: pathlib.Path,
+    compression: str = DEFAULT_COMPRESSION,
+) -> int:
+    """
+    Write the batches to an Orc file, letting the writer cut the stripes.
+
+    Return the number of rows written.
+    """
+
+    rows = 0
+    with pyarrow.orc.ORCWriter(
+        where=str(target),
+        compression=compression,
+    ) as writer:
+        for batch in batches:
+            writer.write(pyarrow.Table.from_batches([batch]))
+            rows += batch.num_rows
+
+    return rows
+
+
+def convert(
+    source: pathlib.Path,
+    target: pathlib.Path,
+    format_: str = "parquet",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    compression: str = DEFAULT_COMPRESSION,
+) -> int:
+    """
+    Stream the fixed-width ``source`` file into ``target``.
+
+    Return the number of rows written.
+    """
+
+    writers = {"parquet": write_parquet, "orc": write_orc}
+    if format_ not in writers:
+        raise ValueError(
+            f"Unknown format {format_!r}, expected one of {FORMATS}"
+        )
+
+    with source.open(encoding="utf-8") as lines:
+        return writers[format_](
+            read_batches(lines, batch_size),
+            target,
+            compression=compression,
+        )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Parse the arguments and run the conversion.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", type=pathlib.Path)
+    parser.add_argument("target", type=pathlib.Path)
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="defaults to the target's file extension",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION)
+
+    args = parser.parse_args(argv)
+    format_ = args.format or args.target.suffix.removeprefix(".")
+    if format_ not in FORMATS:
+        parser.error(f"cannot infer the format from {args.target.name!r}")
+
+    rows = convert(
+        source=args.source,
+        target=args.target,
+        format_=format_,
+        batch_size=args.batch_size,
+        compression=args.compression,
+    )
+    print(f"wrote {rows} rows to {args.target}")
+
+    return SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
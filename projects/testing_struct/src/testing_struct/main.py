@@ -29,12 +29,10 @@ def make_parser(
     format_string = " ".join(
         "{}{}".format(abs(fw), "x" if fw < 0 else "s") for fw in field_widths
     )
+    unpack_from = struct.Struct(format_string).unpack_from
 
     def parser(line: str) -> tuple[str, ...]:
-        return tuple(
-            s.decode()
-            for s in struct.Struct(format_string).unpack_from(line.encode())
-        )
+        return tuple(s.decode() for s in unpack_from(line.encode()))
 
     return parser
 
@@ -0,0 +1,45 @@
+import pyarrow.orc
+import pyarrow.parquet
+import pytest
+from testing_struct import convert, main
+
+
+@pytest.mark.parametrize("format_", convert.FORMATS)
+def test__convert_round_trips_the_example_file(tmp_path, format_):
+    target = tmp_path / f"example.{format_}"
+    rows = convert.convert(main.FIXED_WIDTH_FILE, target, format_=format_)
+
+    if format_ == "parquet":
+        table = pyarrow.parquet.read_table(target)
+    else:
+        table = pyarrow.orc.read_table(target)
+
+    assert rows == table.num_rows == 14
+    assert table.column_names == list(main.SCHEMA)
+    assert table.to_pylist()[0] == {
+        "employee_id": "63679",
+        "employee_name": "Sandrine",
+        "job_name": "Clerk",
+        "manager_id": "69062",
+        "hire_date": "1990-12-18",
+        "salary": "900",
+        "commission": None,
+        "department_id": "2001",
+    }
+
+
+def test__read_batches_respects_the_batch_size():
+    lines = main.FIXED_WIDTH_FILE.read_text().splitlines()
+    batches = list(convert.read_batches(lines, batch_size=5))
+
+    assert [batch.num_rows for batch in batches] == [5, 5, 4]
+
+
+def test__read_batches_pads_short_lines():
+    lines = ["1       Bob\n", "\n"]
+    (batch,) = convert.read_batches(lines)
+
+    assert batch.to_pylist() == [
+        {"employee_id": "1", "employee_name": "Bob"}
+        | dict.fromkeys(list(main.SCHEMA)[2:])
+    ]
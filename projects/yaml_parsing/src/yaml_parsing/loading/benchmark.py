@@ -0,0 +1,99 @@
+"""
+Compare how many YAML files per second each backend loads.
+
+The files are generated config files, like dbt properties files. Each
+backend loads every file once without the cache, and then the default
+backend loads them twice with the cache (the second pass being all hits):
+
+    python -m yaml_parsing.loading.benchmark --files 1000
+"""
+
+import argparse
+import pathlib
+import tempfile
+import time
+from collections.abc import Sequence
+
+from yaml_parsing.loading import loader
+
+SUCCESS = 0
+
+
+def write_files(
+    directory: pathlib.Path, files: int, columns: int
+) -> list[pathlib.Path]:
+    """
+    Write the config files, and return their paths.
+    """
+
+    paths = []
+    for i in range(files):
+        lines = [
+            "---",
+            "version: 2",
+            "models:",
+            f"  - name: model_{i}",
+            f'    description: "Model {i}, generated for the benchmark"',
+            "    config:",
+            "      materialized: table",
+            "      enabled: true",
+            "      tags: [nightly, finance]",
+            "    columns:",
+        ]
+        for c in range(columns):
+            lines += [
+                f"      - name: column_{c}",
+                "        description: >",
+                f"          Column {c} of model {i}, which is described",
+                "          over more than one line.",
+                "        data_tests:",
+                "          - not_null",
+                f"          - accepted_values: {{values: [{c}, {c + 1}]}}",
+            ]
+        path = directory / f"model_{i}.yaml"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        paths.append(path)
+
+    return paths
+
+
+def _files_per_second(
+    yaml_loader: loader.YAMLLoader, paths: list[pathlib.Path]
+) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        yaml_loader.load(path)
+
+    return len(paths) / (time.perf_counter() - start)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Parse the arguments and run the benchmark.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_files(pathlib.Path(tmp), args.files, args.columns)
+        print(f"Loading {args.files:,} files of {args.columns} columns")
+        for backend in loader.BACKENDS:
+            rate = _files_per_second(
+                loader.YAMLLoader(backend, cache=False), paths
+            )
+            c_parser = "" if loader.has_c_parser(backend) else " (pure Python)"
+            print(f"{backend:<20}{rate:>10,.0f} files/s{c_parser}")
+
+        cached = loader.YAMLLoader()
+        for label in ("cache (cold)", "cache (warm)"):
+            rate = _files_per_second(cached, paths)
+            print(f"{label:<20}{rate:>10,.0f} files/s")
+
+    return SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,170 @@
+"""
+Load YAML files quickly: with the C loaders where they're available, with
+reused loaders, and with a cache of the parsed documents.
+
+There are four backends:
+
+- ``pyyaml-c``: PyYAML's ``CSafeLoader`` (libyaml), falling back to
+  ``SafeLoader`` when PyYAML was built without libyaml
+- ``pyyaml``: PyYAML's ``SafeLoader``, in pure Python
+- ``ruamel``: ruamel.yaml's safe loader, in pure Python
+- ``ruamel-c``: ruamel.yaml's safe loader with its C parser, falling back
+  to pure Python when ``ruamel.yaml.clib`` isn't installed
+
+The PyYAML backends follow YAML 1.1 and the ruamel.yaml ones YAML 1.2
+(see ``tags``), so ``yes`` is ``True`` with one and ``"yes"`` with the
+other. The C parser that ``ruamel-c`` uses is libyaml's, which only reads
+YAML 1.1 *syntax*, so use ``ruamel`` when the files need YAML 1.2.
+
+A ruamel.yaml ``YAML`` instance is slow to create and not safe to share
+between threads, so there's one per thread per backend, reused. PyYAML's
+loaders hold the stream they read, so only their classes are reused.
+
+``YAMLLoader`` caches each file's documents, keyed by its path, modified
+time, and size. If the modified time or size changes but the content
+hash doesn't (e.g. the file was touched), the documents are reused. The
+cached documents are shared, so treat them as read-only.
+"""
+
+import dataclasses
+import hashlib
+import io
+import os
+import pathlib
+import threading
+from typing import Any, Literal
+
+import ruamel.yaml as ruyaml
+import ruamel.yaml.main
+import yaml  # pyyaml
+
+Backend = Literal["pyyaml-c", "pyyaml", "ruamel", "ruamel-c"]
+BACKENDS: tuple[Backend, ...] = ("pyyaml-c", "pyyaml", "ruamel", "ruamel-c")
+DEFAULT_BACKEND: Backend = "pyyaml-c"
+
+PYYAML_C_LOADER = yaml.CSafeLoader if yaml.__with_libyaml__ else yaml.SafeLoader
+
+_ruamel = threading.local()
+
+
+def has_c_parser(backend: Backend) -> bool:
+    """
+    Return whether the backend really uses a C parser here.
+    """
+
+    match backend:
+        case "pyyaml-c":
+            return yaml.__with_libyaml__
+        case "ruamel-c":
+            return ruamel.yaml.main.CParser is not None
+        case _:
+            return False
+
+
+def ruamel_yaml(*, pure: bool = True) -> ruyaml.YAML:
+    """
+    Return this thread's safe ruamel.yaml instance.
+    """
+
+    key = "pure" if pure else "c"
+    instance = getattr(_ruamel, key, None)
+    if instance is None:
+        instance = ruyaml.YAML(typ="safe", pure=pure)
+        setattr(_ruamel, key, instance)
+
+    return instance
+
+
+def load_all(
+    content: str | bytes, backend: Backend = DEFAULT_BACKEND
+) -> list[Any]:
+    """
+    Return the documents in the YAML content.
+    """
+
+    match backend:
+        case "pyyaml-c":
+            return list(yaml.load_all(content, Loader=PYYAML_C_LOADER))
+        case "pyyaml":
+            return list(yaml.load_all(content, Loader=yaml.SafeLoader))
+        case "ruamel" | "ruamel-c":
+            if isinstance(content, bytes):
+                content = io.BytesIO(content)
+            return list(ruamel_yaml(pure=backend == "ruamel").load_all(content))
+        case _:
+            raise ValueError(f"Unknown backend: {backend}")
+
+
+@dataclasses.dataclass
+class _Entry:
+    mtime_ns: int
+    size: int
+    digest: str
+    documents: list[Any]
+
+
+class YAMLLoader:
+    """
+    Load YAML files with a backend, caching their documents.
+
+    :param backend: The backend to parse with.
+    :param cache: Whether to cache the documents.
+    """
+
+    def __init__(
+        self,
+        backend: Backend = DEFAULT_BACKEND,
+        *,
+        cache: bool = True,
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+
+        self.backend = backend
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[pathlib.Path, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: pathlib.Path) -> list[Any]:
+        """
+        Return the documents in the file, from the cache if the file
+        hasn't changed.
+        """
+
+        path = pathlib.Path(path)
+        if not self.cache:
+            return load_all(path.read_bytes(), self.backend)
+
+        with self._lock:
+            entry = self._entries.get(path)
+        # Stat the open file, so that the stat matches the content read
+        with path.open("rb") as file:
+            stat = os.fstat(file.fileno())
+            if entry and (entry.mtime_ns, entry.size) == (
+                stat.st_mtime_ns,
+                stat.st_size,
+            ):
+                self.hits += 1
+                return entry.documents
+            content = file.read()
+
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        if entry and entry.digest == digest:
+            self.hits += 1
+            documents = entry.documents
+        else:
+            self.misses += 1
+            documents = load_all(content, self.backend)
+
+        with self._lock:
+            self._entries[path] = _Entry(
+                stat.st_mtime_ns, stat.st_size, digest, documents
+            )
+
+        return documents
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
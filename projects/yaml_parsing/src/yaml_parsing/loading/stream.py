@@ -0,0 +1,279 @@
+"""
+Read the documents in a multi-document YAML stream one at a time, without
+reading the whole stream into memory.
+
+``scalars.main`` reads the file into a string before loading it, so the
+whole file (and then every document in it) is in memory at once. Here,
+the loader reads the file handle in chunks as it parses, and each
+document is yielded as soon as it's been parsed, so only one document is
+in memory at a time.
+
+Given ``keys``, only those top-level keys of each (mapping) document are
+kept. The parser's events are read directly, and the events of the other
+keys' values are skipped without building their nodes or objects, so a
+large subtree that isn't needed costs only its parsing. Anchors in a
+skipped subtree are still kept, since a kept key can refer to them, and
+so are merge keys (``<<``), since they can supply kept keys.
+
+This uses PyYAML's loaders (libyaml's where available), so follows YAML
+1.1 like ``loading.loader``'s ``pyyaml-c`` backend. The benchmark compares
+the peak memory and time of reading a large stream each way:
+
+    python -m yaml_parsing.loading.stream --documents 2000
+"""
+
+import argparse
+import pathlib
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Collection, Iterator, Sequence
+from typing import IO, Any
+
+import yaml  # pyyaml
+
+from yaml_parsing.loading.loader import PYYAML_C_LOADER
+
+MERGE_KEY = "<<"
+SUCCESS = 0
+
+
+class _Projection:
+    """
+    Compose one document's nodes from the loader's events, skipping the
+    values of the top-level keys that aren't wanted.
+    """
+
+    def __init__(self, loader: yaml.SafeLoader, keys: frozenset[str]) -> None:
+        self.loader = loader
+        self.keys = keys
+        self.anchors: dict[str, yaml.Node] = {}
+
+    def _tag(self, event: yaml.NodeEvent, kind: type[yaml.Node]) -> str:
+        if event.tag is not None and event.tag != "!":
+            return event.tag
+        value = event.value if kind is yaml.ScalarNode else None
+        return self.loader.resolve(kind, value, event.implicit)
+
+    def _node(self) -> yaml.Node:
+        """
+        Compose the next node, like PyYAML's ``Composer``.
+        """
+
+        event = self.loader.get_event()
+        if isinstance(event, yaml.AliasEvent):
+            if event.anchor not in self.anchors:
+                raise yaml.composer.ComposerError(
+                    None,
+                    None,
+                    f"found undefined alias {event.anchor!r}",
+                    event.start_mark,
+                )
+            return self.anchors[event.anchor]
+
+        if isinstance(event, yaml.ScalarEvent):
+            node = yaml.ScalarNode(
+                self._tag(event, yaml.ScalarNode),
+                event.value,
+                event.start_mark,
+                event.end_mark,
+                style=event.style,
+            )
+        elif isinstance(event, yaml.SequenceStartEvent):
+            node = yaml.SequenceNode(
+                self._tag(event, yaml.SequenceNode),
+                [],
+                event.start_mark,
+                None,
+                flow_style=event.flow_style,
+            )
+        else:
+            node = yaml.MappingNode(
+                self._tag(event, yaml.MappingNode),
+                [],
+                event.start_mark,
+                None,
+                flow_style=event.flow_style,
+            )
+        if event.anchor is not None:
+            self.anchors[event.anchor] = node
+
+        if isinstance(node, yaml.SequenceNode):
+            while not self.loader.check_event(yaml.SequenceEndEvent):
+                node.value.append(self._node())
+            node.end_mark = self.loader.get_event().end_mark
+        elif isinstance(node, yaml.MappingNode):
+            while not self.loader.check_event(yaml.MappingEndEvent):
+                node.value.append((self._node(), self._node()))
+            node.end_mark = self.loader.get_event().end_mark
+
+        return node
+
+    def _skip(self) -> None:
+        """
+        Skip the next node's events, composing only its anchored nodes.
+        """
+
+        depth = 0
+        while True:
+            event = self.loader.peek_event()
+            if (
+                isinstance(event, yaml.NodeEvent)
+                and not isinstance(event, yaml.AliasEvent)
+                and event.anchor is not None
+            ):
+                self._node()  # a kept key can refer to it
+            else:
+                self.loader.get_event()
+                if isinstance(event, yaml.CollectionStartEvent):
+                    depth += 1
+                elif isinstance(event, yaml.CollectionEndEvent):
+                    depth -= 1
+            if depth == 0:
+                return
+
+    def _projected(self) -> yaml.MappingNode:
+        """
+        Compose the top-level mapping, with only the wanted keys.
+        """
+
+        event = self.loader.get_event()
+        node = yaml.MappingNode(
+            self._tag(event, yaml.MappingNode),
+            [],
+            event.start_mark,
+            None,
+            flow_style=event.flow_style,
+        )
+        if event.anchor is not None:
+            self.anchors[event.anchor] = node
+
+        while not self.loader.check_event(yaml.MappingEndEvent):
+            key = self.loader.peek_event()
+            if (
+                isinstance(key, yaml.ScalarEvent)
+                and key.anchor is None
+                and key.value not in self.keys
+            ):
+                self.loader.get_event()
+                self._skip()
+            else:
+                node.value.append((self._node(), self._node()))
+        node.end_mark = self.loader.get_event().end_mark
+
+        return node
+
+    def document(self) -> Any:
+        self.loader.get_event()  # the document start
+        if self.loader.check_event(yaml.MappingStartEvent):
+            node = self._projected()
+        else:
+            node = self._node()
+        self.loader.get_event()  # the document end
+
+        return self.loader.construct_document(node)
+
+
+def iter_documents(
+    stream: IO[str] | IO[bytes],
+    keys: Collection[str] | None = None,
+    *,
+    loader_class: type[yaml.SafeLoader] = PYYAML_C_LOADER,
+) -> Iterator[Any]:
+    """
+    Yield the documents in the stream, one at a time, as they're parsed.
+
+    :param stream: The open file (or other stream) to read.
+    :param keys: The top-level keys to keep in each mapping document. By
+        default, the documents are loaded whole.
+    :param loader_class: The PyYAML loader to parse with.
+    """
+
+    loader = loader_class(stream)
+    try:
+        if keys is None:
+            while loader.check_data():
+                yield loader.get_data()
+            return
+
+        wanted = frozenset(keys) | {MERGE_KEY}
+        loader.get_event()  # the stream start
+        while not loader.check_event(yaml.StreamEndEvent):
+            yield _Projection(loader, wanted).document()
+    finally:
+        loader.dispose()
+
+
+def write_stream(path: pathlib.Path, documents: int) -> None:
+    """
+    Write a stream of documents, each with a small header and a large body.
+    """
+
+    with path.open("w", encoding="utf-8") as file:
+        for i in range(documents):
+            file.write(f"---\nname: document_{i}\nversion: {i % 7}\nbody:\n")
+            for j in range(50):
+                file.write(
+                    f"  - id: {j}\n"
+                    f"    text: line {j} of document {i}\n"
+                    f"    tags: [a, b, c]\n"
+                )
+
+
+def _measure(read: Callable[[], int]) -> tuple[float, float]:
+    """
+    Return the peak memory (in MB) and the time taken (in seconds) to read
+    the stream. The time is from a separate read, without the (slow)
+    memory tracing.
+    """
+
+    start = time.perf_counter()
+    read()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    read()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak / 1_000_000, seconds
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Compare reading a large stream whole, streamed, and streamed with only
+    two of the keys.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=2_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "stream.yaml"
+        write_stream(path, args.documents)
+        size = path.stat().st_size / 1_000_000
+
+        def read_whole() -> int:
+            content = path.read_text(encoding="utf-8")
+            return sum(1 for _ in yaml.load_all(content, PYYAML_C_LOADER))
+
+        def read_streamed(keys: list[str] | None = None) -> int:
+            with path.open("rb") as file:
+                return sum(1 for _ in iter_documents(file, keys))
+
+        print(f"{args.documents:,} documents, {size:.1f}MB")
+        print(f"{'read':<12}{'peak':>10}{'time':>10}")
+        for label, read in [
+            ("whole", read_whole),
+            ("streamed", read_streamed),
+            ("projected", lambda: read_streamed(["name", "version"])),
+        ]:
+            peak, seconds = _measure(read)
+            print(f"{label:<12}{peak:>8.1f}MB{seconds:>9.2f}s")
+
+    return SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
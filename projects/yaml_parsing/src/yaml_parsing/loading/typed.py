@@ -0,0 +1,327 @@
+"""
+Load YAML documents into dataclasses, safely.
+
+``tags.python_example__simple`` builds a ``Model`` from a
+``!!python/object`` tag, which needs PyYAML's (or ruamel.yaml's) unsafe
+loader: the document chooses which class to build, and the unsafe
+loaders are pure Python. Here, the caller chooses the class, the YAML is
+loaded with a safe loader (libyaml's, by default), and the plain values
+are then converted into the class.
+
+The conversion for each class is built once, from its type hints, and
+reused for every document:
+
+- a dataclass is built from a mapping, with its fields converted, its
+  defaults used for the missing fields, and unknown keys rejected (and
+  it can refer to itself, like ``children: list["Node"]``)
+- ``list[T]``, ``dict[K, V]``, ``T | None``, and ``Literal`` are
+  converted item by item
+- ``str``, ``bool``, and ``int`` must be exactly those (so ``yes`` isn't
+  a string and ``true`` isn't an int), and an ``int`` is coerced to a
+  ``float`` field
+
+A value that doesn't fit raises ``ConversionError``, with its location.
+The benchmark compares the unsafe loaders against this:
+
+    python -m yaml_parsing.loading.typed --documents 2000
+"""
+
+import argparse
+import dataclasses
+import functools
+import time
+import types
+import typing
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import ruamel.yaml as ruyaml
+import yaml  # pyyaml
+
+from yaml_parsing.loading import loader
+
+SUCCESS = 0
+
+Converter = Callable[[Any], Any]
+
+# The dataclasses whose converters are being built, each with a converter
+# that defers to the finished one, for the fields that refer back to them
+_building: dict[type, Converter] = {}
+
+
+class ConversionError(ValueError):
+    """
+    Raised when a value can't be converted to its type.
+    """
+
+    def __init__(self, message: str, location: tuple[str, ...] = ()) -> None:
+        self.message = message
+        self.location = location
+        super().__init__(message)
+
+    def __str__(self) -> str:
+        return f"{'.'.join(self.location) or '<root>'}: {self.message}"
+
+    def at(self, key: object) -> "ConversionError":
+        """
+        Return the error with the key prepended to its location.
+        """
+
+        return ConversionError(self.message, (str(key), *self.location))
+
+
+def _name(type_: object) -> str:
+    return getattr(type_, "__name__", str(type_))
+
+
+def _exact(type_: type) -> Converter:
+    def convert(value: Any) -> Any:
+        if type(value) is not type_:
+            raise ConversionError(
+                f"expected {_name(type_)}, got {_name(type(value))}"
+            )
+        return value
+
+    return convert
+
+
+def _float(value: Any) -> float:
+    if type(value) is float:
+        return value
+    if type(value) is int:
+        return float(value)
+    raise ConversionError(f"expected float, got {_name(type(value))}")
+
+
+def _any(value: Any) -> Any:
+    return value
+
+
+def _optional(inner: Converter) -> Converter:
+    def convert(value: Any) -> Any:
+        return None if value is None else inner(value)
+
+    return convert
+
+
+def _literal(values: tuple[Any, ...]) -> Converter:
+    allowed = {(type(value), value) for value in values}
+
+    def convert(value: Any) -> Any:
+        if (type(value), value) not in allowed:
+            raise ConversionError(f"expected one of {values!r}, got {value!r}")
+        return value
+
+    return convert
+
+
+def _list(item: Converter) -> Converter:
+    def convert(value: Any) -> list[Any]:
+        if not isinstance(value, list):
+            raise ConversionError(f"expected a list, got {_name(type(value))}")
+        try:
+            return [item(v) for v in value]
+        except ConversionError as e:
+            # Find the item that failed, only once something has
+            for i, v in enumerate(value):
+                try:
+                    item(v)
+                except ConversionError:
+                    raise e.at(i) from None
+            raise
+
+    return convert
+
+
+def _dict(key: Converter, item: Converter) -> Converter:
+    def convert(value: Any) -> dict[Any, Any]:
+        if not isinstance(value, dict):
+            raise ConversionError(
+                f"expected a mapping, got {_name(type(value))}"
+            )
+        converted = {}
+        for k, v in value.items():
+            try:
+                converted[key(k)] = item(v)
+            except ConversionError as e:
+                raise e.at(k) from None
+
+        return converted
+
+    return convert
+
+
+def _deferred(cls: type) -> Converter:
+    def convert(value: Any) -> Any:
+        return _converter(cls)(value)
+
+    return convert
+
+
+def _dataclass(cls: type) -> Converter:
+    hints = typing.get_type_hints(cls)
+    fields = [
+        (field.name, _converter(hints[field.name]))
+        for field in dataclasses.fields(cls)
+        if field.init
+    ]
+    names = frozenset(name for name, _ in fields)
+    required = frozenset(
+        field.name
+        for field in dataclasses.fields(cls)
+        if field.init
+        and field.default is dataclasses.MISSING
+        and field.default_factory is dataclasses.MISSING
+    )
+
+    def convert(value: Any) -> Any:
+        if not isinstance(value, dict):
+            raise ConversionError(
+                f"expected a mapping for {cls.__name__}, "
+                f"got {_name(type(value))}"
+            )
+        if unknown := value.keys() - names:
+            raise ConversionError(
+                f"unknown keys for {cls.__name__}: {sorted(map(str, unknown))}"
+            )
+        if missing := required - value.keys():
+            raise ConversionError(
+                f"missing keys for {cls.__name__}: {sorted(missing)}"
+            )
+
+        kwargs = {}
+        for name, field_converter in fields:
+            if name in value:
+                try:
+                    kwargs[name] = field_converter(value[name])
+                except ConversionError as e:
+                    raise e.at(name) from None
+
+        return cls(**kwargs)
+
+    return convert
+
+
+def _converter(type_: Any) -> Converter:
+    """
+    Return the converter for the type, or the deferred one for a dataclass
+    that's still being built (which isn't cached).
+    """
+
+    if type_ in _building:
+        return _building[type_]  # a recursive reference
+    return _build_converter(type_)
+
+
+@functools.cache
+def _build_converter(type_: Any) -> Converter:  # noqa: PLR0911
+    """
+    Build the converter for the type.
+    """
+
+    origin = typing.get_origin(type_)
+    args = typing.get_args(type_)
+    if type_ is Any:
+        return _any
+    if dataclasses.is_dataclass(type_):
+        _building[type_] = _deferred(type_)
+        try:
+            return _dataclass(type_)
+        except Exception:
+            # Drop the converters built around the deferred one
+            _build_converter.cache_clear()
+            raise
+        finally:
+            del _building[type_]
+    if origin in {typing.Union, types.UnionType}:
+        others = [arg for arg in args if arg is not type(None)]
+        if len(others) != 1:
+            raise TypeError(f"Unsupported union: {type_}")
+        return _optional(_converter(others[0]))
+    if origin is typing.Literal:
+        return _literal(args)
+    if origin is list:
+        return _list(_converter(args[0]) if args else _any)
+    if origin is dict:
+        return _dict(*(map(_converter, args) if args else (_any, _any)))
+    if type_ is float:
+        return _float
+    if type_ in {str, bool, int}:
+        return _exact(type_)
+
+    raise TypeError(f"Unsupported type: {type_}")
+
+
+def converter[T](cls: type[T]) -> Callable[[Any], T]:
+    """
+    Return the (cached) converter from loaded YAML values to the class.
+    """
+
+    return _converter(cls)
+
+
+def load_all[T](
+    content: str | bytes,
+    cls: type[T],
+    backend: loader.Backend = loader.DEFAULT_BACKEND,
+) -> list[T]:
+    """
+    Return the documents in the YAML content, each converted to the class.
+    """
+
+    convert = _converter(cls)
+    documents = []
+    for i, document in enumerate(loader.load_all(content, backend)):
+        try:
+            documents.append(convert(document))
+        except ConversionError as e:
+            raise e.at(f"<document {i}>") from None
+
+    return documents
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Compare building ``Model`` objects from ``!!python`` tags against
+    converting safely loaded documents.
+    """
+
+    from yaml_parsing.tags.main import Model  # noqa: PLC0415
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=2_000)
+    args = parser.parse_args(argv)
+
+    tag = f"!!python/object:{Model.__module__}.{Model.__qualname__}"
+    untagged = "".join(
+        f"--- \n"
+        f"name: model_{i}\n"
+        f"archived: {str(i % 2 == 0).lower()}\n"
+        f"columns: [column_1, column_2, column_3]\n"
+        for i in range(args.documents)
+    )
+    tagged = untagged.replace("--- \n", f"--- {tag}\n")
+
+    def ruamel_unsafe() -> list[Model]:
+        return list(ruyaml.YAML(typ="unsafe", pure=True).load_all(tagged))
+
+    print(f"{'loading':<24}{'documents/s':>14}")
+    for label, load in [
+        (
+            "pyyaml unsafe",
+            lambda: list(yaml.load_all(tagged, Loader=yaml.Loader)),
+        ),
+        ("ruamel unsafe", ruamel_unsafe),
+        ("typed (pyyaml-c)", lambda: load_all(untagged, Model, "pyyaml-c")),
+        ("typed (ruamel)", lambda: load_all(untagged, Model, "ruamel")),
+    ]:
+        start = time.perf_counter()
+        models = load()
+        seconds = time.perf_counter() - start
+        print(f"{label:<24}{len(models) / seconds:>14,.0f}")
+
+    return SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,18 +1,17 @@
 import pathlib
 
-import yaml
+from yaml_parsing.loading.stream import iter_documents
 
 HERE = pathlib.Path(__file__).parent
 
 
 def main() -> None:
-    raw_content = (HERE / "ahoy.yaml").read_text(encoding="utf-8")
-    # raw_content = (HERE / "real-example.yaml").read_text(encoding="utf-8")
-    contents = yaml.safe_load_all(raw_content)
-    for document in contents:
-        for item in document.items():
-            print(42 * "-", "\n", item, sep="")
-            print(item[1])
+    with (HERE / "ahoy.yaml").open("rb") as file:
+        # with (HERE / "real-example.yaml").open("rb") as file:
+        for document in iter_documents(file):
+            for item in document.items():
+                print(42 * "-", "\n", item, sep="")
+                print(item[1])
 
 
 if __name__ == "__main__":
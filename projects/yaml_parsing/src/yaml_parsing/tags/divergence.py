@@ -0,0 +1,241 @@
+"""
+Find the YAML files whose values differ between YAML 1.1 and YAML 1.2.
+
+``bools_example`` and ``versioned_example`` print how PyYAML (YAML 1.1)
+and ruamel.yaml (YAML 1.2) load one file. This loads every file in a tree
+with both, in a process pool, and reports every value that differs (with
+its path in the document), e.g. ``on`` being ``True`` in one and ``"on"``
+in the other.
+
+The comparison is type-aware, so ``True`` and ``1`` differ (even though
+they're equal in Python), and mapping keys are compared too, since
+``yes: 1`` has a ``True`` key in YAML 1.1.
+
+Most files have no scalar that the two specs read differently, so by
+default a regex first looks for any plain scalar that could be one (a
+YAML 1.1 boolean, a number with a leading zero, underscores, a colon, a
+leading dot, or an exponent, etc., as a value or a key) and only files
+with one are loaded. The regex can report scalars that don't differ, but
+not miss ones that do (for the forms listed in ``SUSPECT``); use
+``--no-prefilter`` to load every file.
+
+Exits with 1 if any file differs (or fails to load with either), so it
+can gate a deploy:
+
+    python -m yaml_parsing.tags.divergence path/to/configs
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import os
+import pathlib
+import re
+import time
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from yaml_parsing.loading import loader
+
+SUCCESS = 0
+FAILURE = 1
+YAML_1_1: loader.Backend = "pyyaml-c"
+YAML_1_2: loader.Backend = "ruamel"
+
+# The plain scalars that YAML 1.1 and YAML 1.2 can resolve differently
+SUSPECT = re.compile(
+    r"""
+    (?:^|[\s\[{,:?-])  # the start of a plain scalar
+    (?:
+        [yYnN]|[yY]es|YES|[nN]o|NO|[oO]n|ON|[oO]ff|OFF  # 1.1 booleans
+        |[-+]?0[0-9_]+  # 1.1 octals, and 1.1 strings like 08
+        |[-+]?0[bx][0-9a-fA-F_]+  # 1.1 binary, and hex with underscores
+        |[-+]?0o[0-7]+  # 1.2 octals
+        |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+(?:\.[0-9_]*)?  # 1.1 base 60
+        |[-+]?[0-9_]*_[0-9_]*(?:\.[0-9_]*)?  # 1.1 underscores
+        |[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)[eE][-+]?[0-9]+  # 1.2 exponents
+        |[-+]?\.[0-9]+  # 1.2 floats without a leading digit, like +.5
+        |[-+]?\.(?:inf|Inf|INF)|\.(?:nan|NaN|NAN)
+        |=|<<
+    )
+    (?=$|[\s,\]}#]|:(?:\s|$))  # the end of it (or of a key)
+    """,
+    re.MULTILINE | re.VERBOSE,
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Divergence:
+    location: str
+    yaml_1_1: Any
+    yaml_1_2: Any
+
+    def __str__(self) -> str:
+        return (
+            f"{self.location}: {self.yaml_1_1!r} (1.1) "
+            f"vs {self.yaml_1_2!r} (1.2)"
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class FileReport:
+    path: pathlib.Path
+    loaded: bool  # whether the file was loaded, rather than filtered out
+    divergences: list[Divergence]
+
+    @property
+    def ok(self) -> bool:
+        return not self.divergences
+
+
+def _same(a: Any, b: Any) -> bool:
+    return type(a) is type(b) and a == b
+
+
+def diff(a: Any, b: Any, location: str = "") -> Iterator[Divergence]:
+    """
+    Yield where the YAML 1.1 value ``a`` and the YAML 1.2 value ``b``
+    differ, recursively.
+    """
+
+    if isinstance(a, list) and isinstance(b, dict):
+        b = list(b.items())  # an ``!!omap``, which only ruamel.yaml maps
+
+    if isinstance(a, dict) and isinstance(b, dict):
+        if len(a) != len(b):
+            yield Divergence(location or "<root>", a, b)
+            return
+        # Both keep the keys in the order they're written
+        for (key_a, value_a), (key_b, value_b) in zip(
+            a.items(), b.items(), strict=True
+        ):
+            if not _same(key_a, key_b):
+                yield Divergence(f"{location}.<key {key_b!r}>", key_a, key_b)
+            yield from diff(value_a, value_b, f"{location}.{key_b}")
+    elif isinstance(a, list | tuple) and isinstance(b, list | tuple):
+        if len(a) != len(b):
+            yield Divergence(location or "<root>", a, b)
+            return
+        for i, (item_a, item_b) in enumerate(zip(a, b, strict=True)):
+            yield from diff(item_a, item_b, f"{location}[{i}]")
+    elif not _same(a, b):
+        yield Divergence(location or "<root>", a, b)
+
+
+def _load(content: bytes, backend: loader.Backend) -> list[Any] | Exception:
+    try:
+        return loader.load_all(content, backend)
+    except Exception as e:
+        return e
+
+
+def _message(documents: list[Any] | Exception) -> list[Any] | str:
+    return str(documents) if isinstance(documents, Exception) else documents
+
+
+def check_file(path: pathlib.Path, prefilter: bool = True) -> FileReport:
+    """
+    Load the file with YAML 1.1 and YAML 1.2, and return how they differ.
+    """
+
+    content = path.read_bytes()
+    if prefilter and not SUSPECT.search(content.decode("utf-8", "replace")):
+        return FileReport(path, False, [])
+
+    documents_1_1 = _load(content, YAML_1_1)
+    documents_1_2 = _load(content, YAML_1_2)
+    # The two libraries raise different errors, so report any of them
+    if isinstance(documents_1_1, Exception) or isinstance(
+        documents_1_2, Exception
+    ):
+        return FileReport(
+            path,
+            True,
+            [
+                Divergence(
+                    "<file>", _message(documents_1_1), _message(documents_1_2)
+                )
+            ],
+        )
+
+    return FileReport(
+        path,
+        True,
+        list(diff(documents_1_1, documents_1_2, "documents")),
+    )
+
+
+def find_files(roots: Sequence[pathlib.Path]) -> list[pathlib.Path]:
+    """
+    Return the YAML files in (or at) the roots.
+    """
+
+    files = []
+    for root in roots:
+        if root.is_file():
+            files.append(root)
+        else:
+            files.extend(root.rglob("*.yaml"))
+            files.extend(root.rglob("*.yml"))
+
+    return sorted(files)
+
+
+def check_files(
+    paths: Sequence[pathlib.Path],
+    *,
+    prefilter: bool = True,
+    workers: int | None = None,
+) -> list[FileReport]:
+    """
+    Check the files in a process pool, returning a report for each.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        return list(
+            executor.map(
+                check_file,
+                paths,
+                [prefilter] * len(paths),
+                # a few files per task, to cut down on the IPC per file
+                chunksize=max(1, len(paths) // (4 * workers)),
+            )
+        )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Parse the arguments and check the files.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*", type=pathlib.Path)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument(
+        "--no-prefilter",
+        dest="prefilter",
+        action="store_false",
+        help="load every file, rather than only those with suspect scalars",
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    files = find_files(args.paths or [pathlib.Path(__file__).parent])
+    reports = check_files(files, prefilter=args.prefilter, workers=args.workers)
+    for report in reports:
+        for divergence in report.divergences:
+            print(f"{report.path}: {divergence}")
+
+    differing = sum(not report.ok for report in reports)
+    loaded = sum(report.loaded for report in reports)
+    print(
+        f"{differing:,} of {len(reports):,} files differ "
+        f"({loaded:,} loaded) in {time.perf_counter() - start:.2f}s"
+    )
+
+    return FAILURE if differing else SUCCESS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
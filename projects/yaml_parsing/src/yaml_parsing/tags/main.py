@@ -19,6 +19,8 @@ from collections.abc import Callable
 import ruamel.yaml as ruyaml
 import yaml  # pyyaml
 
+from yaml_parsing.loading.loader import ruamel_yaml
+
 RED = "\033[1;31m"
 GREEN = "\033[1;32m"
 BLUE = "\033[1;34m"
@@ -58,7 +60,7 @@ def bools_example(content: str) -> None:
     """
 
     print(USING_RUAMEL)
-    _print_values(content, ruyaml.YAML(typ="safe", pure=True).load_all)
+    _print_values(content, ruamel_yaml().load_all)
 
     print(USING_PYYAML)
     _print_values(content, yaml.safe_load_all)
@@ -70,7 +72,7 @@ def versioned_example(content: str) -> None:
     """
 
     print(USING_RUAMEL)
-    _print_values(content, ruyaml.YAML(typ="safe", pure=True).load_all)
+    _print_values(content, ruamel_yaml().load_all)
 
     print(USING_PYYAML)
     _print_values(content, yaml.safe_load_all)
@@ -83,9 +85,7 @@ def set_and_omap_example(content: str) -> None:
 
     print(USING_RUAMEL)
     try:
-        print(
-            " " * 3, next(ruyaml.YAML(typ="safe", pure=True).load_all(content))
-        )
+        print(" " * 3, next(ruamel_yaml().load_all(content)))
     except Exception as e:
         print(colour(str(e), RED))
 
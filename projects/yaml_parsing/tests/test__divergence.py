@@ -0,0 +1,88 @@
+import pytest
+from yaml_parsing.tags import divergence
+
+
+def test__differences_between_the_specs_are_reported(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("a: yes\nb: 012\nc: [1, off]\n", encoding="utf-8")
+
+    report = divergence.check_file(path)
+
+    assert report.loaded
+    assert [
+        (d.location, d.yaml_1_1, d.yaml_1_2) for d in report.divergences
+    ] == [
+        ("documents[0].a", True, "yes"),
+        ("documents[0].b", 10, 12),
+        ("documents[0].c[1]", False, "off"),
+    ]
+
+
+def test__files_without_suspect_scalars_are_not_loaded(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("name: 'yes'\nsize: 10\nflag: true\n", encoding="utf-8")
+
+    assert not divergence.check_file(path).loaded
+    assert divergence.check_file(path, prefilter=False).ok
+
+
+def test__the_files_are_checked_in_a_pool(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "bad.yml").write_text("a: on\n", encoding="utf-8")
+    (tmp_path / "good.yaml").write_text("a: 1\n", encoding="utf-8")
+
+    assert divergence.main([str(tmp_path), "--workers", "2"]) == 1
+    assert divergence.main([str(tmp_path / "good.yaml")]) == 0
+
+
+@pytest.mark.parametrize(
+    "content, location, yaml_1_1, yaml_1_2",
+    [
+        ("on: push\n", "documents[0].<key 'on'>", True, "on"),
+        ("yes: 1\n", "documents[0].<key 'yes'>", True, "yes"),
+        ("a: 0o17\n", "documents[0].a", "0o17", 15),
+    ],
+)
+def test__suspect_keys_and_octals_are_not_filtered_out(
+    tmp_path, content, location, yaml_1_1, yaml_1_2
+):
+    path = tmp_path / "config.yaml"
+    path.write_text(content, encoding="utf-8")
+
+    report = divergence.check_file(path)
+
+    assert report.loaded
+    assert [
+        (d.location, d.yaml_1_1, d.yaml_1_2) for d in report.divergences
+    ] == [(location, yaml_1_1, yaml_1_2)]
+
+
+@pytest.mark.parametrize(
+    "scalar",
+    [
+        *["08", "09", "019", "-08", "010", "0o17", "0x1F", "0b101"],
+        *["+.5", "-.5", ".5", "1.5", "+1.", "1e3", "1.5e-3", ".inf", "1_000"],
+        *["1:30", "on", "yes", "N", "=", "10", "-1", "name", "1.0.1"],
+    ],
+)
+def test__the_prefilter_keeps_every_file_that_differs(tmp_path, scalar):
+    path = tmp_path / "config.yaml"
+    path.write_text(
+        f"a: {scalar}\nb: [{scalar}, x]\n{scalar}: c\n", encoding="utf-8"
+    )
+
+    filtered = divergence.check_file(path)
+    unfiltered = divergence.check_file(path, prefilter=False)
+
+    assert filtered.divergences == unfiltered.divergences
+
+
+def test__load_errors_are_reported_as_messages(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("a: [yes\n", encoding="utf-8")
+
+    [error] = divergence.check_file(path).divergences
+
+    assert error.location == "<file>"
+    assert isinstance(error.yaml_1_1, str)
+    assert isinstance(error.yaml_1_2, str)
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+from yaml_parsing.loading import loader
+
+
+@pytest.mark.parametrize(
+    ("backend", "expected"),
+    [
+        ("pyyaml-c", True),
+        ("pyyaml", True),
+        ("ruamel", "yes"),
+    ],
+)
+def test__load_all_follows_each_backends_yaml_version(backend, expected):
+    assert loader.load_all(b"---\na: yes\n---\nb: 1\n", backend) == [
+        {"a": expected},
+        {"b": 1},
+    ]
+
+
+def test__yaml_loader_reuses_documents_until_the_content_changes(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\n")
+    yaml_loader = loader.YAMLLoader()
+
+    first = yaml_loader.load(path)
+    assert yaml_loader.load(path) is first
+
+    # touched, but not changed
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert yaml_loader.load(path) is first
+
+    path.write_text("a: 2\n")
+    assert yaml_loader.load(path) == [{"a": 2}]
+    assert (yaml_loader.hits, yaml_loader.misses) == (2, 2)
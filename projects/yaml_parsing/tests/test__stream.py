@@ -0,0 +1,40 @@
+import io
+
+import pytest
+import yaml
+from yaml_parsing.loading import loader, stream
+
+CONTENT = """\
+---
+base: &base {x: 1, nested: {y: &y 2}}
+skipped: [1, 2, {z: *y}]
+kept:
+  <<: *base
+  ref: *y
+---
+- 1
+- 2
+"""
+
+
+def test__documents_are_read_lazily():
+    documents = stream.iter_documents(io.StringIO(CONTENT + "---\n[unclosed"))
+
+    assert next(documents)["kept"]["ref"] == 2
+    assert next(documents) == [1, 2]
+    with pytest.raises(yaml.YAMLError):
+        next(documents)
+
+
+@pytest.mark.parametrize(
+    "loader_class", [yaml.SafeLoader, loader.PYYAML_C_LOADER]
+)
+def test__only_the_wanted_keys_are_kept(loader_class):
+    documents = stream.iter_documents(
+        io.BytesIO(CONTENT.encode()), ["kept"], loader_class=loader_class
+    )
+
+    assert list(documents) == [
+        {"kept": {"x": 1, "nested": {"y": 2}, "ref": 2}},
+        [1, 2],
+    ]
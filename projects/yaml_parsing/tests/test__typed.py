@@ -0,0 +1,104 @@
+import dataclasses
+from typing import Literal
+
+import pytest
+from yaml_parsing.loading import typed
+from yaml_parsing.tags.main import Model
+
+
+@dataclasses.dataclass
+class Project:
+    name: str
+    models: list[Model]
+    owner: str | None = None
+    stage: Literal["dev", "prod"] = "dev"
+    threshold: float = 0.5
+
+
+@dataclasses.dataclass
+class Node:
+    name: str
+    children: list["Node"] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class BadNode:
+    children: list["BadNode"]
+    tags: set[int]
+
+
+def test__documents_are_converted_to_the_dataclass():
+    content = """
+---
+name: first
+models:
+  - {name: a, archived: false, columns: [x, y]}
+threshold: 1
+---
+name: second
+models: []
+owner: someone
+stage: prod
+"""
+
+    assert typed.load_all(content, Project) == [
+        Project("first", [Model("a", False, ["x", "y"])], threshold=1.0),
+        Project("second", [], "someone", "prod"),
+    ]
+    assert typed.converter(Project) is typed.converter(Project)
+
+
+@pytest.mark.parametrize(
+    ("content", "message"),
+    [
+        (
+            "name: a\nmodels: [{name: b, archived: yes, columns: 1}]",
+            "<document 0>.models.0.columns: expected a list, got int",
+        ),
+        (
+            "name: a\nmodels: [{name: b, archived: 1, columns: []}]",
+            "<document 0>.models.0.archived: expected bool, got int",
+        ),
+        (
+            "name: a\nmodels: []\nstage: test",
+            "<document 0>.stage: expected one of ('dev', 'prod'), got 'test'",
+        ),
+        ("name: a\nmodel: []", "<document 0>: unknown keys for Project"),
+    ],
+)
+def test__invalid_values_are_reported_with_their_location(content, message):
+    with pytest.raises(typed.ConversionError) as error:
+        typed.load_all(content, Project)
+
+    assert str(error.value).startswith(message)
+
+
+def test__python_tags_are_not_loaded():
+    with pytest.raises(Exception, match="python/object"):
+        typed.load_all("!!python/object:os.system {}", Model)
+
+
+def test__recursive_dataclasses_are_converted():
+    content = """
+name: root
+children:
+  - name: a
+    children: [{name: b}]
+  - name: c
+"""
+
+    assert typed.load_all(content, Node) == [
+        Node("root", [Node("a", [Node("b")]), Node("c")])
+    ]
+    with pytest.raises(typed.ConversionError) as error:
+        typed.load_all("name: root\nchildren: [{name: 1}]\n", Node)
+    assert (
+        str(error.value)
+        == "<document 0>.children.0.name: expected str, got int"
+    )
+
+
+def test__failed_recursive_dataclasses_are_not_cached():
+    for _ in range(2):
+        with pytest.raises(TypeError, match="Unsupported type"):
+            typed.converter(BadNode)